@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional, AsyncGenerator
 from dataclasses import dataclass, field
 from enum import Enum
 import json
+import re
 import pickle
 import traceback
 from datetime import datetime
@@ -19,6 +20,7 @@ from .models import Sequence, Chat, Message
 from .tools.rna_database.mcp import RNADatabaseMCP, MCPRequest
 from .tools.stdio_processor.mcp import StdioMCP
 from .tools.crap.crap_mcp import CrapMCP
+from .tools.alignment.mcp import AlignmentMCP
 
 # Configure logging
 logging.basicConfig(
@@ -236,6 +238,7 @@ class ChatProcessor:
         Yields:
             Chunks of the response as they are generated
         """
+        rna_tool = None
         try:
             logger.debug("Starting process_message")
             
@@ -278,6 +281,7 @@ class ChatProcessor:
             rna_tool = RNADatabaseMCP(self.user_id, self.chat_id, self.message_id)
             stdio_tool = StdioMCP(self.user_id, self.chat_id, self.message_id)
             crap_tool = CrapMCP(self.user_id, self.chat_id, self.message_id)
+            align_tool = AlignmentMCP(self.user_id, self.chat_id, self.message_id)
             
             last_plan_response = None
             loop_count = 0
@@ -373,12 +377,20 @@ class ChatProcessor:
                                 key, value = part.split(':', 1)
                                 value = value.strip('"')
                                 # Core parameters
-                                if key == 'Isotype_from_Anticodon':
+                                if key == 'search_term':
+                                    params['search_term'] = value
+                                elif key == 'Isotype_from_Anticodon':
                                     params['isotype'] = value
                                 elif key == 'Anticodon':
                                     params['anticodon'] = value
                                 elif key == 'species':
                                     params['species'] = value
+                                elif key == 'modification':
+                                    params['modification'] = value
+                                elif key == 'modification_mode':
+                                    params['modification_mode'] = value.lower()
+                                elif key == 'filter_logic':
+                                    params['filter_logic'] = value.lower()
                                 elif key == 'json_field':
                                     # Remove any quotes and preserve exact field name
                                     params['json_field'] = value
@@ -406,6 +418,60 @@ class ChatProcessor:
                                     params['limit'] = int(value)
                                 elif key == 'sample':
                                     params['sample'] = value.lower()  # normalize to lowercase
+                                elif key == 'seed':
+                                    params['seed'] = int(value)
+                                
+                                # Field projection
+                                elif key == 'fields':
+                                    params['fields'] = value
+
+                                # Specific genes
+                                elif key == 'gene_symbols':
+                                    params['gene_symbols'] = value
+
+                                # Genomic region
+                                elif key == 'chrom':
+                                    params['chrom'] = value
+                                elif key in ('start', 'end', 'flank'):
+                                    params[key] = int(value)
+
+                                # Variant filters
+                                elif key in ('rsid', 'trna_position'):
+                                    params[key] = value
+                                elif key == 'variant_region':
+                                    params['region'] = value
+                                elif key == 'variant_effect':
+                                    params['effect'] = value
+                                elif key == 'common_snp':
+                                    params['common'] = value.lower() == 'true'
+
+                                # Aggregate statistics
+                                elif key == 'statistics':
+                                    params['statistics'] = value
+                                elif key == 'facets':
+                                    params['facets'] = value
+                                elif key == 'cursor':
+                                    params['cursor'] = value
+
+                                # Sequence similarity
+                                elif key == 'sequence':
+                                    params['sequence'] = value
+                                elif key in ('sequence_type', 'method'):
+                                    params[key] = value.lower()
+
+                                # Structure similarity
+                                elif key == 'structure':
+                                    params['structure'] = value
+                                elif key == 'fold_like':
+                                    params['gene_symbol'] = value
+                                elif key == 'max_distance':
+                                    params['max_distance'] = int(value)
+
+                                # Motif scan
+                                elif key == 'motif':
+                                    params['motifs'] = value
+                                elif key == 'motif_logic':
+                                    params['motif_logic'] = value.lower()
 
                         
                         # Create MCP request with context in params
@@ -414,8 +480,28 @@ class ChatProcessor:
                             "chat_id": self.chat_id,
                             "message_id": self.message_id
                         }
+                        # Stream sequence events before the Postgres writes commit
+                        params["persist"] = "deferred"
+                        if 'statistics' in params:
+                            method = "get_statistics"
+                        elif 'gene_symbols' in params:
+                            method = "get_sequences"
+                        elif 'sequence' in params:
+                            method = "search_by_sequence"
+                        elif 'motifs' in params:
+                            method = "search_motif"
+                        elif params.keys() & {'structure', 'gene_symbol'}:
+                            method = "search_by_structure"
+                        elif params.keys() & {'rsid', 'trna_position', 'region', 'effect', 'common'}:
+                            method = "search_variants"
+                        elif 'chrom' in params:
+                            method = "search_region"
+                        else:
+                            method = "search_rna"
+                            # Totals of the filtered set come back with the page, saving follow-up searches
+                            params.setdefault('facets', True)
                         mcp_request = MCPRequest(
-                            method="search_rna",
+                            method=method,
                             params=params
                         )
 
@@ -428,8 +514,17 @@ class ChatProcessor:
                         })
                         
                         result = await rna_tool.process_request(mcp_request)
-                        
-                        if result.status == "success" and "sequences" in result.data:
+
+                        if result.status == "success" and "statistics" in result.data:
+                            # Exact aggregates go to the agents as-is, with no sequence events
+                            statistics = result.data["statistics"]
+                            self.accumulated_data.append({"statistics": statistics})
+                            summary = [f"Retrieved statistics ({', '.join(result.data['metadata']['statistics'])}) for:"]
+                            for species, document in statistics.items():
+                                summary.append(f"- {species}: {json.dumps(document)}")
+                            self.data_summary = "FETCHED DATA FOR \n".join(summary)
+
+                        elif result.status == "success" and "sequences" in result.data:
                             
                             sequences = result.data["sequences"]
                             logger.info(f"Got {len(sequences)} sequences")
@@ -479,7 +574,36 @@ class ChatProcessor:
                             # Create summary for planning agent
                             summary = [f"Retrieved {len(sequences)} sequences:"]
                             for seq in sequences:
-                                summary.append(f"- {seq['gene_symbol']} ({seq['isotype']})")
+                                if 'similarity' in seq:
+                                    similarity = seq['similarity']
+                                    summary.append(
+                                        f"- {seq['gene_symbol']} ({seq['isotype']}): alignment score {similarity['score']}, "
+                                        f"identity {similarity['identity']:.1%}"
+                                    )
+                                elif 'structure_similarity' in seq:
+                                    similarity = seq['structure_similarity']
+                                    summary.append(
+                                        f"- {seq['gene_symbol']} ({seq['isotype']}): base-pair distance {similarity['distance']}, "
+                                        f"{similarity['shared_pairs']} of {similarity['query_pairs']} query pairs shared"
+                                    )
+                                elif 'motif_hits' in seq:
+                                    hits = ", ".join(
+                                        f"{hit['motif']} at {hit['sequence_type']} {hit['start'] + 1}-{hit['end']}"
+                                        for hit in seq['motif_hits']
+                                    )
+                                    summary.append(f"- {seq['gene_symbol']} ({seq['isotype']}): {hits}")
+                                else:
+                                    summary.append(f"- {seq['gene_symbol']} ({seq['isotype']})")
+                            matches = result.data.get("metadata", {}).get("matches")
+                            if matches:
+                                summary.append(f"Motif matches across all scanned genes: {json.dumps(matches)}")
+                            if "facets" in result.data:
+                                facets = result.data["facets"]
+                                self.accumulated_data.append({"facets": facets})
+                                summary.append(f"Facets of all {facets.get('total', 0)} matching genes: {json.dumps(facets)}")
+                            next_cursor = result.data.get("metadata", {}).get("next_cursor")
+                            if next_cursor:
+                                summary.append(f'More results: repeat the same GET_TRNA with cursor:"{next_cursor}"')
                             
                             # Add to accumulated data summary
                             self.data_summary = "FETCHED DATA FOR \n".join(summary)
@@ -579,6 +703,66 @@ class ChatProcessor:
                             error_msg = result.error["message"] if result.error else "Unknown error"
                             yield json.dumps({'type': 'error', 'message': error_msg})
                     
+                    elif plan_response.startswith('ALIGNER'):
+                        logger.debug("Executing ALIGNER")
+                        # Parse key:"value" parameters, plus the older geneSymbols: [...] list form
+                        params = {}
+                        symbols = re.search(r'geneSymbols:\s*(\[.*?\])', plan_response)
+                        if symbols:
+                            params['gene_symbols'] = json.loads(symbols.group(1))
+                        aliases = {
+                            'Isotype_from_Anticodon': 'isotype',
+                            'Anticodon': 'anticodon',
+                            'General_tRNA_Model_Score_min': 'min_general_score',
+                            'General_tRNA_Model_Score_max': 'max_general_score',
+                            'Isotype_Model_Score_min': 'min_isotype_score',
+                            'Isotype_Model_Score_max': 'max_isotype_score',
+                        }
+                        for part in plan_response.split()[1:]:
+                            if ':' in part and not part.startswith('geneSymbols'):
+                                key, value = part.split(':', 1)
+                                value = value.strip('"')
+                                if value and not value.startswith('['):
+                                    params[aliases.get(key, key)] = value
+
+                        yield json.dumps({
+                            'type': 'tool_start',
+                            'content': "Aligning sequences...",
+                            'timestamp': datetime.utcnow().isoformat()
+                        })
+                        result = await align_tool.process_request(MCPRequest(method="align", params=params))
+
+                        if result.status == "success":
+                            data = result.data
+                            metadata = data["metadata"]
+                            if metadata["mode"] == "one_vs_many":
+                                count = metadata["targets"]
+                                summary = [f"Aligned {data['query']['name']} against {count} sequences ({metadata['method']}). Best hits:"]
+                                summary.extend(
+                                    f"- {hit['name']}: score {hit['score']}, identity {hit['identity']:.1%}"
+                                    for hit in data["hits"]
+                                )
+                            else:
+                                count = len(data["sequences"])
+                                summary = [f"Aligned {count} sequences all-vs-all ({metadata['method']}). Closest pairs:"]
+                                summary.extend(
+                                    f"- {pair['query']} / {pair['target']}: score {pair['score']}, identity {(pair['identity'] or 0):.1%}"
+                                    for pair in data["closest_pairs"]
+                                )
+                            yield json.dumps({
+                                'type': 'tool_progress',
+                                'content': f"Aligned {count} sequences",
+                                'timestamp': datetime.utcnow().isoformat()
+                            })
+                            # Full matrices only for small sets, they grow quadratically
+                            if count > 20:
+                                data = {key: value for key, value in data.items() if key not in ('scores', 'identity')}
+                            self.accumulated_data.append({"alignment": data})
+                            self.data_summary = "\n".join(summary)
+                        else:
+                            error_msg = result.error["message"] if result.error else "Unknown error"
+                            yield json.dumps({'type': 'error', 'message': error_msg})
+
                     """elif tool_name == "STDIO":
                         # Extract command from plan response
                         command = plan_response.split("COMMAND=")[1].split("\n")[0].strip()
@@ -607,6 +791,11 @@ class ChatProcessor:
                 'timestamp': datetime.utcnow().isoformat()
             })
 
+        finally:
+            # Make sure deferred sequence writes have committed before the stream ends, even after an error
+            if rna_tool is not None:
+                await rna_tool.flush()
+
 class ChatManager:
     """Creates new chat processors for message processing."""
 
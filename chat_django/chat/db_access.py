@@ -2,6 +2,7 @@
 import logging
 from typing import List, Dict, Optional
 from django.db import transaction
+from django.db.models import Prefetch
 from django.core.exceptions import PermissionDenied
 from asgiref.sync import sync_to_async
 from .models import Chat, Message, Sequence
@@ -47,7 +48,10 @@ class ChatHistoryAccess:
                 messages = await sync_to_async(list)(
                     Message.objects.filter(chat_id=chat_uuid)
                     .order_by('-created_at')  # Newest first
-                    .prefetch_related('sequences')
+                    .prefetch_related(Prefetch(
+                        'sequences',
+                        queryset=Sequence.objects.select_related('record')
+                    ))
                     [:message_limit]  # Get last N messages
                 )
                 logger.debug(f"Found {len(messages)} messages")
@@ -0,0 +1,191 @@
+import hashlib
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Existing rows predate source versioning, so they share one legacy version
+LEGACY_VERSION = 'legacy'
+
+ORGANISM_SPECIES = {
+    'Homo sapiens': 'human',
+    'Mus musculus': 'mouse',
+    'Saccharomyces cerevisiae': 'yeast',
+}
+
+RECORD_FIELDS = (
+    'anticodon', 'isotype', 'general_score', 'isotype_score', 'model_agreement',
+    'features', 'locus', 'sequences', 'overview', 'images',
+)
+
+# Sequence columns moved to TRNARecord that have no default. They are made
+# nullable before the data migration, so that on reverse they can be re-added
+# empty, refilled by unlink_records and only then made NOT NULL again.
+RELAXED_FIELDS = {
+    'gene_symbol': models.CharField(max_length=255, null=True),
+    'anticodon': models.CharField(max_length=10, null=True),
+    'isotype': models.CharField(max_length=10, null=True),
+    'general_score': models.FloatField(null=True),
+    'isotype_score': models.FloatField(null=True),
+    'model_agreement': models.BooleanField(null=True),
+    'features': models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+    'locus': models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+    'sequences': models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+    'overview': models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+}
+
+
+def make_key(species, gene_symbol, source_version):
+    return hashlib.sha256(f"{species}\x1f{gene_symbol}\x1f{source_version}".encode()).hexdigest()
+
+
+def link_existing_sequences(apps, schema_editor):
+    """Move the per-message record copies into shared TRNARecord rows"""
+    Sequence = apps.get_model('chat', 'Sequence')
+    TRNARecord = apps.get_model('chat', 'TRNARecord')
+
+    seen = set()
+    batch = []
+    for sequence in Sequence.objects.iterator(chunk_size=500):
+        overview = sequence.overview if isinstance(sequence.overview, dict) else {}
+        species = ORGANISM_SPECIES.get(overview.get('Organism'), 'unknown')
+        key = make_key(species, sequence.gene_symbol, LEGACY_VERSION)
+        if key not in seen:
+            TRNARecord.objects.get_or_create(
+                id=key,
+                defaults={
+                    'species': species,
+                    'gene_symbol': sequence.gene_symbol,
+                    'source_version': LEGACY_VERSION,
+                    **{field: getattr(sequence, field) for field in RECORD_FIELDS},
+                }
+            )
+            seen.add(key)
+        sequence.record_id = key
+        batch.append(sequence)
+        if len(batch) >= 500:
+            Sequence.objects.bulk_update(batch, ['record'])
+            batch = []
+    if batch:
+        Sequence.objects.bulk_update(batch, ['record'])
+
+
+def unlink_records(apps, schema_editor):
+    """Copy the shared record fields back onto every Sequence row"""
+    Sequence = apps.get_model('chat', 'Sequence')
+
+    batch = []
+    for sequence in Sequence.objects.select_related('record').iterator(chunk_size=500):
+        sequence.gene_symbol = sequence.record.gene_symbol
+        for field in RECORD_FIELDS:
+            setattr(sequence, field, getattr(sequence.record, field))
+        batch.append(sequence)
+        if len(batch) >= 500:
+            Sequence.objects.bulk_update(batch, ['gene_symbol', *RECORD_FIELDS])
+            batch = []
+    if batch:
+        Sequence.objects.bulk_update(batch, ['gene_symbol', *RECORD_FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_sequence_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TRNARecord',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ('species', models.CharField(max_length=50)),
+                ('gene_symbol', models.CharField(max_length=255)),
+                ('source_version', models.CharField(max_length=64)),
+                ('anticodon', models.CharField(max_length=10)),
+                ('isotype', models.CharField(max_length=10)),
+                ('general_score', models.FloatField()),
+                ('isotype_score', models.FloatField()),
+                ('model_agreement', models.BooleanField()),
+                ('features', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('locus', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('sequences', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('overview', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('images', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'trna_records',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trnarecord',
+            index=models.Index(fields=['gene_symbol'], name='trna_record_gene_sy_647366_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trnarecord',
+            constraint=models.UniqueConstraint(fields=('species', 'gene_symbol', 'source_version'), name='unique_trna_record'),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='record',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='links', to='chat.trnarecord'),
+        ),
+        *(
+            migrations.AlterField(model_name='sequence', name=name, field=field)
+            for name, field in RELAXED_FIELDS.items()
+        ),
+        migrations.RunPython(link_existing_sequences, unlink_records),
+        migrations.AlterField(
+            model_name='sequence',
+            name='record',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='links', to='chat.trnarecord'),
+        ),
+        migrations.RemoveIndex(
+            model_name='sequence',
+            name='sequences_gene_sy_34c95f_idx',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='anticodon',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='features',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='gene_symbol',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='general_score',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='images',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='isotype',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='isotype_score',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='locus',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='model_agreement',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='overview',
+        ),
+        migrations.RemoveField(
+            model_name='sequence',
+            name='sequences',
+        ),
+    ]
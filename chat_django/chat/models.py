@@ -1,4 +1,5 @@
 import uuid
+import hashlib
 from django.db import models
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
@@ -49,14 +50,18 @@ class Message(models.Model):
         ordering = ['created_at']
 
 
-class Sequence(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='sequences')
-    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='sequences')
-    
-    # tRNA specific fields
+class TRNARecord(models.Model):
+    """A GtRNAdb gene record, stored once and shared by every message that returns it.
+
+    The primary key is derived from species, gene symbol and source database
+    version, so writers can address a record without looking it up first.
+    """
+    id = models.CharField(primary_key=True, max_length=64, editable=False)
+    species = models.CharField(max_length=50)
     gene_symbol = models.CharField(max_length=255)
+    source_version = models.CharField(max_length=64)
+
+    # tRNA specific fields
     anticodon = models.CharField(max_length=10)
     isotype = models.CharField(max_length=10)
     general_score = models.FloatField()
@@ -67,6 +72,50 @@ class Sequence(models.Model):
     sequences = models.JSONField(encoder=DjangoJSONEncoder)  # Contains different sequence types
     overview = models.JSONField(encoder=DjangoJSONEncoder)  # Contains modifications and other data
     images = models.JSONField(encoder=DjangoJSONEncoder, default=dict)  # Contains cloverleaf and other structural images
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'trna_records'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['species', 'gene_symbol', 'source_version'],
+                name='unique_trna_record'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['gene_symbol']),
+        ]
+
+    @staticmethod
+    def make_key(species: str, gene_symbol: str, source_version: str) -> str:
+        """Primary key for a species, gene symbol and source database version."""
+        return hashlib.sha256(f"{species}\x1f{gene_symbol}\x1f{source_version}".encode()).hexdigest()
+
+    def to_payload(self):
+        """Record fields in the format sent to the frontend."""
+        return {
+            'gene_symbol': self.gene_symbol,
+            'anticodon': self.anticodon,
+            'isotype': self.isotype,
+            'general_score': self.general_score,
+            'isotype_score': self.isotype_score,
+            'model_agreement': self.model_agreement,
+            'features': self.features,
+            'locus': self.locus,
+            'sequences': self.sequences,
+            'overview': self.overview,
+            'images': self.images,
+        }
+
+
+class Sequence(models.Model):
+    """Links a shared TRNARecord to the chat message that returned it."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='sequences')
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='sequences')
+    record = models.ForeignKey(TRNARecord, on_delete=models.PROTECT, related_name='links')
     
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -76,27 +125,19 @@ class Sequence(models.Model):
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['chat', '-created_at']),
             models.Index(fields=['message', '-created_at']),
-            models.Index(fields=['gene_symbol']),
         ]
         ordering = ['-created_at']
 
     def to_dict(self):
-        """Convert sequence to dictionary format for SSE."""
+        """Convert sequence to dictionary format for SSE.
+
+        Callers listing many sequences should select_related('record').
+        """
         return {
             'type': 'sequence_data',
             'data': {
                 'id': str(self.id),
-                'gene_symbol': self.gene_symbol,
-                'anticodon': self.anticodon,
-                'isotype': self.isotype,
-                'general_score': self.general_score,
-                'isotype_score': self.isotype_score,
-                'model_agreement': self.model_agreement,
-                'features': self.features,
-                'locus': self.locus,
-                'sequences': self.sequences,
-                'overview': self.overview,
-                'images': self.images,
+                **self.record.to_payload(),
                 'created_at': self.created_at.isoformat(),
             }
         }
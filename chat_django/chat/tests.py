@@ -1,3 +1,214 @@
-from django.test import TestCase
+import uuid
 
-# need tests
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from authentication.models import User
+from .models import Chat, Message, Sequence, TRNARecord
+from .tools.rna_database.persistence import SequenceWriter
+
+
+def make_record(gene_symbol, **fields):
+    """A decoded record as SequenceWriter receives it from decode_row"""
+    return {
+        'gene_symbol': gene_symbol,
+        'anticodon': 'AGC',
+        'isotype': 'Ala',
+        'general_score': 70.0,
+        'isotype_score': 80.0,
+        'model_agreement': True,
+        'features': 'high confidence',
+        'locus': 'chr6:28763741-28763812 (-)',
+        'sequences': {'Predicted Mature tRNA': 'GGGGAUGUAGCUCAG'},
+        'overview': {'Organism': 'Homo sapiens'},
+        'images': {},
+        **fields,
+    }
+
+
+def inserts_into(queries, table):
+    """Number of INSERT statements into a table, ignore_conflicts ones included"""
+    return sum(
+        query['sql'].startswith('INSERT') and f'INTO "{table}"' in query['sql'] for query in queries
+    )
+
+
+class ChatFixtureMixin:
+    """A user with one chat holding two messages"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='writer@example.com', username='writer', password='x')
+        self.chat = Chat.objects.create(user=self.user, title='tRNA')
+        self.message = Message.objects.create(chat=self.chat, content='Ala genes', role='assistant')
+        self.other_message = Message.objects.create(chat=self.chat, content='Again', role='assistant')
+
+    def context(self, message=None):
+        return {
+            'user_id': self.user.id,
+            'chat_id': self.chat.id,
+            'message_id': (message or self.message).id,
+        }
+
+
+class SequenceWriterTests(ChatFixtureMixin, TestCase):
+
+    def test_batch_is_stored_with_one_insert_per_table(self):
+        records = [make_record('tRNA-Ala-AGC-1-1'), make_record('tRNA-Ala-AGC-2-1')]
+        with CaptureQueriesContext(connection) as queries:
+            payloads = async_to_sync(SequenceWriter().write)(records, self.context(), 'human', 'v1')
+
+        self.assertEqual(inserts_into(queries.captured_queries, 'trna_records'), 1)
+        self.assertEqual(inserts_into(queries.captured_queries, 'sequences'), 1)
+        self.assertEqual([p['gene_symbol'] for p in payloads], ['tRNA-Ala-AGC-1-1', 'tRNA-Ala-AGC-2-1'])
+        links = Sequence.objects.select_related('record').filter(message=self.message)
+        self.assertEqual(
+            {str(link.id): link.record.gene_symbol for link in links},
+            {p['id']: p['gene_symbol'] for p in payloads}
+        )
+        self.assertEqual({link.record.species for link in links}, {'human'})
+        # Payloads carry the same keys as Sequence.to_dict sends
+        self.assertEqual(set(payloads[0]), set(links[0].to_dict()['data']))
+
+    def test_messages_share_one_record(self):
+        writer = SequenceWriter()
+        record = make_record('tRNA-Ala-AGC-1-1')
+        first = async_to_sync(writer.write)([record], self.context(), 'human', 'v1')
+        with CaptureQueriesContext(connection) as queries:
+            second = async_to_sync(writer.write)([record], self.context(self.other_message), 'human', 'v1')
+
+        self.assertEqual(inserts_into(queries.captured_queries, 'trna_records'), 0)
+        self.assertNotEqual(first[0]['id'], second[0]['id'])
+        self.assertEqual(TRNARecord.objects.count(), 1)
+        self.assertEqual(TRNARecord.objects.get().links.count(), 2)
+
+        # A new source version is a new record
+        async_to_sync(writer.write)([record], self.context(self.other_message), 'human', 'v2')
+        self.assertEqual(TRNARecord.objects.count(), 2)
+
+    def test_partial_records_are_loaded_once_and_only_when_missing(self):
+        calls = []
+
+        async def load_records(species, gene_symbols):
+            calls.append((species, gene_symbols))
+            return [make_record(symbol) for symbol in gene_symbols]
+
+        writer = SequenceWriter(load_records)
+        partial = [{'gene_symbol': 'tRNA-Ala-AGC-1-1'}, {'gene_symbol': 'tRNA-Ala-AGC-2-1'}]
+        payloads = async_to_sync(writer.write)(partial, self.context(), 'human', 'v1')
+
+        self.assertEqual(calls, [('human', ['tRNA-Ala-AGC-1-1', 'tRNA-Ala-AGC-2-1'])])
+        self.assertEqual([set(p) for p in payloads], [{'id', 'gene_symbol', 'created_at'}] * 2)
+        stored = TRNARecord.objects.get(gene_symbol='tRNA-Ala-AGC-2-1')
+        self.assertEqual(stored.locus, 'chr6:28763741-28763812 (-)')
+
+        # Stored keys are linked without reloading them
+        async_to_sync(writer.write)(partial, self.context(self.other_message), 'human', 'v1')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Sequence.objects.filter(message=self.other_message).count(), 2)
+
+        with self.assertRaises(ValueError):
+            async_to_sync(SequenceWriter().write)(
+                [{'gene_symbol': 'tRNA-Ala-AGC-3-1'}], self.context(), 'human', 'v1'
+            )
+
+    async def test_deferred_writes_land_on_flush(self):
+        writer = SequenceWriter()
+        payloads = await writer.write(
+            [make_record('tRNA-Ala-AGC-1-1')], self.context(), 'human', 'v1', deferred=True
+        )
+        await writer.flush()
+
+        link = await Sequence.objects.select_related('record').aget(message=self.message)
+        self.assertEqual(str(link.id), payloads[0]['id'])
+        self.assertEqual(link.record.gene_symbol, 'tRNA-Ala-AGC-1-1')
+        self.assertEqual(writer._pending, [])
+
+
+class SequenceWriterAtomicityTests(ChatFixtureMixin, TransactionTestCase):
+    """Foreign keys are only checked on commit, so these need real transactions"""
+
+    async def test_failed_links_leave_no_records_behind(self):
+        context = {**self.context(), 'message_id': uuid.uuid4()}
+        with self.assertRaises(Exception):
+            await SequenceWriter().write([make_record('tRNA-Ala-AGC-1-1')], context, 'human', 'v1')
+
+        self.assertEqual(await TRNARecord.objects.acount(), 0)
+        self.assertEqual(await Sequence.objects.acount(), 0)
+
+    async def test_failed_deferred_write_is_logged_by_flush(self):
+        writer = SequenceWriter()
+        context = {**self.context(), 'message_id': uuid.uuid4()}
+        await writer.write([make_record('tRNA-Ala-AGC-1-1')], context, 'human', 'v1', deferred=True)
+        with self.assertLogs('chat.tools.rna_database.persistence', 'ERROR'):
+            await writer.flush()
+
+        self.assertEqual(await TRNARecord.objects.acount(), 0)
+        self.assertEqual(await Sequence.objects.acount(), 0)
+
+
+class TRNARecordMigrationTests(TransactionTestCase):
+    """0004 folds per-message copies into shared legacy records, and back"""
+
+    before = [('chat', '0003_sequence_images')]
+    after = [('chat', '0004_trna_records')]
+
+    def setUp(self):
+        self.migrate(self.before)
+        apps = self.executor.loader.project_state(self.before).apps
+        user = apps.get_model('authentication', 'User').objects.create(email='legacy@example.com', username='legacy')
+        chat = apps.get_model('chat', 'Chat').objects.create(user=user, title='Legacy')
+        Message = apps.get_model('chat', 'Message')
+        messages = [Message.objects.create(chat=chat, content=str(i), role='assistant') for i in range(2)]
+        self.legacy = [
+            (messages[0], make_record('tRNA-Ala-AGC-1-1')),
+            (messages[1], make_record('tRNA-Ala-AGC-1-1', images={'cloverleaf': 'a.png'})),
+            (messages[1], make_record('tRNA-Ala-AGC-1-1', overview={'Organism': 'Mus musculus'})),
+            (messages[1], make_record('tRNA-Gly-GCC-1-1', overview=['not', 'a', 'dict'])),
+        ]
+        Sequence = apps.get_model('chat', 'Sequence')
+        for message, record in self.legacy:
+            Sequence.objects.create(user=user, chat=chat, message=message, **record)
+
+    def tearDown(self):
+        self.migrate(self.executor.loader.graph.leaf_nodes())
+
+    def migrate(self, targets):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(targets)
+        self.executor.loader.build_graph()
+
+    def test_forward_shares_legacy_records_and_backward_restores_copies(self):
+        self.migrate(self.after)
+        apps = self.executor.loader.project_state(self.after).apps
+        records = apps.get_model('chat', 'TRNARecord').objects.all()
+        self.assertEqual(
+            sorted((r.species, r.gene_symbol, r.source_version) for r in records),
+            [
+                ('human', 'tRNA-Ala-AGC-1-1', 'legacy'),
+                ('mouse', 'tRNA-Ala-AGC-1-1', 'legacy'),
+                ('unknown', 'tRNA-Gly-GCC-1-1', 'legacy'),
+            ]
+        )
+        for record in records:
+            self.assertEqual(record.id, TRNARecord.make_key(record.species, record.gene_symbol, 'legacy'))
+        self.assertEqual(records.get(species='human').links.count(), 2)
+
+        self.migrate(self.before)
+        apps = self.executor.loader.project_state(self.before).apps
+
+        def organism(overview):
+            return overview.get('Organism') if isinstance(overview, dict) else None
+
+        self.assertEqual(
+            sorted(
+                (str(s.message_id), s.gene_symbol, s.anticodon, organism(s.overview))
+                for s in apps.get_model('chat', 'Sequence').objects.all()
+            ),
+            sorted(
+                (str(message.id), record['gene_symbol'], record['anticodon'], organism(record['overview']))
+                for message, record in self.legacy
+            )
+        )
@@ -1,7 +1,7 @@
 """tRNA analysis tools."""
 
 from .rna_database.mcp import RNADatabaseMCP as RNADatabaseTool
-from .basicAlignment import BasicAlignmentTool
+from .alignment.mcp import AlignmentMCP as BasicAlignmentTool
 from .sprinzl import RunPipeline
 
 # Disable selenium-dependent tools for now
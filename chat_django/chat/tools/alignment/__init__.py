@@ -0,0 +1 @@
+"""Sequence alignment tool with MCP interface."""
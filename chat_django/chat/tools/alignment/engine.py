@@ -0,0 +1,376 @@
+"""Vectorized pairwise alignment of tRNA sequences.
+
+Global (Needleman-Wunsch) and local (Smith-Waterman) alignment with affine
+gaps (Gotoh), evaluated for a whole batch of sequence pairs at once. Pairs
+are padded into (pairs x length) arrays and the dynamic programming matrix is
+filled one row at a time, each row as a handful of NumPy operations across
+every pair and column:
+
+- diagonal and vertical moves only depend on the previous row;
+- horizontal gaps are resolved with a running maximum along the row
+  (``np.maximum.accumulate``), the same observation that lets striped
+  aligners fix up their lazy-F loop: with an opening penalty at least as
+  large as the extension penalty, a horizontal gap is always best opened
+  from a cell that does not itself end in a horizontal gap.
+
+tRNAs are about 70-90 nt, so a row loop of ~90 steps over all pairs aligns
+hundreds of pairs in a few milliseconds. Traceback bits are kept per cell in
+one uint8 array and walked in Python per pair. Batches beyond
+POOL_MIN_PAIRS are split into chunks of similar lengths and spread over a
+process pool.
+"""
+import os
+import threading
+import multiprocessing
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODES = ("global", "local")
+
+# Pairs aligned per vectorized batch, and batches large enough for the process pool
+CHUNK_PAIRS = int(os.getenv('RNA_ALIGN_CHUNK_PAIRS', '1024'))
+POOL_MIN_PAIRS = int(os.getenv('RNA_ALIGN_POOL_MIN_PAIRS', '20000'))
+POOL_WORKERS = int(os.getenv('RNA_ALIGN_WORKERS', '0')) or os.cpu_count() or 1
+# Forking the threaded ASGI worker can copy a lock held by another thread
+# into the child, so workers are started from a clean server process
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# A, C, G, U (and T), anything else is N; PAD fills the arrays beyond a sequence
+_CODES = np.full(256, 4, dtype=np.int8)
+for _code, _bases in enumerate(("Aa", "Cc", "Gg", "UuTt")):
+    for _base in _bases:
+        _CODES[ord(_base)] = _code
+PAD = 5
+# Far below any reachable score, yet safe from int32 overflow when offset
+_NEG = -(1 << 28)
+
+# Traceback bits of a cell: source of the gap-free score D, whether H took the
+# horizontal gap E, and whether E and F were opened here rather than extended
+_D_DIAG, _D_UP = 1, 2
+_H_LEFT = 4
+_E_OPEN = 8
+_F_OPEN = 16
+
+
+@dataclass(frozen=True)
+class Scoring:
+    """Match/mismatch scores and affine gap penalties.
+
+    A gap of length k scores gap_open + (k - 1) * gap_extend.
+    """
+    match: int = 2
+    mismatch: int = -3
+    gap_open: int = -5
+    gap_extend: int = -2
+
+    def validate(self) -> None:
+        """Raises ValueError unless gap_open <= gap_extend <= 0 and match > mismatch"""
+        if not self.gap_open <= self.gap_extend <= 0:
+            raise ValueError("Gap penalties must satisfy gap_open <= gap_extend <= 0")
+        if self.match <= self.mismatch:
+            raise ValueError("match must score higher than mismatch")
+
+    def matrix(self) -> np.ndarray:
+        """Substitution scores indexed by base code, PAD scoring far below anything"""
+        scores = np.full((PAD + 1, PAD + 1), self.mismatch, dtype=np.int32)
+        for code in range(4):
+            scores[code, code] = self.match
+        scores[PAD, :] = scores[:, PAD] = _NEG
+        return scores
+
+
+DEFAULT_SCORING = Scoring()
+
+
+@dataclass
+class Alignment:
+    """Optimal alignment of one pair; coordinates are 0-based, ends exclusive."""
+    score: int
+    identity: Optional[float] = None
+    aligned_query: str = ""
+    aligned_target: str = ""
+    query_start: int = 0
+    query_end: int = 0
+    target_start: int = 0
+    target_end: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def encode(sequence: str) -> np.ndarray:
+    """Base codes of a sequence; case-insensitive, T reads as U"""
+    return _CODES[np.frombuffer(sequence.encode("ascii", "replace"), dtype=np.uint8)]
+
+
+def _padded(sequences: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.asarray([len(s) for s in sequences], dtype=np.int64)
+    codes = np.full((len(sequences), max(int(lengths.max(initial=0)), 1)), PAD, dtype=np.int8)
+    for row, sequence in enumerate(sequences):
+        codes[row, :len(sequence)] = encode(sequence)
+    return codes, lengths
+
+
+def _traceback(
+    trace: np.ndarray,
+    query: str,
+    target: str,
+    end: Tuple[int, int],
+    local: bool
+) -> Tuple[str, str, int, int, int]:
+    """Walk the traceback bits of one pair from its end cell
+
+    Returns:
+        (aligned query, aligned target, query start, target start, matches)
+    """
+    i, j = end
+    state = "H"
+    top, bottom = [], []
+    matches = 0
+    while True:
+        if state == "H":
+            if i == 0 and j == 0:
+                break
+            bits = int(trace[i, j])
+            if i == 0:
+                state = "E"
+            elif j == 0:
+                state = "F"
+            elif bits & _H_LEFT:
+                state = "E"
+            else:
+                state = "D"
+            if local and state != "D" and (i == 0 or j == 0):
+                break
+        elif state == "D":
+            source = int(trace[i, j]) & 3
+            if source == _D_DIAG:
+                a, b = query[i - 1], target[j - 1]
+                matches += _CODES[ord(a) & 0xFF] == _CODES[ord(b) & 0xFF] != 4
+                top.append(a)
+                bottom.append(b)
+                i, j = i - 1, j - 1
+                state = "H"
+            elif source == _D_UP:
+                state = "F"
+            else:
+                break
+        elif state == "F":
+            opened = i == 1 if j == 0 else bool(trace[i, j] & _F_OPEN)
+            top.append(query[i - 1])
+            bottom.append("-")
+            i -= 1
+            if opened:
+                state = "H"
+        else:
+            opened = j == 1 if i == 0 else bool(trace[i, j] & _E_OPEN)
+            top.append("-")
+            bottom.append(target[j - 1])
+            j -= 1
+            if opened:
+                # A horizontal gap is opened from the gap-free score of its left cell
+                state = "H" if i == 0 else "D"
+    return "".join(reversed(top)), "".join(reversed(bottom)), i, j, int(matches)
+
+
+def align_chunk(
+    queries: Sequence[str],
+    targets: Sequence[str],
+    mode: str = "global",
+    scoring: Scoring = DEFAULT_SCORING,
+    traceback: bool = True
+) -> List[Alignment]:
+    """Align queries[k] with targets[k] for every k in one vectorized batch
+
+    Also the unit of work of the process pool, so it must stay importable at
+    module level.
+    """
+    local = mode == "local"
+    pairs = len(queries)
+    if pairs == 0:
+        return []
+    query_codes, query_lengths = _padded(queries)
+    target_codes, target_lengths = _padded(targets)
+    rows, width = query_codes.shape[1], target_codes.shape[1] + 1
+    substitution = scoring.matrix()
+    gap_open, gap_extend = scoring.gap_open, scoring.gap_extend
+    columns = np.arange(width, dtype=np.int32)
+    valid = columns[None, :] <= target_lengths[:, None]
+
+    # Row 0: nothing of the query consumed
+    if local:
+        H = np.zeros((pairs, width), dtype=np.int32)
+    else:
+        H = np.where(columns == 0, 0, gap_open + (columns - 1) * gap_extend).astype(np.int32)
+        H = np.broadcast_to(H, (pairs, width)).copy()
+    F = np.full((pairs, width), _NEG, dtype=np.int32)
+    trace = np.zeros((pairs, rows + 1, width), dtype=np.uint8) if traceback else None
+
+    scores = np.zeros(pairs, dtype=np.int64)
+    ends = np.zeros((pairs, 2), dtype=np.int64)
+    if local:
+        scores[:] = 0
+    else:
+        empty = query_lengths == 0
+        scores[empty] = H[empty, target_lengths[empty]]
+        ends[:, 1] = target_lengths
+
+    pair_index = np.arange(pairs)
+    horizontal_offset = gap_open + (columns[1:] - 1) * gap_extend
+    for i in range(1, rows + 1):
+        # Vertical gaps: open from the cell above or extend
+        f_open = H + gap_open
+        f_extend = F + gap_extend
+        F = np.maximum(f_open, f_extend)
+
+        # Diagonal moves, then the best gap-free score D
+        diagonal = np.full((pairs, width), _NEG, dtype=np.int32)
+        diagonal[:, 1:] = H[:, :-1] + substitution[query_codes[:, i - 1][:, None], target_codes]
+        D = np.maximum(diagonal, F)
+        if local:
+            D = np.maximum(D, 0)
+
+        # Horizontal gaps: E[j] = max over k < j of D[k] + gap_open + (j - 1 - k) * gap_extend
+        running = np.maximum.accumulate(D - columns * gap_extend, axis=1)
+        E = np.full((pairs, width), _NEG, dtype=np.int32)
+        E[:, 1:] = running[:, :-1] + horizontal_offset
+        H = np.maximum(D, E)
+
+        if traceback:
+            if local:
+                source = np.where((D == diagonal) & (D > 0), _D_DIAG, np.where((D == F) & (D > 0), _D_UP, 0))
+            else:
+                source = np.where(D == diagonal, _D_DIAG, _D_UP)
+            bits = source.astype(np.uint8)
+            bits |= np.where(E > D, _H_LEFT, 0).astype(np.uint8)
+            e_open = np.zeros((pairs, width), dtype=bool)
+            e_open[:, 1:] = D[:, :-1] + gap_open >= E[:, :-1] + gap_extend
+            bits |= np.where(e_open, _E_OPEN, 0).astype(np.uint8)
+            bits |= np.where(f_open >= f_extend, _F_OPEN, 0).astype(np.uint8)
+            trace[:, i, :] = bits
+
+        if local:
+            masked = np.where(valid, H, -1)
+            best_column = masked.argmax(axis=1)
+            best = masked[pair_index, best_column]
+            better = (best > scores) & (i <= query_lengths)
+            scores[better] = best[better]
+            ends[better, 0] = i
+            ends[better, 1] = best_column[better]
+        else:
+            done = query_lengths == i
+            scores[done] = H[done, target_lengths[done]]
+            ends[done, 0] = i
+
+    alignments = []
+    for k in range(pairs):
+        alignment = Alignment(score=int(scores[k]))
+        query_end, target_end = int(ends[k, 0]), int(ends[k, 1])
+        if traceback:
+            top, bottom, query_start, target_start, matches = _traceback(
+                trace[k], queries[k], targets[k], (query_end, target_end), local
+            )
+            alignment.aligned_query, alignment.aligned_target = top, bottom
+            alignment.identity = round(matches / len(top), 4) if top else 0.0
+            alignment.query_start, alignment.target_start = query_start, target_start
+        alignment.query_end, alignment.target_end = query_end, target_end
+        alignments.append(alignment)
+    return alignments
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the process-wide alignment worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=POOL_WORKERS,
+                    mp_context=multiprocessing.get_context(POOL_START_METHOD)
+                )
+                logger.info(f"Started alignment process pool with {POOL_WORKERS} {POOL_START_METHOD} workers")
+    return _pool
+
+
+def align_pairs(
+    pairs: Sequence[Tuple[str, str]],
+    mode: str = "global",
+    scoring: Scoring = DEFAULT_SCORING,
+    traceback: bool = True,
+    workers: Optional[int] = None
+) -> List[Alignment]:
+    """Align each (query, target) pair
+
+    Pairs are sorted by length and cut into chunks of CHUNK_PAIRS, so each
+    vectorized batch carries little padding. Batches of at least
+    POOL_MIN_PAIRS pairs run in the process pool.
+
+    Args:
+        pairs: (query, target) sequences
+        mode: "global" or "local"
+        scoring: Scores and gap penalties
+        traceback: Also compute the aligned strings, coordinates and identity
+        workers: 1 to stay in-process; by default the pool is used for large batches
+
+    Returns:
+        One Alignment per pair, in input order
+
+    Raises:
+        ValueError: If the mode or scoring is invalid
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}, got '{mode}'")
+    scoring.validate()
+    order = sorted(range(len(pairs)), key=lambda k: (len(pairs[k][0]), len(pairs[k][1])))
+    chunks = [order[start:start + CHUNK_PAIRS] for start in range(0, len(order), CHUNK_PAIRS)]
+    arguments = [
+        ([pairs[k][0] for k in chunk], [pairs[k][1] for k in chunk], mode, scoring, traceback)
+        for chunk in chunks
+    ]
+    if len(pairs) >= POOL_MIN_PAIRS and len(chunks) > 1 and (workers or POOL_WORKERS) > 1:
+        results = list(get_process_pool().map(align_chunk, *zip(*arguments)))
+    else:
+        results = [align_chunk(*args) for args in arguments]
+
+    alignments: List[Optional[Alignment]] = [None] * len(pairs)
+    for chunk, chunk_alignments in zip(chunks, results):
+        for k, alignment in zip(chunk, chunk_alignments):
+            alignments[k] = alignment
+    return alignments
+
+
+def align_one_to_many(query: str, targets: Sequence[str], **options: Any) -> List[Alignment]:
+    """Align one query against each target; options as for align_pairs"""
+    return align_pairs([(query, target) for target in targets], **options)
+
+
+def align_all_to_all(
+    sequences: Sequence[str],
+    **options: Any
+) -> Tuple[np.ndarray, List[Tuple[int, int, Alignment]]]:
+    """Align every pair of sequences once; options as for align_pairs
+
+    Returns:
+        (symmetric score matrix with self-alignment scores on the diagonal,
+        (i, j, alignment) for every i < j)
+    """
+    indices = [(i, j) for i in range(len(sequences)) for j in range(i + 1, len(sequences))]
+    alignments = align_pairs([(sequences[i], sequences[j]) for i, j in indices], **options)
+    scoring = options.get("scoring", DEFAULT_SCORING)
+    matrix = np.zeros((len(sequences), len(sequences)), dtype=np.int64)
+    for (i, j), alignment in zip(indices, alignments):
+        matrix[i, j] = matrix[j, i] = alignment.score
+    for i, sequence in enumerate(sequences):
+        codes = encode(sequence)
+        matrix[i, i] = int(np.where(codes < 4, scoring.match, scoring.mismatch).sum())
+    return matrix, [(i, j, alignment) for (i, j), alignment in zip(indices, alignments)]
@@ -0,0 +1,253 @@
+"""MCP interface for the tRNA sequence aligner.
+
+Aligns sequences given directly, genes named by symbol, or every gene
+matching search_rna filters (e.g. all human Leu tRNAs), using the batched
+engine in engine.py. Gene records are read through RNADatabaseMCP without
+being persisted to the chat.
+"""
+import re
+import time
+import asyncio
+import functools
+import logging
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..rna_database.kmers import SEQUENCE_TYPES
+from ..rna_database.mcp import MCPRequest, MCPResponse, RNADatabaseMCP
+from .engine import MODES, Scoring, align_all_to_all, align_one_to_many
+
+logger = logging.getLogger(__name__)
+
+ALIGNMENT_MODES = ("one_vs_many", "all_vs_all")
+
+# Upper bounds on the sequences of one request
+MAX_TARGETS = 1000
+MAX_ALL_VS_ALL = 300
+
+# all_vs_all computes aligned strings and identities up to this many pairs
+MAX_TRACEBACK_PAIRS = 5000
+
+_NUCLEOTIDES = re.compile(r"^[ACGTUNacgtun]+$")
+
+
+class AlignmentMCP:
+    """MCP-style pairwise alignment tool over GtRNAdb sequences."""
+
+    def __init__(self, user_id: str, chat_id: Optional[str] = None, message_id: Optional[str] = None):
+        """Initialize with chat context
+
+        Args:
+            user_id: ID of current user
+            chat_id: Chat session ID
+            message_id: Message ID for data association
+        """
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.database = RNADatabaseMCP(user_id, chat_id, message_id)
+        self.capabilities = {
+            "align": {
+                "modes": list(ALIGNMENT_MODES),
+                "methods": list(MODES),
+                "sequence_types": list(SEQUENCE_TYPES),
+                "scoring": asdict(Scoring()),
+                "max_targets": MAX_TARGETS,
+                "max_all_vs_all": MAX_ALL_VS_ALL
+            }
+        }
+
+    async def process_request(self, request: MCPRequest) -> MCPResponse:
+        """Process an MCP-style request
+
+        Args:
+            request: The MCP request containing method and params
+
+        Returns:
+            MCPResponse with results or error
+        """
+        try:
+            if request.method == "get_capabilities":
+                return MCPResponse(status="success", data={"capabilities": self.capabilities})
+
+            elif request.method == "align":
+                return await self._handle_align(request.params)
+
+            return MCPResponse(
+                status="error",
+                error={"code": "INVALID_METHOD", "message": f"Unknown method: {request.method}"}
+            )
+
+        except ValueError as e:
+            return MCPResponse(status="error", error={"code": "INVALID_PARAM", "message": str(e)})
+        except Exception as e:
+            logger.error(f"Error processing alignment request: {e}")
+            return MCPResponse(status="error", error={"code": "INTERNAL_ERROR", "message": str(e)})
+
+    async def _handle_align(self, params: Dict[str, Any]) -> MCPResponse:
+        """Handle align requests
+
+        Params:
+            sequences: {name: sequence}, or a list of sequences or of
+                {"name", "sequence"} dicts, instead of database genes
+            gene_symbols: Genes to align, a list or comma-separated string
+            species, isotype, anticodon, ...: search_rna filters selecting the
+                genes when neither of the above is given
+            sequence_type: "mature" (default) or "genomic"
+            query: Gene symbol or sequence aligned against all the others
+            mode: "one_vs_many" (default with a query) or "all_vs_all"
+            method: "global" (default) or "local"
+            match, mismatch, gap_open, gap_extend: Scoring overrides
+            limit: Number of hits, or of closest pairs, to report (default 10)
+        """
+        mode = params.get('mode') or ('one_vs_many' if params.get('query') else 'all_vs_all')
+        if mode not in ALIGNMENT_MODES:
+            raise ValueError(f"mode must be one of {', '.join(ALIGNMENT_MODES)}")
+        method = str(params.get('method') or 'global').lower()
+        scoring = Scoring(**{
+            key: int(params[key]) for key in ('match', 'mismatch', 'gap_open', 'gap_extend')
+            if params.get(key) is not None
+        })
+        scoring.validate()
+        sequence_type = str(params.get('sequence_type') or 'mature').lower()
+        if sequence_type not in SEQUENCE_TYPES:
+            raise ValueError(f"sequence_type must be one of {', '.join(SEQUENCE_TYPES)}")
+        limit = max(int(params.get('limit') or 10), 0)
+
+        entries = await self._resolve_sequences(params, SEQUENCE_TYPES[sequence_type])
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        if mode == 'one_vs_many':
+            query, targets = await self._split_query(params, entries, SEQUENCE_TYPES[sequence_type])
+            if not targets:
+                raise ValueError("No target sequences to align against")
+            if len(targets) > MAX_TARGETS:
+                raise ValueError(f"At most {MAX_TARGETS} target sequences per alignment")
+            alignments = await loop.run_in_executor(None, functools.partial(
+                align_one_to_many, query["sequence"], [t["sequence"] for t in targets],
+                mode=method, scoring=scoring
+            ))
+            hits = sorted(
+                ({**_describe(target), **alignment.to_dict()} for target, alignment in zip(targets, alignments)),
+                key=lambda hit: (-hit["score"], -hit["identity"], hit["name"])
+            )
+            data = {
+                "query": _describe(query),
+                "hits": hits[:limit],
+                "metadata": {"targets": len(targets)}
+            }
+        else:
+            if len(entries) < 2:
+                raise ValueError("all_vs_all needs at least two sequences")
+            if len(entries) > MAX_ALL_VS_ALL:
+                raise ValueError(
+                    f"all_vs_all is limited to {MAX_ALL_VS_ALL} sequences; "
+                    f"narrow the filters or pass a query"
+                )
+            pairs = len(entries) * (len(entries) - 1) // 2
+            traceback = pairs <= MAX_TRACEBACK_PAIRS
+            scores, alignments = await loop.run_in_executor(None, functools.partial(
+                align_all_to_all, [e["sequence"] for e in entries],
+                mode=method, scoring=scoring, traceback=traceback
+            ))
+            identity = None
+            if traceback:
+                identity = np.eye(len(entries))
+                for i, j, alignment in alignments:
+                    identity[i, j] = identity[j, i] = alignment.identity
+                identity = identity.round(4).tolist()
+            ranked = sorted(
+                alignments,
+                key=lambda item: (-(item[2].identity or 0.0), -item[2].score, item[0], item[1])
+            )
+            data = {
+                "sequences": [_describe(e) for e in entries],
+                "scores": scores.tolist(),
+                "identity": identity,
+                "closest_pairs": [
+                    {"query": entries[i]["name"], "target": entries[j]["name"], **alignment.to_dict()}
+                    for i, j, alignment in ranked[:limit]
+                ],
+                "metadata": {"pairs": pairs}
+            }
+
+        data["metadata"].update({
+            "mode": mode,
+            "method": method,
+            "sequence_type": sequence_type,
+            "scoring": asdict(scoring),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+        return MCPResponse(status="success", data=data)
+
+    async def _resolve_sequences(self, params: Dict[str, Any], sequence_key: str) -> List[Dict[str, Any]]:
+        """Named sequences to align, from the request or the database
+
+        Returns:
+            Dicts with name, sequence and, for database genes, species
+        """
+        given = params.get('sequences')
+        if given:
+            if isinstance(given, dict):
+                given = [{"name": name, "sequence": sequence} for name, sequence in given.items()]
+            entries = []
+            for k, item in enumerate(given):
+                if isinstance(item, str):
+                    item = {"name": f"seq{k + 1}", "sequence": item}
+                sequence = str(item.get("sequence") or "").strip()
+                if not _NUCLEOTIDES.match(sequence):
+                    raise ValueError(f"Invalid nucleotide sequence for {item.get('name') or f'seq{k + 1}'}")
+                entries.append({"name": str(item.get("name") or f"seq{k + 1}"), "sequence": sequence})
+            return entries
+
+        search = {key: value for key, value in params.items() if key not in _ALIGN_KEYS}
+        search['limit'] = MAX_TARGETS + 1
+        records = await self.database.find_records(search, fields=("sequences",))
+        return [entry for entry in (_entry(species, record, sequence_key) for species, record in records) if entry]
+
+    async def _split_query(
+        self,
+        params: Dict[str, Any],
+        entries: List[Dict[str, Any]],
+        sequence_key: str
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """The query of a one_vs_many alignment, and the other entries as targets"""
+        query = str(params.get('query') or '').strip()
+        if not query:
+            raise ValueError("one_vs_many needs a query gene symbol or sequence")
+        for k, entry in enumerate(entries):
+            if entry["name"] == query:
+                return entry, entries[:k] + entries[k + 1:]
+        if _NUCLEOTIDES.match(query):
+            return {"name": "query", "sequence": query}, entries
+        records = await self.database.find_records(
+            {'species': params.get('species'), 'gene_symbols': [query]}, fields=("sequences",)
+        )
+        found = [_entry(species, record, sequence_key) for species, record in records]
+        if not found or found[0] is None:
+            raise ValueError(f"Query '{query}' is neither a known gene symbol nor a nucleotide sequence")
+        return found[0], entries
+
+
+# Parameters of align itself, not passed on as search filters
+_ALIGN_KEYS = frozenset({
+    "sequences", "sequence_type", "query", "mode", "method", "match", "mismatch",
+    "gap_open", "gap_extend", "limit", "context", "cursor", "fields", "facets", "persist"
+})
+
+
+def _entry(species: str, record: Dict[str, Any], sequence_key: str) -> Optional[Dict[str, Any]]:
+    sequence = (record.get("sequences") or {}).get(sequence_key)
+    if not sequence:
+        return None
+    return {"name": record["gene_symbol"], "species": species, "sequence": sequence}
+
+
+def _describe(entry: Dict[str, Any]) -> Dict[str, Any]:
+    described = {"name": entry["name"], "length": len(entry["sequence"])}
+    if entry.get("species"):
+        described["species"] = entry["species"]
+    return described
@@ -0,0 +1,110 @@
+"""Tests for the vectorized alignment engine"""
+import random
+import pytest
+
+from chat.tools.alignment.engine import (
+    DEFAULT_SCORING, Scoring, align_all_to_all, align_one_to_many, align_pairs, encode
+)
+
+NEG = float("-inf")
+
+def reference_score(a, b, local, s=DEFAULT_SCORING):
+    """Textbook Gotoh recurrences, one cell at a time"""
+    codes_a, codes_b = encode(a).tolist(), encode(b).tolist()
+    n, m = len(a), len(b)
+    H = [[NEG] * (m + 1) for _ in range(n + 1)]
+    E = [[NEG] * (m + 1) for _ in range(n + 1)]
+    F = [[NEG] * (m + 1) for _ in range(n + 1)]
+    H[0][0] = 0
+    for j in range(1, m + 1):
+        E[0][j] = s.gap_open + (j - 1) * s.gap_extend
+        H[0][j] = 0 if local else E[0][j]
+    best = 0
+    for i in range(1, n + 1):
+        F[i][0] = s.gap_open + (i - 1) * s.gap_extend
+        H[i][0] = 0 if local else F[i][0]
+        for j in range(1, m + 1):
+            E[i][j] = max(H[i][j - 1] + s.gap_open, E[i][j - 1] + s.gap_extend)
+            F[i][j] = max(H[i - 1][j] + s.gap_open, F[i - 1][j] + s.gap_extend)
+            same = codes_a[i - 1] == codes_b[j - 1] and codes_a[i - 1] < 4
+            H[i][j] = max(H[i - 1][j - 1] + (s.match if same else s.mismatch), E[i][j], F[i][j])
+            if local:
+                H[i][j] = max(H[i][j], 0)
+                best = max(best, H[i][j])
+    return best if local else H[n][m]
+
+def rescore(top, bottom, s=DEFAULT_SCORING):
+    """Score of an alignment from its gapped strings"""
+    score, gap = 0, None
+    for x, y in zip(top, bottom):
+        kind = "q" if y == "-" else "t" if x == "-" else None
+        if kind:
+            score += s.gap_extend if gap == kind else s.gap_open
+        else:
+            same = encode(x)[0] == encode(y)[0] < 4
+            score += s.match if same else s.mismatch
+        gap = kind
+    return score
+
+def random_pairs(count, seed=7):
+    rng = random.Random(seed)
+    base = "".join(rng.choice("ACGU") for _ in range(40))
+    pairs = []
+    for _ in range(count):
+        a = list(base)
+        for _ in range(rng.randint(0, 12)):
+            k = rng.randrange(len(a) + 1)
+            op = rng.random()
+            if op < 0.4 and a:
+                a[min(k, len(a) - 1)] = rng.choice("ACGU")
+            elif op < 0.7:
+                a.insert(k, rng.choice("ACGU"))
+            elif a:
+                del a[min(k, len(a) - 1)]
+        pairs.append(("".join(a), base[rng.randint(0, 5):rng.randint(30, 40)]))
+    pairs.append(("", "ACGU"))
+    pairs.append(("GGA", ""))
+    return pairs
+
+@pytest.mark.parametrize("mode", ["global", "local"])
+def test_scores_and_alignments_match_reference(mode):
+    """Batched scores equal the cell-by-cell recurrences, and tracebacks rescore to them"""
+    pairs = random_pairs(60)
+    alignments = align_pairs(pairs, mode=mode)
+    for (a, b), alignment in zip(pairs, alignments):
+        assert alignment.score == reference_score(a, b, mode == "local")
+        top, bottom = alignment.aligned_query, alignment.aligned_target
+        assert len(top) == len(bottom)
+        assert rescore(top, bottom) == alignment.score
+        assert top.replace("-", "") == a[alignment.query_start:alignment.query_end]
+        assert bottom.replace("-", "") == b[alignment.target_start:alignment.target_end]
+        if mode == "global":
+            assert (alignment.query_start, alignment.query_end) == (0, len(a))
+
+def test_all_to_all_and_one_to_many():
+    """The matrix is symmetric with self scores on the diagonal; T reads as U"""
+    sequences = ["GCAUUGGUGGUUCAGUGG", "GCATTGGTGGTTCAGTGG", "GGGGAUGUAGCUCAG"]
+    matrix, alignments = align_all_to_all(sequences)
+    assert (matrix == matrix.T).all()
+    assert matrix[0, 1] == matrix[0, 0] == 2 * len(sequences[0])
+    assert [(i, j) for i, j, _ in alignments] == [(0, 1), (0, 2), (1, 2)]
+    assert alignments[0][2].identity == 1.0
+
+    hits = align_one_to_many(sequences[0], sequences[1:], mode="local", traceback=False)
+    assert hits[0].score == matrix[0, 1] and hits[0].aligned_query == ""
+
+def test_invalid_options():
+    with pytest.raises(ValueError, match="mode"):
+        align_pairs([("A", "A")], mode="semiglobal")
+    with pytest.raises(ValueError, match="gap"):
+        align_pairs([("A", "A")], scoring=Scoring(gap_open=-1, gap_extend=-4))
+
+def test_process_pool_matches_in_process(monkeypatch):
+    """Batches spread over the worker pool, started without forking, align as in-process"""
+    from chat.tools.alignment import engine
+    monkeypatch.setattr(engine, "POOL_MIN_PAIRS", 10)
+    monkeypatch.setattr(engine, "CHUNK_PAIRS", 16)
+    pairs = random_pairs(60)
+    pool = engine.get_process_pool()
+    assert pool._mp_context.get_start_method() != "fork"
+    assert align_pairs(pairs, workers=2) == align_pairs(pairs, workers=1)
@@ -0,0 +1,92 @@
+"""Handler-level tests for AlignmentMCP against the bundled human database
+
+Uses the stock and upgraded copies of data/human_db.db set up by the
+rna_database handler tests.
+"""
+import asyncio
+import pytest
+
+from chat.tools.alignment import mcp
+from chat.tools.alignment.mcp import AlignmentMCP
+from chat.tools.rna_database import registry
+from chat.tools.rna_database.mcp import MCPRequest
+from chat.tools.rna_database.registry import SpeciesRegistry
+from chat.tools.rna_database.test_handlers import CONTEXT, data_dir  # noqa: F401 (fixture)
+
+SEC = ["tRNA-SeC-TCA-1-1", "tRNA-SeC-TCA-2-1"]
+# Predicted mature sequence of tRNA-SeC-TCA-1-1
+SEC_MATURE = "GCCCGGAUGAUCCUCAGUGGUCUGGGGUGCAGGCUUCAAACCUGUAGCUGUCUAGCGACAGAGUGGUUCAAUUCCACCUUUCGGGCG"
+
+
+@pytest.fixture
+def tool(data_dir, monkeypatch):
+    monkeypatch.setattr(registry, "_registry", SpeciesRegistry(data_dir))
+    return AlignmentMCP(**CONTEXT)
+
+
+def align(tool, **params):
+    return asyncio.run(tool.process_request(MCPRequest("align", {**params, "context": CONTEXT})))
+
+
+def aligned(tool, **params):
+    response = align(tool, **params)
+    assert response.status == "success", response.error
+    return response.data
+
+
+def test_filters_select_the_genes(tool):
+    """Without sequences or symbols, the search_rna filters pick the genes"""
+    data = aligned(tool, species="human", isotype="SeC")
+    assert sorted(s["name"] for s in data["sequences"]) == SEC
+    assert {s["species"] for s in data["sequences"]} == {"human"}
+    assert data["metadata"]["mode"] == "all_vs_all" and data["metadata"]["pairs"] == 1
+    assert data["identity"][0][0] == 1.0 and len(data["closest_pairs"]) == 1
+
+
+def test_query_by_symbol_or_sequence(tool):
+    """A query among the genes is left out of the targets; others are looked up or read as sequence"""
+    among = aligned(tool, isotype="SeC", query="tRNA-SeC-TCA-1-1")
+    assert among["query"]["name"] == "tRNA-SeC-TCA-1-1"
+    assert [hit["name"] for hit in among["hits"]] == ["tRNA-SeC-TCA-2-1"]
+
+    looked_up = aligned(tool, isotype="SeC", query="tRNA-Asn-GTT-2-3", method="local")
+    assert looked_up["query"]["name"] == "tRNA-Asn-GTT-2-3"
+    assert sorted(hit["name"] for hit in looked_up["hits"]) == SEC
+
+    sequence = aligned(tool, isotype="SeC", query=SEC_MATURE)
+    assert sequence["query"]["name"] == "query"
+    assert sequence["hits"][0]["name"] == "tRNA-SeC-TCA-1-1" and sequence["hits"][0]["identity"] == 1.0
+
+
+def test_given_sequences(tool):
+    """Sequences passed in are aligned as given, named or not"""
+    data = aligned(tool, sequences={"a": "GCAUUGGUGGUUCAGUGG", "b": "GCATTGGTGGTTCAGTGG"})
+    assert data["closest_pairs"][0]["identity"] == 1.0
+
+    response = align(tool, sequences=["HELLO", "WORLD"])
+    assert response.status == "error" and response.error["code"] == "INVALID_PARAM"
+
+
+def test_size_limits(tool, monkeypatch):
+    """Too many targets or all_vs_all sequences are rejected as INVALID_PARAM"""
+    monkeypatch.setattr(mcp, "MAX_TARGETS", 5)
+    response = align(tool, isotype="Ala", query="tRNA-SeC-TCA-1-1")
+    assert response.status == "error" and response.error["code"] == "INVALID_PARAM"
+    assert "5 target" in response.error["message"]
+
+    monkeypatch.setattr(mcp, "MAX_ALL_VS_ALL", 1)
+    response = align(tool, isotype="SeC")
+    assert response.status == "error" and "all_vs_all is limited" in response.error["message"]
+
+
+@pytest.mark.parametrize("params", [
+    {"isotype": "SeC", "mode": "many_vs_many"},
+    {"isotype": "SeC", "sequence_type": "precursor"},
+    {"isotype": "SeC", "query": "tRNA-Nope-1-1"},
+    {"isotype": "SeC", "mode": "one_vs_many"},
+    {"isotype": "SeC", "gap_open": 2},
+    {"isotype": "Nope"},
+])
+def test_invalid_params(tool, params):
+    response = align(tool, **params)
+    assert response.status == "error" and response.error["code"] == "INVALID_PARAM", response.error
@@ -1,5 +1,3 @@
-import json
-import sqlite3
 import logging
 import re
 import datetime
@@ -8,8 +6,11 @@ from typing import List, Dict, Optional, Tuple, Union, Any
 from dataclasses import dataclass
 from enum import Enum
 from django.db.models import Q, F
-from asgiref.sync import sync_to_async
-from ..models import Sequence
+from .rna_database.registry import get_registry
+from .rna_database.executor import get_executor
+from .rna_database.records import MODEL_FIELDS, decode_row
+from .rna_database.persistence import SequenceWriter
+from .rna_database.sampling import sample_rows
 import os
 
 logger = logging.getLogger(__name__)
@@ -47,25 +48,19 @@ class RNADatabaseTool:
             chat_id: Optional chat ID for context
             message_id: Optional message ID for context
         """
-        # Get path relative to this file
-        current_dir = os.path.dirname(__file__)
-        self.db_path = os.path.join(current_dir, "rna_database", "data", "human_yeast_mouse.db")
-        logger.info(f"Current directory: {current_dir}")
-        logger.info(f"Looking for database at: {self.db_path}")
-        if not os.path.exists(self.db_path):
-            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        # One database file per species, see rna_database/registry.py
+        self.registry = get_registry()
+        logger.info(f"Looking for species databases in: {self.registry.data_dir}")
+        if not self.registry.species:
+            raise FileNotFoundError(f"No species databases found in {self.registry.data_dir}")
             
         self.user_id = user_id
         self.chat_id = chat_id
         self.message_id = message_id
         
         # Set up valid fields and types
-        self.valid_species = {"human", "yeast", "mouse"}
-        self.species_display_names = {
-            "human": "Human (Homo sapiens)",
-            "yeast": "Yeast (Saccharomyces cerevisiae)",
-            "mouse": "Mouse (Mus musculus)"
-        }
+        self.valid_species = set(self.registry.species)
+        self.species_display_names = self.registry.display_names
         self.numerical_columns = {
             "General_tRNA_Model_Score",
             "Isotype_Model_Score"
@@ -124,17 +119,17 @@ class RNADatabaseTool:
             # Build SQLite query with proper table
             # ALWAYS enforce a limit for safety
             MAX_RESULTS = 10
-            sql = f"SELECT * FROM {species} WHERE 1=1"
+            where = "1=1"
             logger.info(f"Querying {self.species_display_names[species]} tRNA database")
             sql_params = []
             
             # Handle basic search parameters
             if 'Isotype_from_Anticodon' in params:
-                sql += " AND Isotype_from_Anticodon = ?"
+                where += " AND Isotype_from_Anticodon = ?"
                 sql_params.append(params['Isotype_from_Anticodon'])
                 
             if 'Anticodon' in params:
-                sql += " AND Anticodon = ?"
+                where += " AND Anticodon = ?"
                 sql_params.append(params['Anticodon'])
             
             # Handle numeric filters with min/max
@@ -143,11 +138,11 @@ class RNADatabaseTool:
                 max_key = f"{score_type}_max"
                 
                 if min_key in params:
-                    sql += f" AND {score_type} >= ?"
+                    where += f" AND {score_type} >= ?"
                     sql_params.append(float(params[min_key]))
                     
                 if max_key in params:
-                    sql += f" AND {score_type} <= ?"
+                    where += f" AND {score_type} <= ?"
                     sql_params.append(float(params[max_key]))
             
             # Handle JSON field search
@@ -155,31 +150,24 @@ class RNADatabaseTool:
                 field_path = params['json_field']
                 if 'json_value' in params:
                     # Search for specific value in JSON field
-                    sql += " AND json_extract(overview, ?) LIKE ?"
+                    where += " AND json_extract(blob_text(overview), ?) LIKE ?"
                     sql_params.append(f"$.{field_path}")
                     sql_params.append(f"%{params['json_value']}%")
                 else:
                     # Just check if the field exists and is not null/empty
-                    sql += " AND json_extract(overview, ?) IS NOT NULL"
+                    where += " AND json_extract(blob_text(overview), ?) IS NOT NULL"
                     sql_params.append(f"$.{field_path}")
             
-            # Handle sorting
-            if 'sort_by' in params:
-                sql += f" ORDER BY {params['sort_by']}"
-                if 'order' in params and params['order'].lower() == 'desc':
-                    sql += " DESC"
-                else:
-                    sql += " ASC"
-            
-            # Handle sorting and random sampling first
-            if 'sample' in params and params['sample'].lower() == 'random':
-                sql += " ORDER BY RANDOM()"
+            # Handle sorting; sort columns are whitelisted since they are interpolated
+            order_by = None
+            if params.get('sort_by') in ('General_tRNA_Model_Score', 'Isotype_Model_Score'):
+                order_by = f"CAST({params['sort_by']} AS REAL)"
+            elif params.get('sort_by') in ('GtRNAdb_Gene_Symbol', 'Anticodon', 'Isotype_from_Anticodon', 'Locus'):
+                order_by = params['sort_by']
             elif 'sort_by' in params:
-                sql += f" ORDER BY {params['sort_by']}"
-                if 'order' in params and params['order'].lower() == 'desc':
-                    sql += " DESC"
-                else:
-                    sql += " ASC"
+                logger.warning(f"Ignoring unsupported sort_by '{params['sort_by']}'")
+            if order_by:
+                order_by += " DESC" if params.get('order', '').lower() == 'desc' else " ASC"
 
             # ALWAYS enforce a limit - no exceptions
             requested_limit = 5  # default
@@ -193,94 +181,31 @@ class RNADatabaseTool:
 
             # Never exceed MAX_RESULTS regardless of requested limit
             final_limit = min(requested_limit, MAX_RESULTS)
-            sql += " LIMIT ?"
-            sql_params.append(final_limit)
             logger.info(f"Enforcing limit of {final_limit} sequences (requested: {requested_limit}, max allowed: {MAX_RESULTS})")
-            except (ValueError, TypeError):
-                # If limit conversion fails, use default
-                sql += " LIMIT 5"
-                logger.warning(f"Invalid limit parameter: {params.get('limit', None)}. Using default limit of 5.")
 
-            # Query SQLite database
-            results = []
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(sql, sql_params)
-                rows = cursor.fetchall()
-                
-                for row in rows:
-                    # Convert SQLite row to dict
-                    row_dict = dict(row)
-                    logger.info(f"Retrieved row: {row_dict}")
-                    
-                    # Handle fields
-                    features = row_dict.get('Features', 'high-confidence')  # Not JSON, just a string
-                    locus = row_dict.get('Locus', '')  # Not JSON, just a string
-                    
-                    # Handle actual JSON fields
-                    sequences = {}
-                    overview = {}
-                    
-                    # Parse JSON fields
-                    sequences = {}
-                    overview = {}
-                    images = {}
-                    
-                    try:
-                        if row_dict.get('sequences'):
-                            sequences = json.loads(row_dict['sequences'])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse sequences JSON: {row_dict.get('sequences')}")
-                        
-                    try:
-                        if row_dict.get('overview'):
-                            overview = json.loads(row_dict['overview'])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse overview JSON: {row_dict.get('overview')}")
-                        
-                    try:
-                        if row_dict.get('images'):
-                            images = json.loads(row_dict['images'])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse images JSON: {row_dict.get('images')}")
-                    
-                    # Convert model_agreement to proper boolean
-                    model_agreement = str(row_dict.get('Anticodon_and_Isotype_Model_Agreement', '')).lower() == 'true'
-                    # Create sequence in PostgreSQL
-                    sequence = await sync_to_async(Sequence.objects.create)(
-                        user_id=self.user_id,
-                        chat_id=self.chat_id,
-                        message_id=self.message_id,
-                        gene_symbol=row_dict['GtRNAdb_Gene_Symbol'],
-                        anticodon=row_dict['Anticodon'],
-                        isotype=row_dict['Isotype_from_Anticodon'],
-                        general_score=float(row_dict['General_tRNA_Model_Score']),
-                        isotype_score=float(row_dict['Isotype_Model_Score']),
-                        model_agreement=model_agreement,
-                        features=features,
-                        locus=locus,
-                        sequences=sequences,
-                        overview=overview,
-                        images=images
-                    )
+            # Query SQLite database off the event loop
+            pool = self.registry.pool(species)
+            if params.get('sample', '').lower() == 'random':
+                # Sample rowids instead of sorting every match by RANDOM()
+                seed = int(params['seed']) if 'seed' in params else None
+                rows = await get_executor().run(
+                    pool, sample_rows, species, "*", where, sql_params, final_limit, seed, order_by
+                )
+            else:
+                sql = f"SELECT * FROM {species} WHERE {where}"
+                if order_by:
+                    sql += f" ORDER BY {order_by}"
+                sql += " LIMIT ?"
+                rows = await get_executor().fetchall(pool, sql, sql_params + [final_limit])
+            records = [decode_row(row, MODEL_FIELDS) for row in rows]
             
-                    # Add sequence to results
-                    results.append({
-                        'id': str(sequence.id),
-                        'gene_symbol': sequence.gene_symbol,
-                        'anticodon': sequence.anticodon,
-                        'isotype': sequence.isotype,
-                        'general_score': sequence.general_score,
-                        'isotype_score': sequence.isotype_score,
-                        'model_agreement': sequence.model_agreement,
-                        'features': sequence.features,
-                        'locus': sequence.locus,
-                        'sequences': sequence.sequences,
-                        'overview': sequence.overview,
-                        'images': sequence.images,
-                        'created_at': sequence.created_at.isoformat()
-                    })
+            # Store in PostgreSQL as shared records linked to this message
+            context = {
+                'user_id': self.user_id,
+                'chat_id': self.chat_id,
+                'message_id': self.message_id
+            }
+            results = await SequenceWriter().write(records, context, species, pool.version)
             
             return 'human', results
             
@@ -0,0 +1,311 @@
+"""Aggregate statistics of the GtRNAdb species tables.
+
+Counting questions ("how many human tRNAs per isotype", "how are general
+scores distributed") are answered from one small JSON document per species
+instead of shipping rows to the planner for the model to count. The document
+is exact: counts by isotype, anticodon and feature class, score quantiles and
+histograms, and model-agreement rates.
+
+schema.py stores it in a ``<species>_statistics`` table when a database is
+upgraded. Files without that table get the same document computed from the
+rows on first use, which the result cache then keeps.
+
+Searches can also return facets of their filtered set (total, counts per
+isotype and anticodon, score ranges), so the planner learns how many genes
+match without a follow-up query. Both search engines reduce the filtered rows
+to FacetGroup tuples, one per (isotype, anticodon), which summarize_facets
+turns into the facet document; groups from several species simply add up.
+"""
+import re
+import json
+import math
+import sqlite3
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .records import decode_row, select_columns
+
+STATISTICS_SUFFIX = "_statistics"
+
+# Sections of the statistics document, in document order
+SECTIONS = (
+    "total",
+    "isotype",
+    "anticodon",
+    "features",
+    "feature_annotations",
+    "general_score",
+    "isotype_score",
+    "model_agreement",
+    "by_isotype",
+)
+
+# tRNAscan-SE gene classes leading the Features column, e.g. "pseudomismatch: 2"
+FEATURE_CLASSES = ("high-confidence", "uncertain-function", "pseudo", "isotype-mismatch", "unexpected-ac")
+_FEATURE_ANNOTATION = re.compile(r"([a-z_]+): (\d+)")
+
+# Scores are binned into fixed-width buckets aligned on multiples of the width
+HISTOGRAM_BIN_WIDTH = 10
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Facets a search can return, in document order
+FACETS = ("total", "isotype", "anticodon", "general_score", "isotype_score")
+
+# (isotype, anticodon, count, general min, max, sum, isotype score min, max, sum)
+FacetGroup = Tuple[str, str, int, float, float, float, float, float, float]
+
+# Record fields the statistics are computed from
+_FIELDS = ("gene_symbol", "anticodon", "isotype", "general_score", "isotype_score", "model_agreement", "features")
+
+
+def statistics_table(table: str) -> str:
+    """Name of the precomputed statistics table for a species table"""
+    return f"{table}{STATISTICS_SUFFIX}"
+
+
+def parse_sections(value: Optional[Union[str, Iterable[str]]]) -> Tuple[str, ...]:
+    """Normalize a requested section set
+
+    Args:
+        value: Comma-separated string or list of section names, or None for all
+
+    Returns:
+        Requested sections in document order
+
+    Raises:
+        ValueError: If an unknown section is requested
+    """
+    if not value:
+        return SECTIONS
+    if isinstance(value, str):
+        value = value.split(",")
+    requested = {section.strip() for section in value if section.strip()}
+    if "all" in requested:
+        return SECTIONS
+    unknown = requested - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown statistics: {', '.join(sorted(unknown))}")
+    return tuple(section for section in SECTIONS if section in requested)
+
+
+def parse_facets(value: Any) -> Tuple[str, ...]:
+    """Normalize the facets parameter of a search
+
+    Args:
+        value: True, "true" or "all" for every facet; a comma-separated string
+            or list of facet names; None, False or "false" for none
+
+    Returns:
+        Requested facets in document order, "total" always included, or ()
+
+    Raises:
+        ValueError: If an unknown facet is requested
+    """
+    if value is None or value is False:
+        return ()
+    if value is True:
+        return FACETS
+    if isinstance(value, str):
+        if value.strip().lower() in ("", "false", "no", "0"):
+            return ()
+        if value.strip().lower() in ("true", "yes", "1"):
+            return FACETS
+        value = value.split(",")
+    requested = {str(facet).strip() for facet in value if str(facet).strip()}
+    if "all" in requested:
+        return FACETS
+    unknown = requested - set(FACETS)
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(sorted(unknown))}")
+    return tuple(facet for facet in FACETS if facet in requested or facet == "total")
+
+
+def parse_features(features: Optional[str]) -> Tuple[str, Dict[str, int]]:
+    """Split a Features value into gene class and annotation counts
+
+    Args:
+        features: e.g. "high-confidenceintron: 1", "pseudotrunc_start: 4mismatch: 2"
+
+    Returns:
+        (class, {annotation: count}); the class is "other" when unrecognised
+    """
+    features = (features or "").strip()
+    gene_class = next((c for c in FEATURE_CLASSES if features.startswith(c)), "other")
+    rest = features[len(gene_class):] if gene_class != "other" else features
+    return gene_class, {name: int(count) for name, count in _FEATURE_ANNOTATION.findall(rest)}
+
+
+def _round(value: float) -> float:
+    return round(value, 3)
+
+
+def _quantile(ordered: Sequence[float], q: float) -> float:
+    """Quantile of sorted values with linear interpolation between ranks"""
+    position = (len(ordered) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def score_summary(values: Iterable[float]) -> Dict[str, Any]:
+    """Count, mean, extremes, quantiles and histogram of a score column"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    bins = Counter(math.floor(value / HISTOGRAM_BIN_WIDTH) for value in ordered)
+    first, last = min(bins), max(bins)
+    return {
+        "count": len(ordered),
+        "mean": _round(sum(ordered) / len(ordered)),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "quantiles": {f"p{round(q * 100)}": _round(_quantile(ordered, q)) for q in QUANTILES},
+        "histogram": [
+            {
+                "start": b * HISTOGRAM_BIN_WIDTH,
+                "end": (b + 1) * HISTOGRAM_BIN_WIDTH,
+                "count": bins.get(b, 0),
+            }
+            for b in range(first, last + 1)
+        ],
+    }
+
+
+def _agreement(agreeing: int, total: int) -> Dict[str, Any]:
+    return {
+        "consistent": agreeing,
+        "inconsistent": total - agreeing,
+        "rate": _round(agreeing / total) if total else None,
+    }
+
+
+def _most_common(counter: Counter) -> Dict[str, int]:
+    """Counts ordered by frequency, ties broken by name"""
+    return dict(sorted(counter.items(), key=lambda item: (-item[1], item[0])))
+
+
+def facet_groups(
+    conn: sqlite3.Connection,
+    table: str,
+    where: str,
+    params: Sequence[Any],
+    scores: Dict[str, str]
+) -> List[FacetGroup]:
+    """FacetGroup tuples of the rows matching a search filter, in one grouped scan
+
+    Args:
+        conn: Open connection to the database
+        table: Species table
+        where: WHERE clause built by the search, with its parameters
+        params: Parameters of the WHERE clause
+        scores: SQL expressions of general_score and isotype_score
+    """
+    general, isotype = scores["general_score"], scores["isotype_score"]
+    rows = conn.execute(
+        f"SELECT Isotype_from_Anticodon, Anticodon, COUNT(*), "
+        f"MIN({general}), MAX({general}), TOTAL({general}), "
+        f"MIN({isotype}), MAX({isotype}), TOTAL({isotype}) "
+        f"FROM {table} WHERE {where} GROUP BY Isotype_from_Anticodon, Anticodon",
+        list(params)
+    ).fetchall()
+    return [(row[0] or "", row[1] or "", *tuple(row)[2:]) for row in rows]
+
+
+def summarize_facets(groups: Iterable[FacetGroup], facets: Sequence[str] = FACETS) -> Dict[str, Any]:
+    """Build the facet document of a filtered search
+
+    Args:
+        groups: FacetGroup tuples, possibly from several species
+        facets: Facets to include, see parse_facets
+
+    Returns:
+        Dict with one entry per requested facet
+    """
+    groups = list(groups)
+    total = sum(group[2] for group in groups)
+    isotypes, anticodons = Counter(), Counter()
+    for group in groups:
+        isotypes[group[0]] += group[2]
+        anticodons[group[1]] += group[2]
+
+    def score_range(offset: int) -> Dict[str, Any]:
+        present = [group for group in groups if group[2]]
+        if not present:
+            return {"count": 0}
+        return {
+            "count": total,
+            "min": min(group[offset] for group in present),
+            "max": max(group[offset + 1] for group in present),
+            "mean": _round(sum(group[offset + 2] for group in present) / total),
+        }
+
+    document = {
+        "total": total,
+        "isotype": _most_common(isotypes),
+        "anticodon": _most_common(anticodons),
+        "general_score": score_range(3),
+        "isotype_score": score_range(6),
+    }
+    return {facet: document[facet] for facet in FACETS if facet in facets}
+
+
+def compute_statistics(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the statistics document of a species table
+
+    Args:
+        records: Decoded records with at least the core fields and features
+
+    Returns:
+        Dict with one entry per name in SECTIONS
+    """
+    records = list(records)
+    isotypes, anticodons, classes, annotations = Counter(), Counter(), Counter(), Counter()
+    per_isotype: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        isotypes[record["isotype"]] += 1
+        anticodons[record["anticodon"]] += 1
+        gene_class, counts = parse_features(record["features"])
+        classes[gene_class] += 1
+        # Genes carrying each annotation, not the summed annotation counts
+        annotations.update(counts.keys())
+        per_isotype.setdefault(record["isotype"], []).append(record)
+
+    return {
+        "total": len(records),
+        "isotype": _most_common(isotypes),
+        "anticodon": _most_common(anticodons),
+        "features": _most_common(classes),
+        "feature_annotations": _most_common(annotations),
+        "general_score": score_summary(r["general_score"] for r in records),
+        "isotype_score": score_summary(r["isotype_score"] for r in records),
+        "model_agreement": _agreement(sum(r["model_agreement"] for r in records), len(records)),
+        "by_isotype": {
+            isotype: {
+                "count": len(group),
+                "anticodons": sorted({r["anticodon"] for r in group}),
+                "mean_general_score": _round(sum(r["general_score"] for r in group) / len(group)),
+                "mean_isotype_score": _round(sum(r["isotype_score"] for r in group) / len(group)),
+                "model_agreement_rate": _round(sum(r["model_agreement"] for r in group) / len(group)),
+            }
+            for isotype, group in sorted(per_isotype.items())
+        },
+    }
+
+
+def table_statistics(conn: sqlite3.Connection, table: str) -> Dict[str, Any]:
+    """Compute the statistics document from the rows of a species table
+
+    Runs offline from schema.py, or on a pooled connection through
+    QueryExecutor.run for files without a statistics table.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    rows = cursor.execute(f'SELECT {select_columns(_FIELDS)} FROM "{table}"').fetchall()
+    return compute_statistics(decode_row(row, _FIELDS) for row in rows)
+
+
+def read_statistics(conn: sqlite3.Connection, table: str) -> Dict[str, Any]:
+    """Read the precomputed statistics document of a species table"""
+    rows = conn.execute(f'SELECT section, value FROM "{statistics_table(table)}"').fetchall()
+    stored = {section: json.loads(value) for section, value in rows}
+    return {section: stored[section] for section in SECTIONS if section in stored}
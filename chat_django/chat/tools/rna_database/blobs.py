@@ -0,0 +1,219 @@
+"""Compressed storage of the large JSON columns of the species tables.
+
+``overview``, ``variants`` and ``expression_profiles`` make up most of each
+database file, and every worker process maps those pages. The builder can
+store them as BLOBs compressed with a dictionary shared by all rows of a
+column: zstd with a trained dictionary when the ``zstandard`` package is
+installed, or zlib with a preset dictionary. Short, repetitive JSON records
+compress far better against a shared dictionary than on their own.
+
+Each BLOB starts with a one-byte codec and the 8-byte id of its dictionary.
+The dictionaries live in the ``blob_dictionaries`` table of the same file and
+are registered process-wide when a connection is opened through ``install``.
+``blob_text`` turns a stored value back into JSON text: TEXT values pass
+through unchanged, so compressed and plain files are read the same way. It is
+also registered as an SQL function for queries such as
+``json_extract(blob_text(overview), ?)``.
+"""
+import zlib
+import struct
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_COLUMNS = ("overview", "variants", "expression_profiles")
+DICTIONARY_TABLE = "blob_dictionaries"
+SQL_FUNCTION = "blob_text"
+
+CODECS = {"zlib": 1, "zstd": 2}
+_HEADER = struct.Struct("<B8s")
+
+# zlib preset dictionaries are limited to its 32 KiB window
+DICTIONARY_SIZE = {"zlib": 32 * 1024, "zstd": 64 * 1024}
+MIN_DICTIONARY_SIZE = 4 * 1024
+LEVEL = {"zlib": 9, "zstd": 19}
+
+# Dictionary id -> (codec, dictionary bytes), shared by every connection
+_dictionaries: Dict[bytes, Tuple[int, bytes]] = {}
+_dictionaries_lock = threading.Lock()
+# zstd decompressors are not thread-safe, so each thread keeps its own
+_local = threading.local()
+
+
+def available_codecs() -> List[str]:
+    """Codecs usable in this process"""
+    return [codec for codec in CODECS if codec != "zstd" or zstandard is not None]
+
+
+def dictionary_id(dictionary: bytes) -> bytes:
+    return hashlib.sha256(dictionary).digest()[:8]
+
+
+def train_dictionary(codec: str, samples: Sequence[bytes]) -> bytes:
+    """Build a shared dictionary from sample values of one column
+
+    zstd trains a dictionary on the samples; if the samples are too few to
+    train on, and always for zlib, the dictionary is raw content taken evenly
+    from the samples, with the most representative strings at the end where
+    zlib finds them cheapest.
+    """
+    # A dictionary much larger than the data it serves costs more than it saves
+    size = min(DICTIONARY_SIZE[codec], max(MIN_DICTIONARY_SIZE, sum(map(len, samples)) // 8))
+    if codec == "zstd":
+        try:
+            return zstandard.train_dictionary(size, list(samples)).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.info(f"Falling back to a raw-content zstd dictionary: {e}")
+    content = bytearray()
+    step = max(1, len(samples) // 64)
+    for sample in samples[::step]:
+        content += sample[:2048]
+    return bytes(content[-size:])
+
+
+_compressors: Dict[bytes, Any] = {}
+
+
+def _zstd_compressor(dictionary: bytes):
+    """Compressor for a dictionary; only used offline, from a single thread"""
+    dict_id = dictionary_id(dictionary)
+    if dict_id not in _compressors:
+        # Raw content works for trained dictionaries too: zstd recognizes their magic
+        _compressors[dict_id] = zstandard.ZstdCompressor(
+            level=LEVEL["zstd"], dict_data=zstandard.ZstdCompressionDict(dictionary)
+        )
+    return _compressors[dict_id]
+
+
+def _zstd_decompressor(dict_id: bytes, dictionary: bytes):
+    cache = getattr(_local, "decompressors", None)
+    if cache is None:
+        cache = _local.decompressors = {}
+    decompressor = cache.get(dict_id)
+    if decompressor is None:
+        decompressor = cache[dict_id] = zstandard.ZstdDecompressor(
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+        )
+    return decompressor
+
+
+def compress_text(text: str, codec: str, dictionary: bytes) -> bytes:
+    """Compress JSON text against a dictionary, with the BLOB header"""
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        body = _zstd_compressor(dictionary).compress(data)
+    else:
+        compressor = zlib.compressobj(LEVEL["zlib"], zdict=dictionary)
+        body = compressor.compress(data) + compressor.flush()
+    return _HEADER.pack(CODECS[codec], dictionary_id(dictionary)) + body
+
+
+def blob_text(value: Any) -> Optional[str]:
+    """JSON text of a stored column value, decompressing BLOBs
+
+    Raises:
+        ValueError: If the BLOB's dictionary is not registered or its codec
+            is not available
+    """
+    if not isinstance(value, bytes):
+        return value
+    codec, dict_id = _HEADER.unpack_from(value)
+    entry = _dictionaries.get(dict_id)
+    if entry is None:
+        raise ValueError(f"Unknown blob dictionary {dict_id.hex()}; open the file through blobs.install")
+    body = memoryview(value)[_HEADER.size:]
+    if codec == CODECS["zstd"]:
+        if zstandard is None:
+            raise ValueError("zstd-compressed database requires the zstandard package")
+        return _zstd_decompressor(dict_id, entry[1]).decompress(body).decode("utf-8")
+    decompressor = zlib.decompressobj(zdict=entry[1])
+    return (decompressor.decompress(body) + decompressor.flush()).decode("utf-8")
+
+
+def register_dictionaries(conn: sqlite3.Connection) -> int:
+    """Register the blob dictionaries of a database file in this process
+
+    Returns:
+        Number of dictionaries found, 0 for uncompressed files
+    """
+    try:
+        rows = conn.execute(f"SELECT codec, dictionary FROM {DICTIONARY_TABLE}").fetchall()
+    except sqlite3.OperationalError:
+        return 0
+    with _dictionaries_lock:
+        for codec, dictionary in rows:
+            _dictionaries[dictionary_id(dictionary)] = (codec, bytes(dictionary))
+    return len(rows)
+
+
+def install(conn: sqlite3.Connection) -> None:
+    """Prepare a connection for compressed columns: dictionaries and the SQL function"""
+    register_dictionaries(conn)
+    conn.create_function(SQL_FUNCTION, 1, blob_text, deterministic=True)
+
+
+def compress_columns(
+    conn: sqlite3.Connection,
+    table: str,
+    codec: str,
+    columns: Sequence[str] = COMPRESSED_COLUMNS
+) -> Dict[str, Tuple[int, int]]:
+    """Rewrite JSON columns of a species table as compressed BLOBs
+
+    Runs offline from build.py, after the derived indexes have been built.
+    Already compressed values are decompressed and recompressed, so a file can
+    be rebuilt with another codec.
+
+    Args:
+        conn: Writable connection, prepared with install
+        table: Species table
+        codec: "zlib" or "zstd"
+        columns: Columns to compress
+
+    Returns:
+        Column -> (plain bytes, compressed bytes)
+
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    if codec not in available_codecs():
+        raise ValueError(f"Compression codec '{codec}' is not available (have: {', '.join(available_codecs())})")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {DICTIONARY_TABLE} "
+        f"(column_name TEXT PRIMARY KEY, codec INTEGER NOT NULL, dictionary BLOB NOT NULL)"
+    )
+    present = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    sizes = {}
+    for column in (column for column in columns if column in present):
+        values = [
+            (rowid, text)
+            for rowid, raw in conn.execute(f'SELECT rowid, "{column}" FROM "{table}"')
+            for text in [blob_text(raw)]
+            if text
+        ]
+        if not values:
+            continue
+        dictionary = train_dictionary(codec, [text.encode("utf-8") for _, text in values])
+        conn.execute(
+            f"INSERT OR REPLACE INTO {DICTIONARY_TABLE} VALUES (?, ?, ?)",
+            (f"{table}.{column}", CODECS[codec], dictionary)
+        )
+        with _dictionaries_lock:
+            _dictionaries[dictionary_id(dictionary)] = (CODECS[codec], dictionary)
+        compressed = [(compress_text(text, codec, dictionary), rowid) for rowid, text in values]
+        conn.executemany(f'UPDATE "{table}" SET "{column}" = ? WHERE rowid = ?', compressed)
+        sizes[column] = (
+            sum(len(text.encode("utf-8")) for _, text in values),
+            sum(len(blob) for blob, _ in compressed) + len(dictionary),
+        )
+        logger.info(f"Compressed {table}.{column} with {codec}: {sizes[column][0]} -> {sizes[column][1]} bytes")
+    return sizes
@@ -0,0 +1,333 @@
+"""Offline builder for the per-species GtRNAdb SQLite files.
+
+Turns GtRNAdb gene exports for one genome into the optimized, read-only
+database the tool serves:
+
+    python -m chat.tools.rna_database.build --species mouse exports/mouse/*.jsonl
+
+Inputs are JSON files (a list of gene records), JSON Lines files (one record
+per line) or an existing species database (``.db``/``.sqlite``), so the
+shipped files can be rebuilt as well. Record keys may use the table column
+names or the GtRNAdb page labels ("tRNAscan-SE ID", "Isotype Model Score").
+
+Records are normalized in a process pool: scores become REAL, and the nested
+JSON fields are validated and re-serialized compactly. Rows are written in
+gene-symbol order, so the same input always gives the same table. Every
+derived index comes from schema.upgrade_database, and a ``build_info`` table
+stamps the result with its schema version, inputs and content hash. The new
+file is written next to the target and moved into place atomically, so
+running servers pick it up as a new database version.
+
+``--compress zlib`` or ``--compress zstd`` stores the large JSON columns as
+dictionary-compressed BLOBs (see blobs.py); readers decompress them
+transparently.
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .blobs import available_codecs, blob_text, compress_columns, install
+from .registry import DATA_DIR, FILE_SUFFIX
+from .schema import species_tables, upgrade_database
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the table layout or a derived index changes
+SCHEMA_VERSION = 1
+
+# Species table columns in their canonical order, with their declared types
+GENE_COLUMNS = (
+    ("GtRNAdb_Gene_Symbol", "TEXT PRIMARY KEY"),
+    ("tRNAscan_SE_ID", "TEXT"),
+    ("Locus", "TEXT"),
+    ("Anticodon", "TEXT"),
+    ("Isotype_from_Anticodon", "TEXT"),
+    ("General_tRNA_Model_Score", "REAL"),
+    ("Best_Isotype_Model", "TEXT"),
+    ("Isotype_Model_Score", "REAL"),
+    ("Anticodon_and_Isotype_Model_Agreement", "TEXT"),
+    ("Features", "TEXT"),
+    ("overview", "TEXT"),
+    ("sequences", "TEXT"),
+    ("variants", "TEXT"),
+    ("images", "TEXT"),
+    ("expression_profiles", "TEXT"),
+)
+_REAL_COLUMNS = frozenset(name for name, kind in GENE_COLUMNS if kind == "REAL")
+_JSON_COLUMNS = frozenset({"overview", "sequences", "variants", "images", "expression_profiles"})
+
+# Export key, reduced to lowercase alphanumerics -> column
+_KEY_ALIASES = {re.sub(r"[^0-9a-z]", "", name.lower()): name for name, _ in GENE_COLUMNS}
+
+# Records handed to each worker process
+CHUNK_SIZE = 200
+
+
+def _column(key: str) -> Optional[str]:
+    return _KEY_ALIASES.get(re.sub(r"[^0-9a-z]", "", str(key).lower()))
+
+
+def normalize_record(raw: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Normalize one exported gene record into a species table row
+
+    Args:
+        raw: Gene record keyed by column names or GtRNAdb labels
+
+    Returns:
+        Row values in GENE_COLUMNS order
+
+    Raises:
+        ValueError: If the record has no gene symbol, or a score or JSON
+            field cannot be parsed
+    """
+    values: Dict[str, Any] = {}
+    for key, value in raw.items():
+        column = _column(key)
+        if column is not None:
+            values[column] = value
+
+    symbol = str(values.get("GtRNAdb_Gene_Symbol") or "").strip()
+    if not symbol:
+        raise ValueError("record has no GtRNAdb gene symbol")
+
+    row = []
+    for column, _ in GENE_COLUMNS:
+        value = values.get(column)
+        if column in _REAL_COLUMNS:
+            try:
+                value = float(value) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                raise ValueError(f"{symbol}: {column} is not a number: {value!r}")
+        elif column in _JSON_COLUMNS:
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value) if value.strip() else None
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{symbol}: {column} is not valid JSON: {e}")
+            value = json.dumps(value, ensure_ascii=False, separators=(",", ":")) if value is not None else None
+        elif value is not None:
+            value = str(value).strip()
+        row.append(value)
+    row[0] = symbol
+    return tuple(row)
+
+
+def _normalize_chunk(records: Sequence[Dict[str, Any]]) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """Worker entry point: normalize a chunk, collecting errors instead of raising"""
+    rows, errors = [], []
+    for raw in records:
+        try:
+            rows.append(normalize_record(raw))
+        except ValueError as e:
+            errors.append(str(e))
+    return rows, errors
+
+
+def read_records(path: Path, species: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw gene records from one export file
+
+    Args:
+        path: .json, .jsonl/.ndjson, or .db/.sqlite species database
+        species: Table to read from a database input
+    """
+    suffix = path.suffix.lower()
+    if suffix in (".db", ".sqlite", ".sqlite3"):
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        install(conn)
+        try:
+            if species not in species_tables(conn):
+                raise ValueError(f"{path} has no {species} table")
+            for row in conn.execute(f'SELECT * FROM "{species}"'):
+                record = dict(row)
+                # Compressed JSON columns of a built file
+                for column, value in record.items():
+                    if isinstance(value, bytes):
+                        record[column] = blob_text(value)
+                yield record
+        finally:
+            conn.close()
+    elif suffix in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        # A list of records, or a mapping of gene symbol -> record
+        if isinstance(data, dict):
+            data = [{"GtRNAdb_Gene_Symbol": symbol, **record} for symbol, record in data.items()]
+        yield from data
+    else:
+        raise ValueError(f"Unsupported export format: {path}")
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_database(
+    species: str,
+    sources: Sequence[str],
+    output: Optional[str] = None,
+    workers: Optional[int] = None,
+    compress: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the optimized database of one species from its exports
+
+    Args:
+        species: Species name, also the table name
+        sources: Export files, read in order; later records replace earlier
+            ones with the same gene symbol
+        output: Database file to write, by default <species>_db.db in the data directory
+        workers: Worker processes for parsing, default one per CPU; 1 parses in-process
+        compress: "zlib" or "zstd" to store the large JSON columns compressed,
+            None to keep them as TEXT
+
+    Returns:
+        The build_info stamp written to the database
+
+    Raises:
+        ValueError: If the species name is not a plain identifier, the
+            codec is not available, or no record could be parsed
+    """
+    species = species.lower()
+    if not re.fullmatch(r"[a-z][a-z0-9_]*", species):
+        raise ValueError(f"Species must be a plain identifier, got '{species}'")
+    if compress and compress not in available_codecs():
+        raise ValueError(f"Compression codec '{compress}' is not available (have: {', '.join(available_codecs())})")
+    paths = [Path(source) for source in sources]
+    output_path = Path(output) if output else DATA_DIR / f"{species}{FILE_SUFFIX}"
+    workers = workers or os.cpu_count() or 1
+
+    # Parse and normalize
+    chunks = (chunk for path in paths for chunk in _chunks(read_records(path, species), CHUNK_SIZE))
+    rows: Dict[str, Tuple[Any, ...]] = {}
+    errors: List[str] = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_normalize_chunk, chunks)
+            for chunk_rows, chunk_errors in results:
+                rows.update((row[0], row) for row in chunk_rows)
+                errors.extend(chunk_errors)
+    else:
+        for chunk in chunks:
+            chunk_rows, chunk_errors = _normalize_chunk(chunk)
+            rows.update((row[0], row) for row in chunk_rows)
+            errors.extend(chunk_errors)
+    for error in errors[:20]:
+        logger.warning(f"Skipped record: {error}")
+    if not rows:
+        raise ValueError(f"No {species} records could be parsed from {', '.join(sources)}")
+
+    ordered = [rows[symbol] for symbol in sorted(rows)]
+    content = hashlib.sha256()
+    for row in ordered:
+        content.update(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+
+    # Write a fresh file beside the target, then swap it in
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute(
+                f'CREATE TABLE "{species}" ('
+                + ", ".join(f'"{name}" {kind}' for name, kind in GENE_COLUMNS)
+                + ")"
+            )
+            conn.executemany(
+                f'INSERT INTO "{species}" VALUES ({", ".join("?" * len(GENE_COLUMNS))})',
+                ordered
+            )
+    finally:
+        conn.close()
+
+    # Typed score columns, FTS, modification, locus and variant indexes, statistics
+    upgrade_database(str(tmp_path))
+
+    info = {
+        "species": species,
+        "schema_version": SCHEMA_VERSION,
+        "row_count": len(ordered),
+        "skipped_records": len(errors),
+        "content_hash": content.hexdigest(),
+        "sources": [{"file": path.name, "sha256": _file_digest(path)} for path in paths],
+        "sqlite_version": sqlite3.sqlite_version,
+        "compression": compress or None,
+    }
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            # After the derived indexes, which are built from the plain JSON
+            if compress:
+                install(conn)
+                compress_columns(conn, species, compress)
+            conn.execute("CREATE TABLE build_info (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            conn.executemany(
+                "INSERT INTO build_info VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in info.items()]
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, output_path)
+    logger.info(f"Built {output_path}: {len(ordered)} {species} genes, {len(errors)} skipped")
+    return info
+
+
+def read_build_info(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """The build_info stamp of a database, empty for files not made by the builder"""
+    try:
+        rows = conn.execute("SELECT key, value FROM build_info").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {key: json.loads(value) for key, value in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an optimized GtRNAdb species database from exports")
+    parser.add_argument("--species", required=True, help="Species name, e.g. mouse")
+    parser.add_argument("--output", help=f"Output file (default: <data dir>/<species>{FILE_SUFFIX})")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: one per CPU)")
+    parser.add_argument(
+        "--compress", choices=["none", "zlib", "zstd"], default="none",
+        help="Store the large JSON columns dictionary-compressed (default: none)"
+    )
+    parser.add_argument("sources", nargs="+", help="JSON, JSON Lines or SQLite export files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    build_database(
+        args.species, args.sources, args.output, args.workers,
+        compress=None if args.compress == "none" else args.compress
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Process-wide cache of decoded query results.
+
+The same GET_TRNA steps recur across users and chats, so search results are
+cached after decoding, keyed on the database file, its content hash and a
+canonical form of the request parameters. A cache hit skips SQLite and JSON
+decoding entirely; only the per-message Postgres linkage still runs. Entries
+for an older version of a file are dropped as soon as a newer one is seen.
+
+Cached records are shared between hits and must be treated as read-only;
+``SequenceWriter`` builds fresh payload dicts around them.
+"""
+import os
+import json
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of result sets kept, overridable from the environment (0 disables)
+RESULT_CACHE_SIZE = int(os.getenv('RNA_RESULT_CACHE_SIZE', '256'))
+
+# Request keys that never affect the result
+_IGNORED_KEYS = frozenset({"context", "persist"})
+# Values compared case-insensitively
+_CASE_INSENSITIVE_KEYS = frozenset({
+    "species", "order", "sample", "filter_logic", "modification_mode", "region",
+})
+# Values compared as numbers, so "5" and 5 share an entry
+_NUMERIC_KEYS = frozenset({
+    "limit", "seed", "start", "end", "flank",
+    "min_general_score", "max_general_score", "min_isotype_score", "max_isotype_score",
+})
+# Comma-separated or list values whose order does not matter
+_SET_KEYS = frozenset({"fields", "modification", "rsid", "effect"})
+
+
+def _normalize(key: str, value: Any) -> Any:
+    if key in _NUMERIC_KEYS:
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    if key in _SET_KEYS:
+        items = value.split(",") if isinstance(value, str) else value
+        return sorted({str(item).strip() for item in items if str(item).strip()})
+    if isinstance(value, str):
+        value = value.strip()
+        return value.lower() if key in _CASE_INSENSITIVE_KEYS else value
+    if isinstance(value, (list, tuple)):
+        return [_normalize(key, item) for item in value]
+    return value
+
+
+def canonical_params(method: str, params: Dict[str, Any]) -> Optional[str]:
+    """Canonical, hashable form of a request
+
+    Args:
+        method: MCP method name
+        params: Request parameters
+
+    Returns:
+        JSON string with sorted keys and normalized values, or None when the
+        result must not be cached (unseeded random samples, bad values)
+    """
+    if str(params.get("sample", "")).lower() == "random" and params.get("seed") is None:
+        return None
+    try:
+        normalized = {
+            key: _normalize(key, value)
+            for key, value in params.items()
+            if key not in _IGNORED_KEYS and value is not None
+        }
+        return json.dumps([method, normalized], sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        # Leave invalid parameters to the handler's own validation
+        return None
+
+
+class ResultCache:
+    """Thread-safe LRU cache of result sets per database file and version."""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, Hashable], Any]" = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, db_path: str, version: str) -> None:
+        """Drop the entries of a file whose content hash has changed"""
+        if self._versions.get(db_path) == version:
+            return
+        stale = [key for key in self._entries if key[0] == db_path and key[1] != version]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.info(f"Dropped {len(stale)} cached results for changed {db_path}")
+        self._versions[db_path] = version
+
+    def get(self, db_path: str, version: str, key: Optional[Hashable]) -> Optional[Any]:
+        """Look up a result set, or None on a miss"""
+        if key is None or self.max_entries <= 0:
+            return None
+        with self._lock:
+            self._check_version(db_path, version)
+            value = self._entries.get((db_path, version, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((db_path, version, key))
+            self.hits += 1
+            return value
+
+    def put(self, db_path: str, version: str, key: Optional[Hashable], value: Any) -> None:
+        """Store a result set, evicting the least recently used beyond capacity"""
+        if key is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(db_path, version)
+            self._entries[(db_path, version, key)] = value
+            self._entries.move_to_end((db_path, version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache()
+    return _cache
@@ -0,0 +1,153 @@
+"""Executor-backed query layer for the read-only GtRNAdb connections.
+
+SQLite calls are blocking, so running them directly inside an ``async``
+handler stalls every other SSE stream on the ASGI worker. Queries are instead
+submitted to a small dedicated thread pool, which also bounds how many run at
+once, and awaited with a per-query timeout. A query that overruns its timeout
+is interrupted on its connection so the worker thread is freed as well.
+"""
+import os
+import asyncio
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from .pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Concurrency and timeout limits, overridable from the environment
+QUERY_WORKERS = int(os.getenv('RNA_DB_QUERY_WORKERS', '4'))
+QUERY_TIMEOUT = float(os.getenv('RNA_DB_QUERY_TIMEOUT', '10'))
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a database query does not finish within its timeout"""
+
+
+class _ActiveQuery:
+    """Tracks the connection a query runs on so it can be interrupted safely"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.cancelled = False
+
+    def start(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise QueryTimeoutError("Query cancelled before it started")
+            self._conn = conn
+
+    def finish(self) -> None:
+        with self._lock:
+            self._conn = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+class QueryExecutor:
+    """Runs blocking SQLite work on a bounded thread pool for async callers."""
+
+    def __init__(self, max_workers: int = QUERY_WORKERS, default_timeout: float = QUERY_TIMEOUT):
+        """Initialize the executor
+
+        Args:
+            max_workers: Maximum number of queries running concurrently
+            default_timeout: Timeout in seconds applied when none is given
+        """
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="rna-db-query"
+        )
+
+    async def run(
+        self,
+        pool: ConnectionPool,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Run ``fn(conn, *args)`` on a pooled connection in a worker thread
+
+        Args:
+            pool: Connection pool to borrow the connection from
+            fn: Blocking callable taking the connection as first argument
+            *args: Extra arguments passed to fn
+            timeout: Seconds to wait before interrupting the query
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            QueryTimeoutError: If the query did not finish in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        active = _ActiveQuery()
+
+        def job():
+            with pool.connection() as conn:
+                active.start(conn)
+                try:
+                    return fn(conn, *args)
+                finally:
+                    active.finish()
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, job)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            active.cancel()
+            logger.warning(f"Query on {pool.db_path} exceeded {timeout}s and was interrupted")
+            raise QueryTimeoutError(f"Query exceeded timeout of {timeout}s")
+
+    async def fetchall(
+        self,
+        pool: ConnectionPool,
+        sql: str,
+        params: Sequence[Any] = (),
+        timeout: Optional[float] = None
+    ) -> List[sqlite3.Row]:
+        """Execute a query and return all rows without blocking the event loop"""
+        def query(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+            return conn.execute(sql, params).fetchall()
+        return await self.run(pool, query, timeout=timeout)
+
+    async def fetchone(
+        self,
+        pool: ConnectionPool,
+        sql: str,
+        params: Sequence[Any] = (),
+        timeout: Optional[float] = None
+    ) -> Optional[sqlite3.Row]:
+        """Execute a query and return the first row without blocking the event loop"""
+        def query(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+            return conn.execute(sql, params).fetchone()
+        return await self.run(pool, query, timeout=timeout)
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running queries to finish"""
+        self._executor.shutdown(wait=True)
+
+
+_executor: Optional[QueryExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> QueryExecutor:
+    """Get the process-wide query executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor()
+    return _executor
@@ -0,0 +1,25 @@
+"""Process-wide cache of the in-memory indexes derived from species tables.
+
+The k-mer (kmers.py) and structure (structure.py) indexes are built from a
+species table on first use and kept per database file, content hash, species
+and kind of index. Storing an index for a new version of a file drops the
+older versions, as for the snapshots.
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+_indexes: Dict[Tuple[str, str, str, str], Any] = {}
+_indexes_lock = threading.Lock()
+
+
+def cached_index(db_path: str, version: str, species: str, kind: str) -> Optional[Any]:
+    """The built index of a kind for a database version and species, if any"""
+    return _indexes.get((db_path, version, species, kind))
+
+
+def store_index(db_path: str, version: str, species: str, kind: str, index: Any) -> None:
+    """Keep an index, dropping indexes built from older versions of the same file"""
+    with _indexes_lock:
+        for key in [key for key in _indexes if key[0] == db_path and key[1] != version]:
+            del _indexes[key]
+        _indexes[(db_path, version, species, kind)] = index
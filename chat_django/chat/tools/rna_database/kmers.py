@@ -0,0 +1,154 @@
+"""k-mer index for sequence similarity search.
+
+Every mature and genomic tRNA sequence of a species table is cut into its
+overlapping k-mers (KMER_SIZE bases, 2 bits per base). The index keeps one
+posting array of rows per k-mer, in CSR form: sorted k-mer codes, offsets,
+and the concatenated rows. A query sequence looks up its own k-mers with one
+binary search and counts the rows sharing the most of them. That cost
+depends on the query and on how many genes share its k-mers, not on the
+size of the table, so adding genomes does not slow lookups down. The
+shortlist is then re-ranked by exact alignment (alignment/engine.py).
+
+Indexes are built from the species table on first use and kept per database
+file and content hash (index_cache.py). NumPy is required;
+SEQUENCE_INDEX_ENABLED is False without it.
+"""
+import sqlite3
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    from ..alignment.engine import Alignment, align_one_to_many, encode
+except ImportError:
+    np = None
+
+from .records import decode_row, select_columns
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_INDEX_ENABLED = np is not None
+
+KMER_SIZE = 8
+
+# sequence_type -> key of the record "sequences" JSON
+SEQUENCE_TYPES = {
+    "mature": "Predicted Mature tRNA",
+    "genomic": "Genomic Sequence",
+}
+
+
+def normalize_sequence(sequence: str) -> str:
+    """Uppercase RNA form of a pasted sequence, whitespace removed
+
+    Raises:
+        ValueError: If it contains anything but nucleotides, or is shorter than KMER_SIZE
+    """
+    normalized = "".join(str(sequence).split()).upper().replace("T", "U")
+    if not normalized or set(normalized) - set("ACGUN"):
+        raise ValueError("sequence must only contain the nucleotides A, C, G, U/T and N")
+    if len(normalized) < KMER_SIZE:
+        raise ValueError(f"sequence must be at least {KMER_SIZE} nucleotides long")
+    return normalized
+
+
+def kmer_codes(sequence: str, k: int = KMER_SIZE) -> "np.ndarray":
+    """Distinct k-mers of a sequence as integer codes; windows with an N are skipped"""
+    codes = encode(sequence).astype(np.int64)
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.int64)
+    windows = sliding_window_view(codes, k)
+    windows = windows[(windows < 4).all(axis=1)]
+    return np.unique(windows @ (4 ** np.arange(k - 1, -1, -1, dtype=np.int64)))
+
+
+class _Postings:
+    """Rows containing each k-mer, in CSR form"""
+
+    def __init__(self, sequences: Sequence[str], k: int):
+        kmers = [kmer_codes(sequence, k) for sequence in sequences]
+        rows = np.repeat(np.arange(len(sequences), dtype=np.int32), [len(codes) for codes in kmers])
+        codes = np.concatenate(kmers) if kmers else np.zeros(0, dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        self.keys, starts = np.unique(codes[order], return_index=True)
+        self.offsets = np.append(starts, len(codes))
+        self.rows = rows[order]
+
+    def shared(self, query: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Rows sharing k-mers with the query, and how many each shares"""
+        slots = np.searchsorted(self.keys, query)
+        slots = slots[(slots < len(self.keys)) & (self.keys[np.minimum(slots, len(self.keys) - 1)] == query)]
+        if not len(slots):
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+        hits = np.concatenate([self.rows[self.offsets[s]:self.offsets[s + 1]] for s in slots.tolist()])
+        return np.unique(hits, return_counts=True)
+
+
+class SequenceIndex:
+    """k-mer postings of the mature and genomic sequences of one species table."""
+
+    def __init__(self, species: str, rows: List[sqlite3.Row], k: int = KMER_SIZE):
+        """Build the index from rows selected by load_sequence_index"""
+        self.species = species
+        self.k = k
+        records = [decode_row(row, ("gene_symbol", "sequences")) for row in rows]
+        self.gene_symbols = [record["gene_symbol"] for record in records]
+        self.sequences: Dict[str, List[str]] = {
+            sequence_type: [(record["sequences"] or {}).get(key) or "" for record in records]
+            for sequence_type, key in SEQUENCE_TYPES.items()
+        }
+        self.postings = {
+            sequence_type: _Postings(sequences, k) for sequence_type, sequences in self.sequences.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.gene_symbols)
+
+    def candidates(self, sequence: str, sequence_type: str, shortlist: int) -> List[Tuple[int, int]]:
+        """Rows sharing the most k-mers with a sequence
+
+        Returns:
+            Up to shortlist (row, shared k-mers) pairs, most shared first
+        """
+        rows, shared = self.postings[sequence_type].shared(kmer_codes(sequence, self.k))
+        if len(rows) > shortlist:
+            keep = np.argpartition(-shared, shortlist - 1)[:shortlist]
+            rows, shared = rows[keep], shared[keep]
+        order = np.lexsort((rows, -shared))
+        return list(zip(rows[order].tolist(), shared[order].tolist()))
+
+    def rank(
+        self,
+        sequence: str,
+        sequence_type: str,
+        shortlist: int,
+        limit: int,
+        method: str = "local"
+    ) -> List[Tuple[str, int, "Alignment"]]:
+        """Shortlist candidates by k-mers, then re-rank them by alignment score
+
+        Returns:
+            Up to limit (gene symbol, shared k-mers, alignment), best first
+        """
+        candidates = self.candidates(sequence, sequence_type, shortlist)
+        targets = [self.sequences[sequence_type][row] for row, _ in candidates]
+        alignments = align_one_to_many(sequence, targets, mode=method)
+        ranked = sorted(
+            zip(candidates, alignments),
+            key=lambda item: (-item[1].score, -item[1].identity, self.gene_symbols[item[0][0]])
+        )
+        return [(self.gene_symbols[row], shared, alignment) for (row, shared), alignment in ranked[:limit]]
+
+
+def load_sequence_index(conn: sqlite3.Connection, species: str) -> SequenceIndex:
+    """Read the sequences of a species table and index them
+
+    Runs on a pooled connection through QueryExecutor.run.
+    """
+    rows = conn.execute(
+        f"SELECT {select_columns(('gene_symbol', 'sequences'))} FROM {species} ORDER BY rowid"
+    ).fetchall()
+    index = SequenceIndex(species, rows)
+    logger.info(f"Indexed the {KMER_SIZE}-mers of {len(index)} {species} sequences")
+    return index
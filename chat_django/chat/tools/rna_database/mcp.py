@@ -1,22 +1,49 @@
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, AsyncIterator
 from dataclasses import dataclass
+import os
 import json
-import sqlite3
-from pathlib import Path
+import random
+import asyncio
 import logging
-# Lazy load models to prevent circular imports
-from django.apps import apps
-
-def get_sequence_model():
-    try:
-        return apps.get_model('chat', 'Sequence')
-    except Exception:
-        # For standalone testing
-        from .test_standalone import MockModel
-        return MockModel
+from .pool import ConnectionPool
+from .registry import DISPLAY_NAMES, get_registry
+from .executor import get_executor, QueryTimeoutError
+from .schema import (
+    SCORE_COLUMNS, FTS_IDENTIFIER_COLUMNS, FTS_WEIGHTS, MODOMICS_KEY,
+    chromosome_table, fts_match_expression, fts_table, locus_table, modification_table,
+    parse_locus, parse_modification, variant_table
+)
+from .records import (
+    ALL_FIELDS, MODEL_FIELDS, SEARCH_FIELDS, SORT_FIELDS, decode_row, parse_fields, select_columns
+)
+from .persistence import SequenceWriter
+from .aggregates import (
+    FACETS, SECTIONS, FacetGroup, facet_groups, parse_facets, parse_sections, read_statistics,
+    statistics_table, summarize_facets, table_statistics
+)
+from .pagination import Position, decode_cursor, encode_cursor, keyset_clause, order_clause, query_fingerprint
+from .sampling import fetch_by_rowid, sample_rows
+from .variants import VariantFilter, find_variants, group_by_gene
+from .cache import canonical_params, get_result_cache
+from .snapshot import (
+    SNAPSHOT_ENABLED, SpeciesSnapshot, cached_snapshot, load_snapshot, store_snapshot
+)
+from .kmers import KMER_SIZE, SEQUENCE_INDEX_ENABLED, SEQUENCE_TYPES, load_sequence_index, normalize_sequence
+from .index_cache import cached_index, store_index
+from .structure import STRUCTURE_INDEX_ENABLED, Structure, load_structure_index
+from .motifs import MAX_MOTIFS, IUPAC, load_motif_index, parse_motifs
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the gene symbols accepted by one get_sequences call
+MAX_BATCH_SYMBOLS = 1000
+
+# Records fetched per page by stream_search
+STREAM_PAGE_SIZE = int(os.getenv('RNA_STREAM_PAGE_SIZE', '100'))
+
+# Minimum number of k-mer candidates re-ranked by alignment in search_by_sequence
+SEQUENCE_SHORTLIST = 50
+
 @dataclass
 class MCPRequest:
     """MCP-style request format"""
@@ -30,6 +57,14 @@ class MCPResponse:
     data: Optional[Dict[str, Any]] = None
     error: Optional[Dict[str, str]] = None
 
+@dataclass
+class SearchPage:
+    """Results of a search against one species database"""
+    records: List[Dict[str, Any]]
+    facet_groups: List[FacetGroup]
+    next_cursor: Optional[str]
+    cached: bool
+
 class RNADatabaseMCP:
     """MCP-style RNA database tool that maintains Django chat module compatibility.
     
@@ -48,30 +83,253 @@ class RNADatabaseMCP:
         self.chat_id = chat_id
         self.message_id = message_id
         
-        # Use default database path
-        self.db_path = str(Path(__file__).parent / "data/human_yeast_mouse.db")
+        # One database file per species, opened on first use
+        self.registry = get_registry()
         self.capabilities = {
             "search": {
-                "species": ["human", "yeast", "mouse"],
-                "fields": ["isotype", "anticodon", "score"]
+                "species": self.registry.species + ["all"],
+                "fields": ["isotype", "anticodon", "score", "modification"],
+                "facets": list(FACETS)
+            },
+            "get_sequences": {
+                "max_symbols": MAX_BATCH_SYMBOLS
+            },
+            "search_region": {
+                "params": ["chrom", "start", "end", "flank"]
+            },
+            "search_variants": {
+                "params": ["rsid", "chrom", "start", "end", "trna_position", "region", "effect", "common"]
+            },
+            "search_by_sequence": {
+                "params": ["sequence", "sequence_type", "method", "shortlist"],
+                "sequence_types": list(SEQUENCE_TYPES),
+                "kmer_size": KMER_SIZE
+            },
+            "search_by_structure": {
+                "params": ["structure", "gene_symbol", "max_distance"],
+                "distance": "base_pair"
+            },
+            "search_motif": {
+                "params": ["motifs", "sequence_type", "motif_logic"],
+                "sequence_types": list(SEQUENCE_TYPES),
+                "iupac_codes": "".join(IUPAC),
+                "max_motifs": MAX_MOTIFS
+            },
+            "text_search": {
+                "fields": ["gene_symbol", "hgnc_symbol", "rnacentral_id", "isotype", "overview"]
+            },
+            "get_statistics": {
+                "statistics": list(SECTIONS)
             },
             "data_types": {
                 "sequences": "List[Dict]",
                 "metadata": "Dict"
             }
         }
-        self.valid_species = {"human", "yeast", "mouse"}
-        self.species_display_names = {
-            "human": "Human (Homo sapiens)",
-            "yeast": "Yeast (Saccharomyces cerevisiae)",
-            "mouse": "Mouse (Mus musculus)"
+        self.valid_species = set(self.registry.species)
+        self.species_display_names = self.registry.display_names
+        # Columns accepted by sort_by; score columns map onto the typed shadow columns
+        self.sortable_columns = {
+            "GtRNAdb_Gene_Symbol": "GtRNAdb_Gene_Symbol",
+            "tRNAscan_SE_ID": "tRNAscan_SE_ID",
+            "Locus": "Locus",
+            "Anticodon": "Anticodon",
+            "Isotype_from_Anticodon": "Isotype_from_Anticodon",
+            "Best_Isotype_Model": "Best_Isotype_Model",
+            "General_tRNA_Model_Score": "general_score",
+            "Isotype_Model_Score": "isotype_score",
+            "general_score": "general_score",
+            "isotype_score": "isotype_score",
         }
         self._init_database()
 
     def _init_database(self):
-        """Initialize SQLite database connection"""
-        if not Path(self.db_path).exists():
-            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        """Check that species databases are installed and set up shared services"""
+        if not self.valid_species:
+            raise FileNotFoundError(f"No species databases found in {self.registry.data_dir}")
+        self.executor = get_executor()
+        self.writer = SequenceWriter(self._load_records)
+        self.cache = get_result_cache()
+
+    def _pool(self, species: str) -> ConnectionPool:
+        """Read-only connection pool of a species database"""
+        return self.registry.pool(species)
+
+    def _resolve_species(self, value: Any) -> str:
+        """Normalize a single requested species
+
+        Unknown names fall back to human, as they always have; a known genome
+        whose database is not installed is reported instead of silently
+        answering from another species.
+
+        Raises:
+            ValueError: If the species is known but not installed
+        """
+        species = str(value or 'human').strip().lower()
+        if species in self.valid_species:
+            return species
+        if species in DISPLAY_NAMES:
+            raise ValueError(
+                f"No database installed for species '{species}'. "
+                f"Available: {', '.join(sorted(self.valid_species))}"
+            )
+        logger.warning(f"Invalid species '{species}'. Defaulting to human.")
+        return 'human'
+
+    def _resolve_species_list(self, value: Any) -> List[str]:
+        """Normalize a species parameter that may be a name, a list or "all" """
+        if isinstance(value, str):
+            value = value.split(',')
+        requested = [str(s).strip().lower() for s in (value or ['human']) if str(s).strip()]
+        if 'all' in requested:
+            return sorted(self.valid_species)
+        return list(dict.fromkeys(self._resolve_species(s) for s in requested)) or ['human']
+
+    async def flush(self):
+        """Wait for deferred Sequence writes from this tool instance to commit"""
+        await self.writer.flush()
+
+    async def _fetch_genes(self, species: str, gene_symbols: List[str], fields: Tuple[str, ...]) -> List[Any]:
+        """Fetch the rows of many genes with one query
+
+        The symbols are bound as a single JSON array and joined through
+        json_each, so there is no bound-parameter limit and no temp table is
+        needed on the read-only connection.
+        """
+        return await self.executor.fetchall(
+            self._pool(species),
+            f"SELECT {select_columns(fields)} FROM {species} "
+            f"WHERE GtRNAdb_Gene_Symbol IN (SELECT value FROM json_each(?))",
+            [json.dumps(list(gene_symbols))]
+        )
+
+    async def _cached(
+        self,
+        species: str,
+        method: str,
+        params: Dict[str, Any],
+        query: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Run a query unless the same request was answered for this database version
+
+        Args:
+            species: Species whose database answers the query
+            method: MCP method, part of the cache key
+            params: Request parameters, canonicalized into the cache key
+            query: Coroutine function running the SQLite query and decoding rows
+
+        Returns:
+            Tuple of (query result, whether it came from the cache)
+        """
+        pool = self._pool(species)
+        key = canonical_params(method, {**params, 'species': species})
+        version = pool.version
+        result = self.cache.get(pool.db_path, version, key)
+        if result is not None:
+            return result, True
+        result = await query()
+        self.cache.put(pool.db_path, version, key, result)
+        return result, False
+
+    async def _snapshot(self, species: str) -> Optional[SpeciesSnapshot]:
+        """In-memory snapshot of a species table, loading it on first use
+
+        Returns None when snapshots are disabled or the table does not exist,
+        in which case callers query SQLite.
+        """
+        pool = self._pool(species)
+        if not SNAPSHOT_ENABLED or not pool.table_columns(species):
+            return None
+        version = pool.version
+        snapshot = cached_snapshot(pool.db_path, version, species)
+        if snapshot is None:
+            snapshot = await self.executor.run(pool, load_snapshot, species)
+            store_snapshot(pool.db_path, version, snapshot)
+        return snapshot
+
+    async def _derived_index(self, species: str, kind: str, load: Callable[[Any, str], Any]) -> Any:
+        """In-memory index of a species table, building it with load on first use
+
+        Args:
+            species: Species whose table is indexed
+            kind: Name of the index kind, part of the cache key
+            load: Function of (connection, species) building the index
+        """
+        pool = self._pool(species)
+        version = pool.version
+        index = cached_index(pool.db_path, version, species, kind)
+        if index is None:
+            index = await self.executor.run(pool, load, species)
+            store_index(pool.db_path, version, species, kind, index)
+        return index
+
+    async def _lookup_genes(
+        self,
+        species: str,
+        gene_symbols: List[str],
+        fields: Tuple[str, ...]
+    ) -> List[Dict[str, Any]]:
+        """Decoded records of several genes, from the snapshot or one query"""
+        snapshot = await self._snapshot(species)
+        if snapshot is not None:
+            return [{field: record[field] for field in fields} for record in snapshot.lookup(gene_symbols)]
+        rows = await self._fetch_genes(species, gene_symbols, fields)
+        return [decode_row(row, fields) for row in rows]
+
+    async def _load_records(self, species: str, gene_symbols: List[str]) -> List[Dict[str, Any]]:
+        """Load the stored fields of several genes"""
+        return await self._lookup_genes(species, gene_symbols, MODEL_FIELDS)
+
+    def _score_expressions(self, species: str) -> Dict[str, str]:
+        """SQL expressions for the general and isotype scores of a species table
+
+        Upgraded databases carry typed REAL score columns covered by composite
+        indexes (see schema.py); older files fall back to casting the TEXT columns.
+        """
+        columns = self._pool(species).table_columns(species)
+        return {
+            typed: typed if typed in columns else f"CAST({source} AS REAL)"
+            for typed, source in SCORE_COLUMNS.items()
+        }
+
+    def _has_fts(self, species: str) -> bool:
+        """Whether the species table has a full-text index (see schema.py)"""
+        return bool(self._pool(species).table_columns(fts_table(species)))
+
+    def _modification_clause(self, species: str, modifications: List[str], mode: str) -> Tuple[str, List[Any]]:
+        """SQL clause selecting genes carrying the given Modomics modifications
+
+        A bare code ("m1A") matches the modification at any position, a full
+        token ("m1A58") only at that position. Mode "all" requires every
+        modification, "any" at least one. Upgraded databases answer from the
+        precomputed modification index (see schema.py); older files fall back
+        to matching tokens in the overview JSON.
+        """
+        index = modification_table(species)
+        indexed = bool(self._pool(species).table_columns(index))
+        clauses, clause_params = [], []
+        for modification in modifications:
+            code, position = parse_modification(modification)
+            if indexed:
+                if position is None:
+                    clauses.append(f"rowid IN (SELECT gene_rowid FROM {index} WHERE modification = ?)")
+                    clause_params.append(code)
+                else:
+                    clauses.append(
+                        f"rowid IN (SELECT gene_rowid FROM {index} WHERE modification = ? AND position = ?)"
+                    )
+                    clause_params.extend([code, position])
+            else:
+                # Tokens are space separated; a bare code must be followed by a position
+                clauses.append(
+                    "(' ' || COALESCE(json_extract(blob_text(overview), ?), '') || ' ') GLOB ?"
+                )
+                clause_params.append(f'$."{MODOMICS_KEY}"')
+                clause_params.append(
+                    f"* {code}[0-9e]*" if position is None else f"* {code}{position} *"
+                )
+        joiner = " AND " if mode == "all" else " OR "
+        return "(" + joiner.join(clauses) + ")", clause_params
 
     async def search_rna(self, query: str) -> Tuple[str, List[Dict[str, Any]]]:
         """Original interface required by chat module
@@ -98,6 +356,12 @@ class RNADatabaseMCP:
                     params['anticodon'] = value
                 elif key == 'species':
                     params['species'] = value
+                elif key == 'modification':
+                    params['modification'] = value
+                elif key == 'modification_mode':
+                    params['modification_mode'] = value.lower()
+                elif key == 'filter_logic':
+                    params['filter_logic'] = value.lower()
                 
                 # Score parameters
                 elif key == 'General_tRNA_Model_Score_min':
@@ -124,6 +388,12 @@ class RNADatabaseMCP:
                     params['limit'] = int(value)
                 elif key == 'sample':
                     params['sample'] = value.lower()  # normalize to lowercase
+                elif key == 'seed':
+                    params['seed'] = int(value)
+                
+                # Field projection
+                elif key == 'fields':
+                    params['fields'] = value
 
         # Add context from instance variables
         params["context"] = {
@@ -143,12 +413,49 @@ class RNADatabaseMCP:
         
         if response.status == "success" and "sequences" in response.data:
             species = params.get('species', 'human').lower()
-            if species not in self.valid_species:
+            if species not in self.valid_species and species != 'all':
                 species = 'human'
             return species, response.data["sequences"]
         else:
             return "human", []  # Default to human on error
 
+    async def search_region(
+        self,
+        chrom: str,
+        start: int,
+        end: int,
+        species: str = "human",
+        flank: int = 0,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Find tRNA genes overlapping or near a genomic region
+
+        Args:
+            chrom: Chromosome name, e.g. "chr6"
+            start: Region start coordinate
+            end: Region end coordinate
+            species: Species to search
+            flank: Also return genes within this many bases of the region
+            limit: Maximum number of genes, nearest first
+
+        Returns:
+            Gene payloads with their parsed region and distance, or [] on error
+        """
+        response = await self.process_request(MCPRequest(
+            method="search_region",
+            params={
+                "chrom": chrom,
+                "start": start,
+                "end": end,
+                "species": species,
+                "flank": flank,
+                "limit": limit
+            }
+        ))
+        if response.status == "success":
+            return response.data["sequences"]
+        return []
+
     async def process_request(self, request: MCPRequest) -> MCPResponse:
         """Process an MCP-style request
         
@@ -180,6 +487,30 @@ class RNADatabaseMCP:
             elif request.method == "get_sequence":
                 return await self._handle_get_sequence(request.params, context)
 
+            elif request.method == "get_sequences":
+                return await self._handle_get_sequences(request.params, context)
+
+            elif request.method == "search_region":
+                return await self._handle_search_region(request.params, context)
+
+            elif request.method == "search_variants":
+                return await self._handle_search_variants(request.params, context)
+
+            elif request.method == "search_by_sequence":
+                return await self._handle_search_by_sequence(request.params, context)
+
+            elif request.method == "search_by_structure":
+                return await self._handle_search_by_structure(request.params, context)
+
+            elif request.method == "search_motif":
+                return await self._handle_search_motif(request.params, context)
+
+            elif request.method == "text_search":
+                return await self._handle_text_search(request.params, context)
+
+            elif request.method == "get_statistics":
+                return await self._handle_get_statistics(request.params, context)
+
             else:
                 return MCPResponse(
                     status="error",
@@ -200,127 +531,542 @@ class RNADatabaseMCP:
             )
 
     async def _handle_search(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
-        """Handle RNA search requests"""
+        """Handle RNA search requests
+
+        Species may be a single name, a list, or "all"; several species are
+        searched concurrently and their results merged. With ``facets``, the
+        response also describes the whole filtered set, not just the returned
+        page: total, counts per isotype and anticodon, and score ranges.
+        """
         try:
-            # Get species from parameters
-            species = params.get('species', 'human').lower()
-            if species not in self.valid_species:
-                logger.warning(f"Invalid species '{species}'. Defaulting to human.")
-                species = 'human'
-            
-            # Build query
-            sql = f"SELECT * FROM {species} WHERE 1=1"
-            sql_params = []
-            
-            logger.info(f"Querying {self.species_display_names[species]} tRNA database")
-            
-            # Basic filters
-            if 'search_term' in params:
+            species_list = self._resolve_species_list(params.get('species'))
+
+            # Only select the requested fields; heavy blobs come from get_sequence
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            facets = parse_facets(params.get('facets'))
+            deferred = params.get('persist') == 'deferred'
+
+            # Pages of a single species can be continued with the returned cursor
+            paginate = len(species_list) == 1
+            # Merging needs the sort key of every record, even when not requested
+            merge_field = None if paginate else self._merge_field(params)
+            search_fields = fields
+            if merge_field and merge_field not in fields:
+                search_fields = tuple(f for f in ALL_FIELDS if f in fields or f == merge_field)
+            results = await asyncio.gather(*(
+                self._search_species(params, species, search_fields, bool(facets), paginate)
+                for species in species_list
+            ))
+            cached = all(page.cached for page in results)
+
+            if paginate:
+                species = species_list[0]
+                sequences = await self.writer.write(
+                    results[0].records,
+                    context,
+                    species,
+                    self._pool(species).version,
+                    deferred=deferred
+                )
+            else:
+                merged = self._merge_results(
+                    params,
+                    [(species, record) for species, page in zip(species_list, results) for record in page.records]
+                )
+                if search_fields != fields:
+                    # Copies, since the records may be shared with the result cache
+                    merged = [
+                        (species, {field: value for field, value in record.items() if field != merge_field})
+                        for species, record in merged
+                    ]
+                sequences = await self._write_merged(merged, context, deferred)
+
+            data = {
+                "sequences": sequences,
+                "metadata": {
+                    "count": len(sequences),
+                    "query": params,
+                    "species": species_list,
+                    "fields": list(fields),
+                    "lazy_fields": [f for f in ALL_FIELDS if f not in fields],
+                    "next_cursor": results[0].next_cursor if paginate else None,
+                    "cached": cached
+                }
+            }
+            if facets:
+                # Groups of several species add up; per-species totals are kept alongside
+                data["facets"] = summarize_facets(
+                    (group for page in results for group in page.facet_groups), facets
+                )
+                if len(species_list) > 1:
+                    data["facets"]["species"] = {
+                        species: sum(group[2] for group in page.facet_groups)
+                        for species, page in zip(species_list, results)
+                    }
+            return MCPResponse(status="success", data=data)
+
+        except ValueError as e:
+            logger.error(f"Invalid search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    def _merge_results(
+        self,
+        params: Dict[str, Any],
+        tagged: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Merge per-species search results into one result list
+
+        Each species has already applied the filters and limit. Results are
+        ordered by the requested sort column, or by general score when none is
+        given or it is not part of the payload, then cut to the limit. Random
+        samples are re-sampled from the union of the species samples.
+
+        Args:
+            params: Search parameters
+            tagged: (species, record) pairs from every species
+
+        Returns:
+            The merged (species, record) pairs
+        """
+        limit = max(int(params.get('limit', 10)), 0)
+        sort_column = self.sortable_columns.get(params.get('sort_by', ''))
+        sort_field = SORT_FIELDS.get(sort_column)
+        descending = params.get('order', '').lower() == 'desc'
+
+        if params.get('sample', '').lower() == 'random':
+            seed = int(params['seed']) if params.get('seed') is not None else None
+            tagged = random.Random(seed).sample(tagged, min(limit, len(tagged)))
+            if sort_field:
+                tagged.sort(key=lambda item: item[1][sort_field], reverse=descending)
+            return tagged
+
+        if sort_field:
+            tagged = sorted(tagged, key=lambda item: item[1][sort_field], reverse=descending)
+        else:
+            tagged = sorted(tagged, key=lambda item: item[1]['general_score'], reverse=True)
+        return tagged[:limit]
+
+    def _merge_field(self, params: Dict[str, Any]) -> str:
+        """Payload field _merge_results orders multi-species results by"""
+        return SORT_FIELDS.get(self.sortable_columns.get(params.get('sort_by', ''))) or 'general_score'
+
+    async def _write_merged(
+        self,
+        merged: List[Tuple[str, Dict[str, Any]]],
+        context: Dict[str, Any],
+        deferred: bool
+    ) -> List[Dict[str, Any]]:
+        """Persist merged results with one bulk write per species
+
+        Returns:
+            Payloads tagged with their species, in merged order
+        """
+        by_species: Dict[str, List[Dict[str, Any]]] = {}
+        for species, record in merged:
+            by_species.setdefault(species, []).append(record)
+
+        stored = {}
+        for species, records in by_species.items():
+            payloads = await self.writer.write(
+                records, context, species, self._pool(species).version, deferred=deferred
+            )
+            stored[species] = iter(payloads)
+
+        sequences = []
+        for species, _ in merged:
+            payload = next(stored[species])
+            payload['species'] = species
+            sequences.append(payload)
+        return sequences
+
+    async def stream_search(
+        self,
+        params: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield search_rna results one at a time, fetching them page by page
+
+        Walks the keyset pages of the search (STREAM_PAGE_SIZE records each),
+        persisting and yielding each page before the next is read, so memory
+        stays bounded however many genes match. Several species are streamed
+        one after another, each payload tagged with its species.
+
+        Args:
+            params: search_rna parameters; ``limit`` caps the total number of
+                records and is unbounded when omitted, ``cursor`` resumes a
+                single-species search
+            context: Chat context, by default this tool's user, chat and message
+
+        Yields:
+            Record payloads as returned by search_rna
+
+        Raises:
+            ValueError: If the parameters are invalid or sample is requested
+        """
+        if params.get('sample', '').lower() == 'random':
+            raise ValueError("Random samples cannot be streamed; use search_rna")
+        context = context or {"user_id": self.user_id, "chat_id": self.chat_id, "message_id": self.message_id}
+        species_list = self._resolve_species_list(params.get('species'))
+        fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+        deferred = params.get('persist') == 'deferred'
+
+        async for species, records in self._pages(params, species_list, fields):
+            payloads = await self.writer.write(
+                records, context, species, self._pool(species).version, deferred=deferred
+            )
+            for payload in payloads:
+                if len(species_list) > 1:
+                    payload['species'] = species
+                yield payload
+
+    async def _pages(
+        self,
+        params: Dict[str, Any],
+        species_list: List[str],
+        fields: Tuple[str, ...]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Walk the keyset pages of a search, species after species
+
+        ``limit`` caps the total number of records and is unbounded when
+        omitted; ``cursor`` resumes a single-species search.
+
+        Yields:
+            (species, decoded records) per page of at most STREAM_PAGE_SIZE
+        """
+        remaining = int(params['limit']) if params.get('limit') is not None else None
+        for species in species_list:
+            cursor = params.get('cursor') if len(species_list) == 1 else None
+            while remaining is None or remaining > 0:
+                size = STREAM_PAGE_SIZE if remaining is None else min(STREAM_PAGE_SIZE, remaining)
+                page = await self._search_species(
+                    {**params, 'limit': size, 'cursor': cursor}, species, fields, paginate=True
+                )
+                if page.records:
+                    yield species, page.records
+                if remaining is not None:
+                    remaining -= len(page.records)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+
+    async def find_records(
+        self,
+        params: Dict[str, Any],
+        fields: Optional[Any] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Decoded records for other tools, without persisting them to the chat
+
+        Looks up ``gene_symbols`` (a list or comma-separated string) in the
+        requested species when given, in the requested order; otherwise
+        collects every record matching the search_rna filters in ``params``,
+        up to ``limit``.
+
+        Args:
+            params: search_rna parameters, or species and gene_symbols
+            fields: Fields to return, as for search_rna
+
+        Returns:
+            (species, record) pairs
+
+        Raises:
+            ValueError: If the parameters are invalid or sample is requested
+        """
+        species_list = self._resolve_species_list(params.get('species'))
+        fields = parse_fields(fields, SEARCH_FIELDS)
+        symbols = params.get('gene_symbols')
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        if symbols:
+            symbols = [str(s).strip() for s in symbols if str(s).strip()]
+            if len(symbols) > MAX_BATCH_SYMBOLS:
+                raise ValueError(f"At most {MAX_BATCH_SYMBOLS} gene symbols per request")
+            found = {}
+            for species in species_list:
+                for record in await self._lookup_genes(species, symbols, fields):
+                    found.setdefault(record['gene_symbol'], (species, record))
+            return [found[s] for s in dict.fromkeys(symbols) if s in found]
+
+        if params.get('sample', '').lower() == 'random':
+            raise ValueError("Random samples cannot be paged; use search_rna")
+        return [
+            (species, record)
+            async for species, records in self._pages(params, species_list, fields)
+            for record in records
+        ]
+
+    async def _search_species(
+        self,
+        params: Dict[str, Any],
+        species: str,
+        fields: Tuple[str, ...],
+        facets: bool = False,
+        paginate: bool = False
+    ) -> SearchPage:
+        """Run a search against one species database
+
+        Args:
+            params: Search parameters; ``cursor`` resumes a paginated search
+            species: Resolved species
+            fields: Projection to return
+            facets: Also group the whole filtered set for the facet counts
+            paginate: Return a cursor to the next page when there are more
+                matches (see pagination.py); samples are never paginated
+
+        Returns:
+            The page of decoded records, with facet groups when requested
+
+        Raises:
+            ValueError: If the cursor is invalid for this search
+        """
+        pool = self._pool(species)
+        # Build query
+        where = "1=1"
+        sql_params = []
+        
+        logger.info(f"Querying {self.species_display_names[species]} tRNA database")
+        
+        # Basic filters
+        if 'search_term' in params:
+            match = fts_match_expression(str(params['search_term']), FTS_IDENTIFIER_COLUMNS)
+            if match and self._has_fts(species):
+                # Full-text index over identifiers, isotype and overview
+                fts = fts_table(species)
+                where += f" AND rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)"
+                sql_params.append(match)
+            else:
                 # Search in both isotype and gene symbol
-                sql += " AND (Isotype_from_Anticodon LIKE ? OR GtRNAdb_Gene_Symbol LIKE ?)"
+                where += " AND (Isotype_from_Anticodon LIKE ? OR GtRNAdb_Gene_Symbol LIKE ?)"
                 search_pattern = f"%{params['search_term']}%"
                 sql_params.extend([search_pattern, search_pattern])
+        
+        # Modification filters; the Modomics json_field search is an alias
+        modifications = params.get('modification') or []
+        if isinstance(modifications, str):
+            modifications = modifications.split(',')
+        modifications = [m.strip() for m in modifications if m.strip()]
+        json_field = params.get('json_field')
+        if json_field == MODOMICS_KEY and params.get('json_value'):
+            modifications.append(params['json_value'])
+
+        modification_mode = params.get('modification_mode', 'any').lower()
+        filter_logic = params.get('filter_logic', 'and').lower()
+        if modification_mode not in ('any', 'all'):
+            raise ValueError(f"modification_mode must be 'any' or 'all', got '{modification_mode}'")
+        if filter_logic not in ('and', 'or'):
+            raise ValueError(f"filter_logic must be 'and' or 'or', got '{filter_logic}'")
+
+        # Isotype, anticodon and modification filters combine with filter_logic
+        identity_clauses = []
+        if 'isotype' in params:
+            identity_clauses.append("Isotype_from_Anticodon = ?")
+            sql_params.append(params['isotype'])
             
-            if 'isotype' in params:
-                sql += " AND Isotype_from_Anticodon = ?"
-                sql_params.append(params['isotype'])
-                
-            if 'anticodon' in params:
-                sql += " AND Anticodon = ?"
-                sql_params.append(params['anticodon'])
-            
-            # Score filters - handle as TEXT fields with numeric comparison
-            if 'min_general_score' in params:
-                sql += " AND CAST(General_tRNA_Model_Score AS FLOAT) >= ?"
-                sql_params.append(float(params['min_general_score']))
-                
-            if 'max_general_score' in params:
-                sql += " AND CAST(General_tRNA_Model_Score AS FLOAT) <= ?"
-                sql_params.append(float(params['max_general_score']))
-                
-            if 'min_isotype_score' in params:
-                sql += " AND CAST(Isotype_Model_Score AS FLOAT) >= ?"
-                sql_params.append(float(params['min_isotype_score']))
-                
-            if 'max_isotype_score' in params:
-                sql += " AND CAST(Isotype_Model_Score AS FLOAT) <= ?"
-                sql_params.append(float(params['max_isotype_score']))
-            
-            # JSON field search in overview TEXT field
-            if 'json_field' in params and 'json_value' in params:
-                # Since overview is TEXT containing JSON, we need to parse it
-                
-                if params['json_field'] == "Known Modifications (Modomics)":
-                    # First ensure overview is valid JSON
-                    sql += " AND json_valid(overview)"
-                    # Extract the Known Modifications field and do exact string matching
-                    sql += " AND json_extract(overview, '%Known Modifications (Modomics)%) = ?"
-                    sql_params.append(params['json_value'])
-            
-            # Sorting
-            if 'sort_by' in params:
-                sql += f" ORDER BY {params['sort_by']}"
-                if params.get('order', '').lower() == 'desc':
-                    sql += " DESC"
-                else:
-                    sql += " ASC"
-            
-            # Random sampling
-            if params.get('sample', '').lower() == 'random':
-                sql += " ORDER BY RANDOM()"
-            
-            # Limit results
-            if 'limit' in params:
-                sql += " LIMIT ?"
-                sql_params.append(int(params['limit']))
+        if 'anticodon' in params:
+            identity_clauses.append("Anticodon = ?")
+            sql_params.append(params['anticodon'])
+
+        if modifications:
+            clause, clause_params = self._modification_clause(species, modifications, modification_mode)
+            identity_clauses.append(clause)
+            sql_params.extend(clause_params)
+
+        if identity_clauses:
+            joiner = " OR " if filter_logic == 'or' else " AND "
+            where += " AND (" + joiner.join(identity_clauses) + ")"
+        
+        # Score filters - use the typed score columns so the indexes apply
+        scores = self._score_expressions(species)
+        score_bounds = []
+        for key, field, op in (
+            ('min_general_score', 'general_score', '>='),
+            ('max_general_score', 'general_score', '<='),
+            ('min_isotype_score', 'isotype_score', '>='),
+            ('max_isotype_score', 'isotype_score', '<='),
+        ):
+            if key in params:
+                where += f" AND {scores[field]} {op} ?"
+                sql_params.append(float(params[key]))
+                score_bounds.append((field, op, float(params[key])))
+        
+        # Exact match on any other overview key
+        if json_field and json_field != MODOMICS_KEY and 'json_value' in params:
+            where += " AND json_extract(blob_text(overview), ?) = ?"
+            sql_params.append('$."' + json_field.replace('"', '\\"') + '"')
+            sql_params.append(params['json_value'])
+        
+        # Sorting - scores sort numerically, unknown columns are ignored; rowid breaks ties
+        order_expr = sort_column = None
+        descending = params.get('order', '').lower() == 'desc'
+        if 'sort_by' in params:
+            sort_column = self.sortable_columns.get(params['sort_by'])
+            if sort_column is None:
+                logger.warning(f"Ignoring unsupported sort_by '{params['sort_by']}'")
             else:
-                sql += " LIMIT 10"  # Default limit
-
-            # Query SQLite
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(sql, sql_params)
-                rows = cursor.fetchall()
-
-            # Process results and store in PostgreSQL
-            sequences = []
-            for row in rows:
-                # Convert SQLite row to dict
-                row_dict = dict(row)
-                
-                # Store in PostgreSQL
-                Sequence = get_sequence_model()
-                sequence = await Sequence.objects.acreate(
-                    user_id=context['user_id'],
-                    chat_id=context['chat_id'],
-                    message_id=context['message_id'],
-                    gene_symbol=row_dict['GtRNAdb_Gene_Symbol'],
-                    anticodon=row_dict['Anticodon'],
-                    isotype=row_dict['Isotype_from_Anticodon'],
-                    general_score=float(row_dict['General_tRNA_Model_Score']),
-                    isotype_score=float(row_dict['Isotype_Model_Score']),
-                    model_agreement=str(row_dict['Anticodon_and_Isotype_Model_Agreement']).lower() == 'true',
-                    features=row_dict.get('Features', ''),
-                    locus=row_dict.get('Locus', ''),
-                    sequences=json.loads(row_dict.get('sequences', '{}')),
-                    overview=json.loads(row_dict.get('overview', '{}'))
+                order_expr = scores.get(sort_column, sort_column)
+        order_by = order_clause(order_expr, descending)
+
+        limit = max(int(params.get('limit', 10)), 0)  # Default limit
+        sample = params.get('sample', '').lower() == 'random'
+        seed = int(params['seed']) if params.get('seed') is not None else None
+
+        # Keyset pagination: resume after the cursor, and fetch one extra row to detect a next page
+        version = pool.version
+        fingerprint = query_fingerprint(species, params)
+        after = None
+        if params.get('cursor'):
+            if sample or not paginate:
+                raise ValueError("cursor requires a single species and cannot be combined with sample")
+            after = decode_cursor(params['cursor'], species, version, fingerprint)
+        page_where, page_params = where, list(sql_params)
+        if after is not None:
+            clause, clause_params = keyset_clause(order_expr, descending, after)
+            page_where += f" AND {clause}"
+            page_params += clause_params
+        fetch = limit + 1 if paginate and not sample else limit
+
+        def next_cursor(count: int, last: Optional[Position]) -> Optional[str]:
+            if count <= limit or last is None:
+                return None
+            return encode_cursor(species, version, fingerprint, last)
+
+        def select_rows(conn):
+            """Fetch the page and, when requested, the facet groups on one connection"""
+            if sample:
+                # Sample rowids and fetch only those rows; a sort applies to the sample
+                rows = sample_rows(
+                    conn, species, select_columns(fields), where, sql_params, limit, seed,
+                    order_by if order_expr else None
                 )
-                
-                sequences.append({
-                    'id': str(sequence.id),
-                    'gene_symbol': sequence.gene_symbol,
-                    'anticodon': sequence.anticodon,
-                    'isotype': sequence.isotype,
-                    'general_score': sequence.general_score,
-                    'isotype_score': sequence.isotype_score,
-                    'model_agreement': sequence.model_agreement,
-                    'features': sequence.features,
-                    'locus': sequence.locus,
-                    'sequences': sequence.sequences,
-                    'overview': sequence.overview,
-                    'images': sequence.images,
-                })
+            else:
+                rows = conn.execute(
+                    f"SELECT {select_columns(fields)}, rowid AS page_rowid, {order_expr or 'NULL'} AS page_key "
+                    f"FROM {species} WHERE {page_where} ORDER BY {order_by} LIMIT ?",
+                    page_params + [fetch]
+                ).fetchall()
+            return rows, facet_groups(conn, species, where, sql_params, scores) if facets else []
+
+        async def run_query():
+            """Query the snapshot or SQLite and decode the projected rows"""
+            snapshot = None
+            if 'search_term' not in params and not (json_field and json_field != MODOMICS_KEY):
+                snapshot = await self._snapshot(species)
+            if snapshot is not None and snapshot.can_sort(sort_column):
+                mask = snapshot.match(
+                    isotype=params.get('isotype'),
+                    anticodon=params.get('anticodon'),
+                    modifications=modifications,
+                    modification_mode=modification_mode,
+                    filter_logic=filter_logic,
+                    score_bounds=score_bounds
+                )
+                indices = snapshot.select_indices(
+                    mask, sort_column=sort_column, descending=descending, limit=fetch,
+                    sample=sample, seed=seed, after=after
+                ).tolist()
+                last = snapshot.page_position(indices[limit - 1], sort_column) if len(indices) > limit > 0 else None
+                records = [{field: snapshot.records[i][field] for field in fields} for i in indices[:limit]]
+                groups = snapshot.facet_groups(mask) if facets else []
+                return records, groups, next_cursor(len(indices), last)
+
+            rows, groups = await self.executor.run(pool, select_rows)
+            last = None
+            if len(rows) > limit > 0:
+                last = Position(rows[limit - 1]["page_key"], rows[limit - 1]["page_rowid"])
+            return [decode_row(row, fields) for row in rows[:limit]], groups, next_cursor(len(rows), last)
+
+        cache_params = {**params, 'facets': facets, 'paginate': paginate, 'fields': list(fields)}
+        (records, groups, cursor), cached = await self._cached(species, 'search_rna', cache_params, run_query)
+        return SearchPage(records, groups, cursor, cached)
+
+    async def _handle_search_by_sequence(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle sequence similarity searches
+
+        Shortlists the genes sharing the most k-mers with ``sequence`` from the
+        k-mer index of each species (see kmers.py), re-ranks the shortlist by
+        alignment score and returns the best ``limit`` genes, each with a
+        "similarity" entry holding the alignment. Several species are searched
+        concurrently and merged by score.
+        """
+        try:
+            if not params.get('sequence'):
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "sequence parameter is required"
+                    }
+                )
+            if not SEQUENCE_INDEX_ENABLED:
+                raise RuntimeError("Sequence search requires NumPy")
+            sequence = normalize_sequence(params['sequence'])
+            sequence_type = str(params.get('sequence_type') or 'mature').lower()
+            if sequence_type not in SEQUENCE_TYPES:
+                raise ValueError(f"sequence_type must be one of {', '.join(SEQUENCE_TYPES)}")
+            method = str(params.get('method') or 'local').lower()
+            if method not in ('global', 'local'):
+                raise ValueError("method must be 'global' or 'local'")
+            limit = max(int(params.get('limit', 10)), 0)
+            shortlist = max(int(params.get('shortlist') or max(SEQUENCE_SHORTLIST, 5 * limit)), limit, 1)
+
+            species_list = self._resolve_species_list(params.get('species'))
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            query = {**params, 'sequence': sequence, 'sequence_type': sequence_type, 'method': method}
+            deferred = params.get('persist') == 'deferred'
+
+            async def species_hits(species: str):
+                async def run_query():
+                    """Shortlist by k-mers, align, then load the ranked records"""
+                    index = await self._derived_index(species, 'kmers', load_sequence_index)
+                    ranked = await asyncio.get_running_loop().run_in_executor(
+                        None, index.rank, sequence, sequence_type, shortlist, limit, method
+                    )
+                    found = await self._lookup_genes(species, [symbol for symbol, _, _ in ranked], fields)
+                    records = {record['gene_symbol']: record for record in found}
+                    hits = []
+                    for symbol, shared, alignment in ranked:
+                        if symbol in records:
+                            record = records[symbol]
+                            record['similarity'] = {**alignment.to_dict(), "shared_kmers": shared}
+                            hits.append(record)
+                    return hits
+
+                return await self._cached(species, 'search_by_sequence', query, run_query)
+
+            results = await asyncio.gather(*(species_hits(species) for species in species_list))
+            cached = all(hit for _, hit in results)
+            if len(species_list) == 1:
+                species = species_list[0]
+                sequences = await self.writer.write(
+                    results[0][0], context, species, self._pool(species).version, deferred=deferred
+                )
+            else:
+                tagged = [(species, record) for species, (records, _) in zip(species_list, results) for record in records]
+                tagged.sort(key=lambda item: -item[1]['similarity']['score'])
+                sequences = await self._write_merged(tagged[:limit], context, deferred)
 
             return MCPResponse(
                 status="success",
@@ -328,105 +1074,888 @@ class RNADatabaseMCP:
                     "sequences": sequences,
                     "metadata": {
                         "count": len(sequences),
-                        "query": params
+                        "query": query,
+                        "species": species_list,
+                        "shortlist": shortlist,
+                        "fields": list(fields),
+                        "cached": cached
                     }
                 }
             )
 
+        except ValueError as e:
+            logger.error(f"Invalid sequence search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Sequence search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
         except Exception as e:
-            logger.error(f"Search error: {e}")
+            logger.error(f"Sequence search error: {e}")
             return MCPResponse(
                 status="error",
                 error={
-                    "code": "SEARCH_ERROR",
+                    "code": "SEQUENCE_SEARCH_ERROR",
                     "message": str(e)
                 }
             )
 
-    async def _handle_get_sequence(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
-        """Handle sequence detail requests"""
+    async def _handle_search_by_structure(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle secondary structure similarity searches
+
+        Ranks genes by base-pair distance to a query fold: a dot-bracket
+        ``structure``, or the structure of ``gene_symbol``, which is left out of
+        the results. Each species is scored in one pass over its bit-packed
+        StructureIndex (see structure.py); several species are merged by
+        distance. Each gene carries "structure_similarity" with the distance
+        and the number of shared base pairs.
+        """
         try:
-            gene_symbol = params.get('gene_symbol')
-            if not gene_symbol:
+            if not params.get('structure') and not params.get('gene_symbol'):
                 return MCPResponse(
                     status="error",
                     error={
                         "code": "MISSING_PARAM",
-                        "message": "gene_symbol parameter is required"
+                        "message": "structure or gene_symbol parameter is required"
                     }
                 )
+            if not STRUCTURE_INDEX_ENABLED:
+                raise RuntimeError("Structure search requires NumPy")
+            limit = max(int(params.get('limit', 10)), 0)
+            max_distance = int(params['max_distance']) if params.get('max_distance') is not None else None
+            species_list = self._resolve_species_list(params.get('species'))
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            deferred = params.get('persist') == 'deferred'
+            indexes = await asyncio.gather(
+                *(self._derived_index(species, 'structures', load_structure_index) for species in species_list)
+            )
 
-            # Query SQLite for full details
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                # Get species from parameters
-                species = params.get('species', 'human').lower()
-                if species not in self.valid_species:
-                    logger.warning(f"Invalid species '{species}'. Defaulting to human.")
-                    species = 'human'
-                
-                logger.info(f"Querying {self.species_display_names[species]} tRNA database")
-                cursor.execute(
-                    f"SELECT * FROM {species} WHERE GtRNAdb_Gene_Symbol = ?",
-                    [gene_symbol]
-                )
-                row = cursor.fetchone()
-                
-                if not row:
-                    return MCPResponse(
-                        status="error",
-                        error={
-                            "code": "NOT_FOUND",
-                            "message": f"No sequence found with gene symbol: {gene_symbol}"
-                        }
-                    )
+            gene_symbol = str(params.get('gene_symbol') or '').strip() or None
+            if params.get('structure'):
+                query = Structure(''.join(str(params['structure']).split()))
+            else:
+                found = [
+                    index.structures[index.by_symbol[gene_symbol]]
+                    for index in indexes if gene_symbol in index.by_symbol
+                ]
+                if not found or found[0] is None:
+                    raise ValueError(f"No secondary structure found for {gene_symbol}")
+                query = found[0]
 
-                row_dict = dict(row)
-                
-                # Store in PostgreSQL
-                Sequence = get_sequence_model()
-                sequence = await Sequence.objects.acreate(
-                    user_id=context['user_id'],
-                    chat_id=context['chat_id'],
-                    message_id=context['message_id'],
-                    gene_symbol=row_dict['GtRNAdb_Gene_Symbol'],
-                    anticodon=row_dict['Anticodon'],
-                    isotype=row_dict['Isotype_from_Anticodon'],
-                    general_score=float(row_dict['General_tRNA_Model_Score']),
-                    isotype_score=float(row_dict['Isotype_Model_Score']),
-                    model_agreement=str(row_dict['Anticodon_and_Isotype_Model_Agreement']).lower() == 'true',
-                    features=row_dict.get('Features', ''),
-                    locus=row_dict.get('Locus', ''),
-                    sequences=json.loads(row_dict.get('sequences', '{}')),
-                    overview=json.loads(row_dict.get('overview', '{}'))
-                )
+            async def species_hits(species: str, index):
+                async def run_query():
+                    """Score the whole species, then load the nearest records"""
+                    ranked = index.rank(query, limit, max_distance=max_distance, exclude=gene_symbol)
+                    found = await self._lookup_genes(species, [symbol for symbol, _, _ in ranked], fields)
+                    records = {record['gene_symbol']: record for record in found}
+                    hits = []
+                    for symbol, distance, shared in ranked:
+                        if symbol in records:
+                            record = records[symbol]
+                            record['structure_similarity'] = {
+                                "distance": distance,
+                                "shared_pairs": shared,
+                                "query_pairs": query.pair_count
+                            }
+                            hits.append(record)
+                    return hits
 
-                return MCPResponse(
-                    status="success",
-                    data={
-                        "sequence": {
-                            'id': str(sequence.id),
-                            'gene_symbol': sequence.gene_symbol,
-                            'anticodon': sequence.anticodon,
-                            'isotype': sequence.isotype,
-                            'general_score': sequence.general_score,
-                            'isotype_score': sequence.isotype_score,
-                            'model_agreement': sequence.model_agreement,
-                            'features': sequence.features,
-                            'locus': sequence.locus,
-                            'sequences': sequence.sequences,
-                            'overview': sequence.overview
-                        }
-                    }
+                query_params = {**params, 'structure': query.dot_bracket}
+                return await self._cached(species, 'search_by_structure', query_params, run_query)
+
+            results = await asyncio.gather(
+                *(species_hits(species, index) for species, index in zip(species_list, indexes))
+            )
+            cached = all(hit for _, hit in results)
+            if len(species_list) == 1:
+                species = species_list[0]
+                sequences = await self.writer.write(
+                    results[0][0], context, species, self._pool(species).version, deferred=deferred
                 )
+            else:
+                tagged = [(species, record) for species, (records, _) in zip(species_list, results) for record in records]
+                tagged.sort(key=lambda item: item[1]['structure_similarity']['distance'])
+                sequences = await self._write_merged(tagged[:limit], context, deferred)
 
-        except Exception as e:
-            logger.error(f"Get sequence error: {e}")
             return MCPResponse(
-                status="error",
-                error={
-                    "code": "GET_SEQUENCE_ERROR",
-                    "message": str(e)
-                }
-            )
\ No newline at end of file
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "query": params,
+                        "structure": query.dot_bracket,
+                        "species": species_list,
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid structure search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Structure search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Structure search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "STRUCTURE_SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_search_motif(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle motif searches
+
+        Scans the mature and/or genomic sequences of every gene for IUPAC
+        ``motifs`` in one compiled pass per species (see motifs.py). Genes
+        carrying the most distinct motifs come first, each with its
+        "motif_hits". With ``motif_logic`` "and", a gene must carry every
+        motif. The metadata counts the matching genes and hits of the whole
+        scan, not only the returned page.
+        """
+        try:
+            if not params.get('motifs'):
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "motifs parameter is required"
+                    }
+                )
+            motifs = parse_motifs(params['motifs'])
+            sequence_type = str(params.get('sequence_type') or 'all').lower()
+            if sequence_type != 'all' and sequence_type not in SEQUENCE_TYPES:
+                raise ValueError(f"sequence_type must be 'all' or one of {', '.join(SEQUENCE_TYPES)}")
+            sequence_types = list(SEQUENCE_TYPES) if sequence_type == 'all' else [sequence_type]
+            motif_logic = str(params.get('motif_logic') or 'or').lower()
+            if motif_logic not in ('and', 'or'):
+                raise ValueError("motif_logic must be 'and' or 'or'")
+            limit = max(int(params.get('limit', 10)), 0)
+
+            species_list = self._resolve_species_list(params.get('species'))
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            query = {**params, 'motifs': motifs, 'sequence_type': sequence_type, 'motif_logic': motif_logic}
+            deferred = params.get('persist') == 'deferred'
+
+            async def species_hits(species: str):
+                async def run_query():
+                    """Scan the whole species, then load the top-ranked records"""
+                    index = await self._derived_index(species, 'motifs', load_motif_index)
+                    found = await asyncio.get_running_loop().run_in_executor(
+                        None, index.scan, motifs, sequence_types
+                    )
+                    if motif_logic == 'and':
+                        found = {
+                            row: hits for row, hits in found.items()
+                            if len({hit.motif for hit in hits}) == len(motifs)
+                        }
+                    counts = {
+                        "genes": len(found),
+                        "hits": {motif: 0 for motif in motifs},
+                        "genes_per_motif": {motif: 0 for motif in motifs}
+                    }
+                    for hits in found.values():
+                        for motif in {hit.motif for hit in hits}:
+                            counts["genes_per_motif"][motif] += 1
+                        for hit in hits:
+                            counts["hits"][hit.motif] += 1
+
+                    ranked = sorted(found, key=lambda row: (
+                        -len({hit.motif for hit in found[row]}), -len(found[row]), index.gene_symbols[row]
+                    ))[:limit]
+                    loaded = await self._lookup_genes(species, [index.gene_symbols[row] for row in ranked], fields)
+                    records = {record['gene_symbol']: record for record in loaded}
+                    matched = []
+                    for row in ranked:
+                        record = records.get(index.gene_symbols[row])
+                        if record is not None:
+                            record['motif_hits'] = [hit.to_dict() for hit in found[row]]
+                            matched.append(record)
+                    return matched, counts
+
+                return await self._cached(species, 'search_motif', query, run_query)
+
+            results = await asyncio.gather(*(species_hits(species) for species in species_list))
+            cached = all(hit for _, hit in results)
+            if len(species_list) == 1:
+                species = species_list[0]
+                sequences = await self.writer.write(
+                    results[0][0][0], context, species, self._pool(species).version, deferred=deferred
+                )
+            else:
+                tagged = [
+                    (species, record) for species, ((records, _), _) in zip(species_list, results)
+                    for record in records
+                ]
+                tagged.sort(key=lambda item: (
+                    -len({hit['motif'] for hit in item[1]['motif_hits']}), -len(item[1]['motif_hits'])
+                ))
+                sequences = await self._write_merged(tagged[:limit], context, deferred)
+
+            matches = {
+                "genes": sum(counts["genes"] for (_, counts), _ in results),
+                "hits": {motif: sum(counts["hits"][motif] for (_, counts), _ in results) for motif in motifs},
+                "genes_per_motif": {
+                    motif: sum(counts["genes_per_motif"][motif] for (_, counts), _ in results) for motif in motifs
+                }
+            }
+            if len(species_list) > 1:
+                matches["species"] = {
+                    species: counts["genes"] for species, ((_, counts), _) in zip(species_list, results)
+                }
+
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "query": query,
+                        "species": species_list,
+                        "matches": matches,
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid motif search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Motif search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Motif search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "MOTIF_SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_text_search(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle ranked free-text searches
+
+        Matches the query against gene symbol, HGNC symbol, RNAcentral ID,
+        isotype and the flattened overview text, ordered by BM25 relevance.
+        Databases without a full-text index fall back to an unranked LIKE
+        search over the same text: gene symbol, isotype and the overview
+        values other than links, which include the HGNC symbol and RNAcentral
+        ID. Gene symbol and isotype matches come first.
+        """
+        try:
+            query = str(params.get('query', '')).strip()
+            match = fts_match_expression(query)
+            if not match:
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "query parameter is required"
+                    }
+                )
+
+            # Get species from parameters
+            species = self._resolve_species(params.get('species'))
+            pool = self._pool(species)
+
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            limit = max(int(params.get('limit', 10)), 0)
+            columns = ", ".join(f"t.{column}" for column in select_columns(fields).split(", "))
+
+            logger.info(f"Text search in {self.species_display_names[species]} tRNA database")
+
+            async def run_query():
+                """Run the ranked (or fallback) text query and decode the rows"""
+                if self._has_fts(species):
+                    fts = fts_table(species)
+                    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+                    rows = await self.executor.fetchall(
+                        pool,
+                        f"SELECT {columns}, bm25({fts}, {weights}) AS relevance "
+                        f"FROM {fts} JOIN {species} t ON t.rowid = {fts}.rowid "
+                        f"WHERE {fts} MATCH ? ORDER BY relevance LIMIT ?",
+                        [match, limit]
+                    )
+                else:
+                    pattern = f"%{query}%"
+                    identifier = "(t.GtRNAdb_Gene_Symbol LIKE ? OR t.Isotype_from_Anticodon LIKE ?)"
+                    rows = await self.executor.fetchall(
+                        pool,
+                        f"SELECT {columns}, NULL AS relevance FROM {species} t "
+                        f"WHERE {identifier} OR EXISTS ("
+                        f"SELECT 1 FROM json_each(blob_text(t.overview)) o "
+                        f"WHERE o.value LIKE ? AND o.value NOT LIKE 'http%') "
+                        f"ORDER BY {identifier} DESC, t.rowid LIMIT ?",
+                        [pattern, pattern, pattern, pattern, pattern, limit]
+                    )
+
+                # bm25() is lower for better matches; report it as a positive score
+                records = []
+                for row in rows:
+                    record = decode_row(row, fields)
+                    record['relevance'] = -row['relevance'] if row['relevance'] is not None else None
+                    records.append(record)
+                return records
+
+            records, cached = await self._cached(species, 'text_search', params, run_query)
+            sequences = await self.writer.write(
+                records,
+                context,
+                species,
+                pool.version,
+                deferred=params.get('persist') == 'deferred'
+            )
+
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "query": params,
+                        "match": match,
+                        "ranked": self._has_fts(species),
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid text search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Text search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Text search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "TEXT_SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_search_region(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle genomic region searches
+
+        Returns genes whose locus overlaps [start - flank, end + flank] on the
+        chromosome, nearest first, with "distance" 0 for genes overlapping the
+        region itself. Upgraded databases answer from the R*Tree locus index
+        (see schema.py); older files parse the Locus strings of the chromosome.
+        """
+        try:
+            chrom = params.get('chrom')
+            if not chrom or 'start' not in params or 'end' not in params:
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "chrom, start and end parameters are required"
+                    }
+                )
+            start, end = sorted((int(params['start']), int(params['end'])))
+            flank = max(0, int(params.get('flank', 0)))
+            limit = max(int(params.get('limit', 10)), 0)
+
+            # Get species from parameters
+            species = self._resolve_species(params.get('species'))
+            pool = self._pool(species)
+
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            columns = ", ".join(f"t.{column}" for column in select_columns(fields).split(", "))
+            window_start, window_end = start - flank, end + flank
+
+            logger.info(f"Region search in {self.species_display_names[species]} tRNA database")
+
+            async def run_query():
+                """Query the interval index (or scan loci) and decode the hits"""
+                loci = locus_table(species)
+                if pool.table_columns(loci):
+                    rows = await self.executor.fetchall(
+                        pool,
+                        f"SELECT {columns}, r.chrom AS region_chrom, r.gene_start AS region_start, "
+                        f"r.gene_end AS region_end, r.strand AS region_strand, "
+                        f"MAX(0, r.gene_start - ?, ? - r.gene_end) AS distance "
+                        f"FROM {chromosome_table(species)} c "
+                        f"JOIN {loci} r ON r.chrom_min <= c.id AND r.chrom_max >= c.id "
+                        f"AND r.gene_start <= ? AND r.gene_end >= ? "
+                        f"JOIN {species} t ON t.rowid = r.id "
+                        f"WHERE c.name = ? ORDER BY distance, r.gene_start LIMIT ?",
+                        [end, start, window_end, window_start, chrom, limit]
+                    )
+                    hits = [
+                        (
+                            row,
+                            (row['region_chrom'], row['region_start'], row['region_end'], row['region_strand']),
+                            row['distance']
+                        )
+                        for row in rows
+                    ]
+                else:
+                    rows = await self.executor.fetchall(
+                        pool,
+                        f"SELECT {columns}, t.Locus AS region_locus FROM {species} t WHERE t.Locus LIKE ?",
+                        [f"{chrom}:%"]
+                    )
+                    hits = []
+                    for row in rows:
+                        interval = parse_locus(row['region_locus'])
+                        if interval and interval[0] == chrom and interval[1] <= window_end and interval[2] >= window_start:
+                            hits.append((row, interval, max(0, interval[1] - end, start - interval[2])))
+                    hits.sort(key=lambda hit: (hit[2], hit[1][1]))
+                    hits = hits[:limit]
+
+                records = []
+                for row, (hit_chrom, hit_start, hit_end, strand), distance in hits:
+                    record = decode_row(row, fields)
+                    record['region'] = {
+                        "chrom": hit_chrom,
+                        "start": hit_start,
+                        "end": hit_end,
+                        "strand": strand
+                    }
+                    record['distance'] = distance
+                    records.append(record)
+                return records
+
+            records, cached = await self._cached(species, 'search_region', params, run_query)
+            sequences = await self.writer.write(
+                records,
+                context,
+                species,
+                pool.version,
+                deferred=params.get('persist') == 'deferred'
+            )
+
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "query": params,
+                        "window": {"chrom": chrom, "start": window_start, "end": window_end},
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid region search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Region search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Region search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "REGION_SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_search_variants(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle variant (dbSNP) searches
+
+        Returns genes carrying variants that match every given filter: rsID,
+        genomic range, tRNA position or range, structural region and effect.
+        Each gene lists its matching variants under "matched_variants", and
+        the limit counts genes. Upgraded databases answer from the variant
+        index (see schema.py); older files parse the variants JSON.
+        """
+        try:
+            variant_filter = VariantFilter.from_params(params)
+            limit = max(int(params.get('limit', 10)), 0)
+
+            # Get species from parameters
+            species = self._resolve_species(params.get('species'))
+            pool = self._pool(species)
+
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            indexed = bool(pool.table_columns(variant_table(species)))
+
+            logger.info(f"Variant search in {self.species_display_names[species]} tRNA database")
+
+            def lookup(conn, table):
+                """Find the variants, then fetch their genes by rowid, on one connection"""
+                grouped = group_by_gene(find_variants(conn, table, variant_filter, limit, indexed))
+                rows = fetch_by_rowid(conn, table, select_columns(fields), list(grouped))
+                return [(row, grouped[row['sample_rowid']]) for row in rows]
+
+            async def run_query():
+                """Query the variant index (or parse variants) and decode the genes"""
+                records = []
+                for row, variants in await self.executor.run(pool, lookup, species):
+                    record = decode_row(row, fields)
+                    record['matched_variants'] = variants
+                    records.append(record)
+                return records
+
+            records, cached = await self._cached(species, 'search_variants', params, run_query)
+            sequences = await self.writer.write(
+                records,
+                context,
+                species,
+                pool.version,
+                deferred=params.get('persist') == 'deferred'
+            )
+
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "variant_count": sum(len(record['matched_variants']) for record in records),
+                        "query": params,
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid variant search parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Variant search timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Variant search error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "VARIANT_SEARCH_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_get_sequence(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle sequence detail requests"""
+        try:
+            gene_symbol = params.get('gene_symbol')
+            if not gene_symbol:
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "gene_symbol parameter is required"
+                    }
+                )
+
+            # Get species from parameters
+            species = self._resolve_species(params.get('species'))
+            pool = self._pool(species)
+            
+            # Query SQLite for full details off the event loop
+            logger.info(f"Querying {self.species_display_names[species]} tRNA database")
+            fields = parse_fields(params.get('fields'), ALL_FIELDS)
+            row = await self.executor.fetchone(
+                pool,
+                f"SELECT {select_columns(fields)} FROM {species} WHERE GtRNAdb_Gene_Symbol = ?",
+                [gene_symbol]
+            )
+            
+            if not row:
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "NOT_FOUND",
+                        "message": f"No sequence found with gene symbol: {gene_symbol}"
+                    }
+                )
+
+            # Store in PostgreSQL
+            record = decode_row(row, fields)
+            stored = await self.writer.write(
+                [record],
+                context,
+                species,
+                pool.version,
+                deferred=params.get('persist') == 'deferred'
+            )
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequence": stored[0]
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid get sequence parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Get sequence timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Get sequence error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "GET_SEQUENCE_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_get_sequences(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle batch sequence requests
+
+        Resolves a list of gene symbols with one query per species and stores
+        each species' results with one bulk write. Species may be a single
+        name, a list, or "all" to look the symbols up in every species.
+        Returns the records in request order, plus the symbols not found.
+        """
+        try:
+            gene_symbols = params.get('gene_symbols') or []
+            if isinstance(gene_symbols, str):
+                gene_symbols = gene_symbols.split(',')
+            if not isinstance(gene_symbols, (list, tuple)) or not all(isinstance(s, str) for s in gene_symbols):
+                raise ValueError("gene_symbols must be a list of gene symbol strings")
+            # Deduplicate, keeping request order
+            gene_symbols = list(dict.fromkeys(s.strip() for s in gene_symbols if s.strip()))
+            if not gene_symbols:
+                return MCPResponse(
+                    status="error",
+                    error={
+                        "code": "MISSING_PARAM",
+                        "message": "gene_symbols parameter is required"
+                    }
+                )
+            if len(gene_symbols) > MAX_BATCH_SYMBOLS:
+                raise ValueError(f"At most {MAX_BATCH_SYMBOLS} gene symbols per request, got {len(gene_symbols)}")
+
+            species_list = self._resolve_species_list(params.get('species'))
+            fields = parse_fields(params.get('fields'), SEARCH_FIELDS)
+            deferred = params.get('persist') == 'deferred'
+
+            async def lookup(species: str):
+                """Fetch and decode the genes of one species, through the result cache"""
+                async def run_query():
+                    logger.info(f"Batch lookup of {len(gene_symbols)} genes in {self.species_display_names[species]} tRNA database")
+                    return await self._lookup_genes(species, gene_symbols, fields)
+                return await self._cached(
+                    species, 'get_sequences', {**params, 'gene_symbols': gene_symbols}, run_query
+                )
+
+            # Species databases are queried concurrently
+            results = await asyncio.gather(*(lookup(species) for species in species_list))
+            cached = all(species_cached for _, species_cached in results)
+
+            # Only the per-message Postgres linkage runs on a cache hit
+            found = {}
+            for species, (records, _) in zip(species_list, results):
+                stored = await self.writer.write(
+                    records, context, species, self._pool(species).version, deferred=deferred
+                )
+                for payload in stored:
+                    payload['species'] = species
+                    found.setdefault(payload['gene_symbol'], []).append(payload)
+
+            sequences = [payload for symbol in gene_symbols for payload in found.get(symbol, [])]
+            return MCPResponse(
+                status="success",
+                data={
+                    "sequences": sequences,
+                    "metadata": {
+                        "count": len(sequences),
+                        "species": species_list,
+                        "missing": [symbol for symbol in gene_symbols if symbol not in found],
+                        "fields": list(fields),
+                        "cached": cached
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid get sequences parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Get sequences timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Get sequences error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "GET_SEQUENCES_ERROR",
+                    "message": str(e)
+                }
+            )
+
+    async def _handle_get_statistics(self, params: Dict[str, Any], context: Dict[str, Any]) -> MCPResponse:
+        """Handle aggregate statistics requests
+
+        Returns exact counts, score distributions and model-agreement rates
+        per species from the precomputed statistics table (see aggregates.py),
+        or computed from the rows once for databases without one. Nothing is
+        persisted, as no gene records are returned.
+        """
+        try:
+            species_list = self._resolve_species_list(params.get('species'))
+            sections = parse_sections(params.get('statistics'))
+
+            async def species_statistics(species: str):
+                """Read or compute the full document of one species, through the result cache"""
+                pool = self._pool(species)
+                precomputed = bool(pool.table_columns(statistics_table(species)))
+
+                async def run_query():
+                    logger.info(f"Statistics of {self.species_display_names[species]} tRNA database")
+                    return await self.executor.run(
+                        pool, read_statistics if precomputed else table_statistics, species
+                    )
+                document, cached = await self._cached(species, 'get_statistics', {}, run_query)
+                return document, cached, "precomputed" if precomputed else "computed"
+
+            results = await asyncio.gather(*(species_statistics(species) for species in species_list))
+            return MCPResponse(
+                status="success",
+                data={
+                    "statistics": {
+                        species: {section: document[section] for section in sections if section in document}
+                        for species, (document, _, _) in zip(species_list, results)
+                    },
+                    "metadata": {
+                        "species": species_list,
+                        "statistics": list(sections),
+                        "source": {species: source for species, (_, _, source) in zip(species_list, results)},
+                        "cached": all(cached for _, cached, _ in results)
+                    }
+                }
+            )
+
+        except ValueError as e:
+            logger.error(f"Invalid statistics parameters: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "INVALID_PARAM",
+                    "message": str(e)
+                }
+            )
+        except QueryTimeoutError as e:
+            logger.error(f"Statistics timed out: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "QUERY_TIMEOUT",
+                    "message": str(e)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Statistics error: {e}")
+            return MCPResponse(
+                status="error",
+                error={
+                    "code": "GET_STATISTICS_ERROR",
+                    "message": str(e)
+                }
+            )
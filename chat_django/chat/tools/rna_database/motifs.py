@@ -0,0 +1,172 @@
+"""Multi-pattern motif scanner over the sequences of a species table.
+
+Motifs are nucleotide strings in IUPAC notation (R, Y, N, ...), optionally
+anchored to the 5' end with ``^`` or to the 3' end with ``$``. T reads as U,
+in motifs and sequences alike.
+
+For each sequence type, MotifIndex joins every gene's sequence into one
+newline-separated buffer, with the start offset of each gene kept in a sorted
+list. All the motifs of a query are compiled into a single alternation, each
+branch consuming the motif's first base and looking ahead for the rest, so
+one regex pass over the buffer finds every position where any motif starts,
+overlapping hits included. With several motifs each such position is checked
+against the individual motifs. Hits are mapped back to their gene by
+bisecting the offsets. No IUPAC class matches the newline, so hits never span
+two genes, and ``^``/``$`` match at gene boundaries under re.MULTILINE.
+"""
+import re
+import sqlite3
+import logging
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .kmers import SEQUENCE_TYPES
+from .records import decode_row, select_columns
+
+logger = logging.getLogger(__name__)
+
+# IUPAC nucleotide codes; a motif N also matches an N in the sequence
+IUPAC = {
+    "A": "A", "C": "C", "G": "G", "U": "U",
+    "R": "[AG]", "Y": "[CU]", "S": "[CG]", "W": "[AU]", "K": "[GU]", "M": "[AC]",
+    "B": "[CGU]", "D": "[AGU]", "H": "[ACU]", "V": "[ACG]", "N": "[ACGUN]",
+}
+
+MIN_MOTIF_LENGTH = 3
+MAX_MOTIF_LENGTH = 50
+MAX_MOTIFS = 20
+
+
+@dataclass
+class MotifHit:
+    """One occurrence of a motif; start and end are 0-based, end exclusive."""
+    motif: str
+    sequence_type: str
+    start: int
+    end: int
+    match: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def normalize_motif(motif: str) -> str:
+    """Uppercase RNA form of a motif, whitespace removed
+
+    Raises:
+        ValueError: If it has non-IUPAC characters, misplaced anchors, or a bad length
+    """
+    normalized = "".join(str(motif).split()).upper().replace("T", "U")
+    bases = normalized[normalized.startswith("^"):len(normalized) - normalized.endswith("$")]
+    invalid = set(bases) - set(IUPAC)
+    if invalid:
+        raise ValueError(f"Motif {motif!r} has characters outside the IUPAC codes: {''.join(sorted(invalid))}")
+    if not MIN_MOTIF_LENGTH <= len(bases) <= MAX_MOTIF_LENGTH:
+        raise ValueError(f"Motifs must be {MIN_MOTIF_LENGTH} to {MAX_MOTIF_LENGTH} nucleotides long")
+    return normalized
+
+
+def parse_motifs(motifs: Any) -> List[str]:
+    """Distinct normalized motifs from a list or a comma-separated string, in order
+
+    Raises:
+        ValueError: If there are none, too many, or one is invalid
+    """
+    if isinstance(motifs, str):
+        motifs = motifs.split(",")
+    parsed = list(dict.fromkeys(normalize_motif(motif) for motif in motifs or () if str(motif).strip()))
+    if not parsed:
+        raise ValueError("At least one motif is required")
+    if len(parsed) > MAX_MOTIFS:
+        raise ValueError(f"At most {MAX_MOTIFS} motifs per search")
+    return parsed
+
+
+def motif_length(motif: str) -> int:
+    """Number of bases a normalized motif matches"""
+    return len(motif) - motif.startswith("^") - motif.endswith("$")
+
+
+@lru_cache(maxsize=256)
+def motif_regex(motif: str) -> "re.Pattern":
+    """Compiled pattern of one normalized motif"""
+    return re.compile("".join(IUPAC.get(char, char) for char in motif), re.MULTILINE)
+
+
+@lru_cache(maxsize=256)
+def scanner_regex(motifs: Tuple[str, ...]) -> "re.Pattern":
+    """One pattern matching the first base of every occurrence of any of the motifs
+
+    Only the first base is consumed, so the next match can start one base
+    later and overlapping occurrences are all found.
+    """
+    branches = []
+    for motif in motifs:
+        anchor, bases = ("^", motif[1:]) if motif.startswith("^") else ("", motif)
+        atoms = [IUPAC.get(char, char) for char in bases]
+        branches.append(f"{anchor}{atoms[0]}(?={''.join(atoms[1:])})")
+    return re.compile("|".join(branches), re.MULTILINE)
+
+
+class MotifIndex:
+    """Concatenated mature and genomic sequences of one species table."""
+
+    def __init__(self, species: str, rows: List[sqlite3.Row]):
+        """Build the buffers from rows selected by load_motif_index"""
+        self.species = species
+        records = [decode_row(row, ("gene_symbol", "sequences")) for row in rows]
+        self.gene_symbols = [record["gene_symbol"] for record in records]
+        self.buffers: Dict[str, str] = {}
+        self.starts: Dict[str, List[int]] = {}
+        for sequence_type, key in SEQUENCE_TYPES.items():
+            sequences = [
+                ((record["sequences"] or {}).get(key) or "").upper().replace("T", "U") for record in records
+            ]
+            starts, offset = [], 1
+            for sequence in sequences:
+                starts.append(offset)
+                offset += len(sequence) + 1
+            self.buffers[sequence_type] = "\n" + "\n".join(sequences) + "\n"
+            self.starts[sequence_type] = starts
+
+    def __len__(self) -> int:
+        return len(self.gene_symbols)
+
+    def scan(self, motifs: Sequence[str], sequence_types: Sequence[str]) -> Dict[int, List[MotifHit]]:
+        """Every occurrence of the motifs in the given sequence types
+
+        Returns:
+            Row -> hits in that gene, by sequence type, position and motif order
+        """
+        scanner = scanner_regex(tuple(motifs))
+        patterns = [(motif, motif_regex(motif), motif_length(motif)) for motif in motifs]
+        found: Dict[int, List[MotifHit]] = {}
+        for sequence_type in sequence_types:
+            buffer, starts = self.buffers[sequence_type], self.starts[sequence_type]
+            for candidate in scanner.finditer(buffer):
+                position = candidate.start()
+                row = bisect_right(starts, position) - 1
+                start = position - starts[row]
+                hits = found.setdefault(row, [])
+                for motif, pattern, length in patterns:
+                    # A single motif matched already; several need telling apart
+                    if len(patterns) == 1 or pattern.match(buffer, position):
+                        hits.append(MotifHit(
+                            motif, sequence_type, start, start + length, buffer[position:position + length]
+                        ))
+        return found
+
+
+def load_motif_index(conn: sqlite3.Connection, species: str) -> MotifIndex:
+    """Read the sequences of a species table into a MotifIndex
+
+    Runs on a pooled connection through QueryExecutor.run.
+    """
+    rows = conn.execute(
+        f"SELECT {select_columns(('gene_symbol', 'sequences'))} FROM {species} ORDER BY rowid"
+    ).fetchall()
+    index = MotifIndex(species, rows)
+    logger.info(f"Loaded {len(index)} {species} sequences for motif scans")
+    return index
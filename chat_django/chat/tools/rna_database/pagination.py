@@ -0,0 +1,91 @@
+"""Keyset pagination of search results.
+
+A search page ends with the position of its last row: the value of the sort
+column and the rowid, which breaks ties and alone orders unsorted searches.
+The next page starts strictly after that position, so deep pages cost the
+same as the first one and never skip or repeat rows, unlike OFFSET.
+
+The position travels to the client as an opaque cursor: URL-safe base64 of a
+small JSON document, bound to the species, the database version and a
+fingerprint of the filters and sort. A cursor presented with other filters,
+or after the database file was rebuilt, is rejected instead of silently
+returning a wrong page.
+"""
+import json
+import base64
+import binascii
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import canonical_params
+
+# Request keys that may change from page to page
+_PAGE_KEYS = frozenset({"cursor", "limit", "fields", "facets", "persist", "context"})
+
+
+@dataclass(frozen=True)
+class Position:
+    """Sort key and rowid of the last row of a page."""
+    key: Any
+    rowid: int
+
+
+def query_fingerprint(species: str, params: Dict[str, Any]) -> str:
+    """Short hash of the filters and sort of a search, ignoring paging keys"""
+    query = {key: value for key, value in params.items() if key not in _PAGE_KEYS}
+    canonical = canonical_params("search_rna", {**query, "species": species}) or repr(sorted(query.items()))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(species: str, version: str, fingerprint: str, position: Position) -> str:
+    """Opaque continuation token for the page after position"""
+    document = {"s": species, "v": version[:16], "q": fingerprint, "k": position.key, "r": position.rowid}
+    raw = json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, species: str, version: str, fingerprint: str) -> Position:
+    """Position encoded in a cursor, checked against the current search
+
+    Raises:
+        ValueError: If the token is malformed, or was issued for another
+            species, database version or query
+    """
+    try:
+        raw = base64.urlsafe_b64decode(str(token) + "=" * (-len(str(token)) % 4))
+        document = json.loads(raw)
+        position = Position(document["k"], int(document["r"]))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise ValueError("Malformed cursor")
+    if document.get("s") != species or document.get("q") != fingerprint:
+        raise ValueError("Cursor was issued for a different search; repeat the search without it")
+    if document.get("v") != version[:16]:
+        raise ValueError("Cursor has expired because the database was updated; repeat the search")
+    return position
+
+
+def order_clause(order_expr: Optional[str], descending: bool) -> str:
+    """ORDER BY terms of a paginated search: the sort expression, then rowid"""
+    direction = "DESC" if descending else "ASC"
+    if order_expr is None:
+        return "rowid ASC"
+    return f"{order_expr} {direction}, rowid {direction}"
+
+
+def keyset_clause(order_expr: Optional[str], descending: bool, position: Position) -> Tuple[str, List[Any]]:
+    """SQL condition selecting the rows after position in order_clause order
+
+    NULL sort keys order first ascending and last descending, as in SQLite.
+    """
+    if order_expr is None:
+        return "rowid > ?", [position.rowid]
+    op = "<" if descending else ">"
+    if position.key is None:
+        if descending:
+            return f"({order_expr} IS NULL AND rowid < ?)", [position.rowid]
+        return f"({order_expr} IS NOT NULL OR rowid > ?)", [position.rowid]
+    clause = f"({order_expr}, rowid) {op} (?, ?)"
+    if not descending:
+        return clause, [position.key, position.rowid]
+    return f"({clause} OR {order_expr} IS NULL)", [position.key, position.rowid]
@@ -0,0 +1,194 @@
+"""Batched persistence of GtRNAdb records into the chat models.
+
+Each gene record is stored once in the shared ``TRNARecord`` table, keyed by
+species, gene symbol and source database version; a message only gets a slim
+``Sequence`` link row pointing at it. The writer builds every link up front,
+so ids are known before anything is written, then inserts any records not
+stored yet and all links in one transaction. Deferred writes return
+the payloads immediately and commit in the background, so sequence events can
+stream to the client first; ``flush`` waits for them to land.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+# Lazy load models to prevent circular imports
+from django.apps import apps
+from django.core.exceptions import AppRegistryNotReady, ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .records import MODEL_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Loads full records for (species, gene symbols) when a projection left fields out
+RecordLoader = Callable[[str, List[str]], Awaitable[List[Dict[str, Any]]]]
+
+
+def _chat_model(name: str):
+    try:
+        return apps.get_model('chat', name)
+    except (LookupError, AppRegistryNotReady) as e:
+        raise ImproperlyConfigured(
+            f"Cannot persist tRNA records: the chat.{name} model is not available ({e})"
+        ) from e
+
+
+def get_sequence_model():
+    return _chat_model('Sequence')
+
+
+def get_record_model():
+    return _chat_model('TRNARecord')
+
+
+class SequenceWriter:
+    """Writes decoded records and their message links in batches."""
+
+    def __init__(self, load_records: Optional[RecordLoader] = None):
+        """Initialize the writer
+
+        Args:
+            load_records: Async callable returning full records for a species
+                and list of gene symbols, used when a projection is incomplete
+        """
+        self.load_records = load_records
+        self._pending: List[asyncio.Task] = []
+
+    async def _missing_records(
+        self,
+        records: List[Dict[str, Any]],
+        keys: List[str],
+        species: str,
+        source_version: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """Full records of the keys with no TRNARecord row yet"""
+        TRNARecord = get_record_model()
+        existing = {
+            key async for key in
+            TRNARecord.objects.filter(id__in=set(keys)).values_list('id', flat=True)
+        }
+        missing = {}
+        for key, record in zip(keys, records):
+            if key not in existing:
+                missing.setdefault(key, record)
+        if not missing:
+            return missing
+
+        # Shared rows always hold the full record, whatever the search projected
+        incomplete = [
+            record['gene_symbol'] for record in missing.values()
+            if any(field not in record for field in MODEL_FIELDS)
+        ]
+        if incomplete:
+            if self.load_records is None:
+                raise ValueError("Cannot store partial records without a record loader")
+            for record in await self.load_records(species, incomplete):
+                key = TRNARecord.make_key(species, record['gene_symbol'], source_version)
+                missing[key] = record
+        return missing
+
+    def _insert(
+        self,
+        missing: Dict[str, Dict[str, Any]],
+        links: List[Any],
+        species: str,
+        source_version: str
+    ) -> None:
+        """Insert the new records and the links in one transaction"""
+        TRNARecord = get_record_model()
+        Sequence = get_sequence_model()
+        with transaction.atomic():
+            TRNARecord.objects.bulk_create(
+                [
+                    TRNARecord(
+                        id=key,
+                        species=species,
+                        source_version=source_version,
+                        **{field: record[field] for field in MODEL_FIELDS}
+                    )
+                    for key, record in missing.items()
+                ],
+                ignore_conflicts=True
+            )
+            Sequence.objects.bulk_create(links)
+        logger.debug(f"Stored {len(missing)} new tRNA records and {len(links)} sequence links")
+
+    async def _commit(
+        self,
+        links: List[Any],
+        records: List[Dict[str, Any]],
+        keys: List[str],
+        species: str,
+        source_version: str
+    ) -> None:
+        missing = await self._missing_records(records, keys, species, source_version)
+        await sync_to_async(self._insert)(missing, links, species, source_version)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Deferred sequence write failed: {task.exception()}")
+
+    async def write(
+        self,
+        records: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        species: str,
+        source_version: str,
+        deferred: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Persist records against the chat message
+
+        Args:
+            records: Decoded records from decode_row
+            context: Chat context with user_id, chat_id and message_id
+            species: Species table the records came from
+            source_version: Version of the source database file
+            deferred: Commit in the background instead of awaiting the write
+
+        Returns:
+            The record payloads with their sequence link ids and creation
+            times, in input order, as Sequence.to_dict sends them. The time is
+            taken when the links are issued; the stored created_at is set on
+            insert, so it trails by the write latency.
+        """
+        if not records:
+            return []
+
+        TRNARecord = get_record_model()
+        Sequence = get_sequence_model()
+        keys = [
+            TRNARecord.make_key(species, record['gene_symbol'], source_version)
+            for record in records
+        ]
+        links = [
+            Sequence(
+                user_id=context['user_id'],
+                chat_id=context['chat_id'],
+                message_id=context['message_id'],
+                record_id=key
+            )
+            for key in keys
+        ]
+        created_at = timezone.now().isoformat()
+        payloads = [
+            {'id': str(link.id), **record, 'created_at': created_at}
+            for link, record in zip(links, records)
+        ]
+
+        commit = self._commit(links, records, keys, species, source_version)
+        if deferred:
+            task = asyncio.create_task(commit)
+            task.add_done_callback(self._on_done)
+            self._pending.append(task)
+        else:
+            await commit
+        return payloads
+
+    async def flush(self) -> None:
+        """Wait for every deferred write issued by this writer to commit"""
+        pending, self._pending = self._pending, []
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,220 @@
+"""Process-wide pool of read-only SQLite connections to the GtRNAdb files.
+
+The tRNA databases are static artifacts, so every connection is opened in
+immutable read-only URI mode with memory-mapped I/O, sharing the file's pages
+through the OS page cache. Connections are created lazily, handed out per query and returned to the pool
+afterwards, so neither the connect cost nor a cold page cache is paid on every
+GET_TRNA step.
+"""
+import os
+import queue
+import hashlib
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+from .blobs import install
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing and per-connection tuning, overridable from the environment
+POOL_MAX_SIZE = int(os.getenv('RNA_DB_POOL_SIZE', '8'))
+MMAP_SIZE = int(os.getenv('RNA_DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+CACHE_SIZE_KIB = int(os.getenv('RNA_DB_CACHE_SIZE_KIB', str(64 * 1024)))
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection tagged with the generation of the file it was opened on."""
+    generation = 0
+
+
+class ConnectionPool:
+    """Thread-safe pool of read-only connections to a single SQLite file."""
+
+    def __init__(self, db_path: str, max_size: int = POOL_MAX_SIZE):
+        """Initialize the pool without opening any connection yet
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_size: Maximum number of idle connections kept open
+        """
+        self.db_path = str(Path(db_path).resolve())
+        if not Path(self.db_path).exists():
+            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        self.max_size = max_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max_size)
+        self._closed = False
+        self._columns: Dict[str, FrozenSet[str]] = {}
+        self._version: Optional[str] = None
+        self._fingerprint: Optional[Tuple[int, int, int]] = None
+        # Bumped whenever the file changes; older connections are closed on release
+        self._generation = 0
+        self._version_lock = threading.Lock()
+
+    @property
+    def uri(self) -> str:
+        """SQLite URI opening the file read-only and immutable
+
+        Each connection keeps a private page cache: SQLite keys shared caches
+        by path, so a connection opened after the file was replaced would join
+        the cache of a connection still borrowed on the old file.
+        """
+        return f"{Path(self.db_path).as_uri()}?mode=ro&immutable=1"
+
+    @property
+    def version(self) -> str:
+        """Content hash of the database file, identifying the source data version
+
+        The hash is recomputed only when the file's size, mtime or inode
+        change, e.g. after a rebuild or schema upgrade replaced it. The idle
+        connections and cached table layouts are dropped at the same time,
+        since immutable connections would not notice the new content.
+        """
+        stat = os.stat(self.db_path)
+        fingerprint = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        if fingerprint != self._fingerprint:
+            with self._version_lock:
+                if fingerprint != self._fingerprint:
+                    digest = hashlib.sha256()
+                    with open(self.db_path, 'rb') as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                            digest.update(chunk)
+                    if self._fingerprint is not None:
+                        logger.info(f"{self.db_path} changed on disk, reopening connections")
+                        self._generation += 1
+                        self._drain()
+                        self._columns = {}
+                    self._version = digest.hexdigest()[:16]
+                    self._fingerprint = fingerprint
+        return self._version
+
+    def _connect(self) -> PooledConnection:
+        """Open and tune a new read-only connection"""
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False, factory=PooledConnection)
+        conn.generation = self._generation
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        # Dictionaries and SQL function for compressed JSON columns
+        install(conn)
+        logger.debug(f"Opened read-only connection to {self.db_path}")
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """Take an idle connection from the pool, opening one if none is free"""
+        if self._closed:
+            raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if conn.generation == self._generation:
+                return conn
+            # Released while the pool was being drained
+            conn.close()
+
+    def release(self, conn: PooledConnection) -> None:
+        """Return a connection to the pool
+
+        It is closed instead if the pool is closed or full, or if the file
+        changed since it was opened: being immutable, it would keep serving
+        the old content.
+        """
+        if self._closed or conn.generation != self._generation:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Borrow a connection for the duration of a ``with`` block
+
+        The connection goes back to the pool however the block exits, except
+        after an SQLite error, when it is closed instead.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except sqlite3.Error:
+            # Don't hand a connection in an unknown state to the next caller
+            broken = True
+            raise
+        finally:
+            if broken:
+                conn.close()
+            else:
+                self.release(conn)
+
+    def table_columns(self, table: str) -> FrozenSet[str]:
+        """Column names of a table, cached since the file is immutable
+
+        Args:
+            table: Table name
+
+        Returns:
+            Set of column names, empty if the table does not exist
+        """
+        columns = self._columns.get(table)
+        if columns is None:
+            with self.connection() as conn:
+                columns = frozenset(
+                    row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')
+                )
+            self._columns[table] = columns
+        return columns
+
+    def _drain(self) -> None:
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def close(self) -> None:
+        """Close every idle connection and refuse further use"""
+        self._closed = True
+        self._drain()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Get the process-wide pool for a database file, creating it on first use
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        The shared ConnectionPool for that file
+    """
+    key = str(Path(db_path).resolve())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(key)
+                _pools[key] = pool
+                logger.info(f"Created read-only connection pool for {key}")
+    return pool
+
+
+def close_all_pools() -> None:
+    """Close every pool, e.g. at worker shutdown or after a database rebuild"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
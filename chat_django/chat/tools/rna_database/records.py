@@ -0,0 +1,136 @@
+"""Field projection and row decoding for GtRNAdb gene records.
+
+Each species table row carries a handful of small scalar columns and several
+large JSON blobs (``overview``, ``variants``, ``expression_profiles``). Search
+results only select and decode the fields a caller asks for; the heavy blobs
+are left to ``get_sequence``, which loads a single record in full.
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from .blobs import blob_text
+
+logger = logging.getLogger(__name__)
+
+# Payload field name -> source column in the species tables
+FIELD_COLUMNS = {
+    "gene_symbol": "GtRNAdb_Gene_Symbol",
+    "anticodon": "Anticodon",
+    "isotype": "Isotype_from_Anticodon",
+    "general_score": "General_tRNA_Model_Score",
+    "isotype_score": "Isotype_Model_Score",
+    "model_agreement": "Anticodon_and_Isotype_Model_Agreement",
+    "features": "Features",
+    "locus": "Locus",
+    "sequences": "sequences",
+    "overview": "overview",
+    "images": "images",
+    "variants": "variants",
+    "expression_profiles": "expression_profiles",
+}
+
+# Fields stored as JSON text
+JSON_FIELDS = frozenset({"sequences", "overview", "images", "variants", "expression_profiles"})
+
+# Always returned, since they identify a record and are required to persist it
+CORE_FIELDS = (
+    "gene_symbol",
+    "anticodon",
+    "isotype",
+    "general_score",
+    "isotype_score",
+    "model_agreement",
+)
+
+# Default projection for search results
+SEARCH_FIELDS = CORE_FIELDS + ("features", "locus", "sequences", "overview", "images")
+
+# Everything, used when a single record is requested in full
+ALL_FIELDS = tuple(FIELD_COLUMNS)
+
+# Fields stored on the shared TRNARecord model
+MODEL_FIELDS = CORE_FIELDS + ("features", "locus", "sequences", "overview", "images")
+
+# Sortable source column -> payload field carrying the same value
+SORT_FIELDS = {
+    "GtRNAdb_Gene_Symbol": "gene_symbol",
+    "Locus": "locus",
+    "Anticodon": "anticodon",
+    "Isotype_from_Anticodon": "isotype",
+    "general_score": "general_score",
+    "isotype_score": "isotype_score",
+}
+
+
+def parse_fields(
+    value: Optional[Union[str, Iterable[str]]],
+    default: Tuple[str, ...] = SEARCH_FIELDS
+) -> Tuple[str, ...]:
+    """Normalize a requested field set
+
+    Args:
+        value: Comma-separated string or list of field names, or None for the default
+        default: Projection used when nothing is requested
+
+    Returns:
+        Requested fields plus the core fields, in canonical order
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not value:
+        requested = set(default)
+    else:
+        if isinstance(value, str):
+            value = value.split(",")
+        requested = {field.strip() for field in value if field.strip()}
+        if "all" in requested:
+            return ALL_FIELDS
+        unknown = requested - set(FIELD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.update(CORE_FIELDS)
+    return tuple(field for field in FIELD_COLUMNS if field in requested)
+
+
+def select_columns(fields: Iterable[str]) -> str:
+    """Build the SELECT column list for a projection"""
+    return ", ".join(f'"{FIELD_COLUMNS[field]}"' for field in fields)
+
+
+def _decode_json(field: str, raw: Optional[Union[str, bytes]], gene_symbol: str) -> Any:
+    # Compressed columns are decompressed transparently, see blobs.py
+    raw = blob_text(raw)
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        logger.warning(f"Failed to parse {field} JSON for {gene_symbol}")
+        return {}
+
+
+def decode_row(row: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    """Decode a projected SQLite row into a record payload
+
+    Args:
+        row: sqlite3.Row (or mapping) selected with select_columns(fields)
+        fields: The projection the row was selected with
+
+    Returns:
+        Dict keyed by payload field name
+    """
+    gene_symbol = row[FIELD_COLUMNS["gene_symbol"]]
+    record = {}
+    for field in fields:
+        raw = row[FIELD_COLUMNS[field]]
+        if field in JSON_FIELDS:
+            record[field] = _decode_json(field, raw, gene_symbol)
+        elif field in ("general_score", "isotype_score"):
+            record[field] = float(raw) if raw not in (None, "") else 0.0
+        elif field == "model_agreement":
+            record[field] = str(raw).lower() in ("true", "consistent")
+        else:
+            record[field] = raw if raw is not None else ""
+    return record
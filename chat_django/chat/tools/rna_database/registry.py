@@ -0,0 +1,111 @@
+"""Registry of the per-species GtRNAdb database files.
+
+Each species ships as its own SQLite file holding one table named after the
+species (``data/human_db.db`` holds ``human``), so new GtRNAdb genomes can be
+added by dropping in a file rather than rebuilding one monolithic database.
+Files are found by that naming convention, or listed explicitly in an
+optional ``data/species.json`` manifest:
+
+    {"mouse": {"file": "mm39.db", "display_name": "Mouse (Mus musculus)"}}
+
+Connection pools are only opened when a species is first queried.
+"""
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(os.getenv('RNA_DB_DATA_DIR', str(Path(__file__).parent / "data")))
+MANIFEST_NAME = "species.json"
+FILE_SUFFIX = "_db.db"
+
+# Display names for the genomes we know; others fall back to the species key
+DISPLAY_NAMES = {
+    "human": "Human (Homo sapiens)",
+    "yeast": "Yeast (Saccharomyces cerevisiae)",
+    "mouse": "Mouse (Mus musculus)",
+}
+
+
+class SpeciesRegistry:
+    """Maps species names to their database files and connection pools."""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        """Scan a data directory for species databases
+
+        Args:
+            data_dir: Directory holding the per-species files and optional manifest
+        """
+        self.data_dir = Path(data_dir)
+        self.files: Dict[str, Path] = {}
+        self.display_names: Dict[str, str] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-read the data directory, e.g. after installing a new genome"""
+        files, names = {}, {}
+        for path in sorted(self.data_dir.glob(f"*{FILE_SUFFIX}")):
+            files[path.name[:-len(FILE_SUFFIX)].lower()] = path
+
+        manifest = self.data_dir / MANIFEST_NAME
+        if manifest.exists():
+            for species, entry in json.loads(manifest.read_text()).items():
+                species = species.lower()
+                files[species] = self.data_dir / entry["file"]
+                if entry.get("display_name"):
+                    names[species] = entry["display_name"]
+
+        self.files = {species: path for species, path in files.items() if path.exists()}
+        self.display_names = {
+            species: names.get(species) or DISPLAY_NAMES.get(species) or species
+            for species in self.files
+        }
+        logger.info(f"Species databases available: {', '.join(self.species) or 'none'}")
+
+    @property
+    def species(self) -> List[str]:
+        """Species with an installed database, in sorted order"""
+        return sorted(self.files)
+
+    def __contains__(self, species: str) -> bool:
+        return species in self.files
+
+    def path(self, species: str) -> str:
+        """Database file of a species
+
+        Raises:
+            ValueError: If no database is installed for the species
+        """
+        if species not in self.files:
+            raise ValueError(
+                f"No database installed for species '{species}'. "
+                f"Available: {', '.join(self.species) or 'none'}"
+            )
+        return str(self.files[species])
+
+    def pool(self, species: str) -> ConnectionPool:
+        """Shared connection pool for a species, opened on first use"""
+        return get_pool(self.path(species))
+
+    def display_name(self, species: str) -> str:
+        return self.display_names.get(species, species)
+
+
+_registry: Optional[SpeciesRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SpeciesRegistry:
+    """Get the process-wide species registry, scanning the data directory on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SpeciesRegistry()
+    return _registry
@@ -0,0 +1,108 @@
+"""Uniform random sampling of filtered species table rows.
+
+``ORDER BY RANDOM()`` assigns a random key to every matching row and sorts
+them all to keep k. Instead, the sampler picks k rowids and fetches only those
+rows by primary key:
+
+* with no filters and a gap-free rowid range, k rowids are drawn straight from
+  the range, so the cost is O(k);
+* otherwise the matching rowids are collected (an index-only scan when the
+  filters are covered by an index) and k of them are sampled without sorting
+  the full rows.
+
+Passing a seed makes the sample reproducible for a given database file.
+"""
+import json
+import random
+import sqlite3
+from typing import Any, List, Optional, Sequence
+
+
+def sample_rowids(
+    conn: sqlite3.Connection,
+    table: str,
+    where: str,
+    params: Sequence[Any],
+    k: int,
+    seed: Optional[int] = None
+) -> List[int]:
+    """Pick k rowids uniformly at random among the rows matching a filter
+
+    Args:
+        conn: Open connection to the database
+        table: Species table to sample
+        where: SQL filter expression, "1=1" for the whole table
+        params: Parameters bound to the filter
+        k: Number of rows to sample
+        seed: Optional seed for a reproducible sample
+
+    Returns:
+        Sampled rowids, in sample order
+    """
+    rng = random.Random(seed)
+    if k <= 0:
+        return []
+
+    if where.strip() == "1=1" and not params:
+        low, high, count = conn.execute(
+            f"SELECT min(rowid), max(rowid), count(*) FROM {table}"
+        ).fetchone()
+        if not count:
+            return []
+        if high - low + 1 == count:
+            return rng.sample(range(low, high + 1), min(k, count))
+
+    # Sorted so the same seed gives the same sample whatever plan SQLite picks
+    rowids = sorted(row[0] for row in conn.execute(f"SELECT rowid FROM {table} WHERE {where}", params))
+    return rng.sample(rowids, min(k, len(rowids)))
+
+
+def fetch_by_rowid(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: str,
+    rowids: Sequence[int],
+    order_by: Optional[str] = None
+) -> List[sqlite3.Row]:
+    """Fetch rows by rowid
+
+    Args:
+        conn: Open connection to the database
+        table: Species table to read
+        columns: SELECT column list
+        rowids: Rowids to fetch
+        order_by: Optional ORDER BY expression; rows otherwise follow rowids
+
+    Returns:
+        The matching rows
+    """
+    # One JSON array parameter, whatever the number of rowids
+    sql = (
+        f"SELECT rowid AS sample_rowid, {columns} FROM {table} "
+        f"WHERE rowid IN (SELECT value FROM json_each(?))"
+    )
+    if order_by:
+        return conn.execute(f"{sql} ORDER BY {order_by}", [json.dumps(list(rowids))]).fetchall()
+    rows = conn.execute(sql, [json.dumps(list(rowids))]).fetchall()
+    position = {rowid: i for i, rowid in enumerate(rowids)}
+    return sorted(rows, key=lambda row: position[row["sample_rowid"]])
+
+
+def sample_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: str,
+    where: str,
+    params: Sequence[Any],
+    k: int,
+    seed: Optional[int] = None,
+    order_by: Optional[str] = None
+) -> List[sqlite3.Row]:
+    """Sample k matching rows, projected to the given column list
+
+    Runs on a pooled connection through QueryExecutor.run, so both steps
+    share one worker thread and timeout. Rows come back in sample order
+    unless order_by sorts the sample.
+    """
+    rowids = sample_rowids(conn, table, where, params, k, seed)
+    return fetch_by_rowid(conn, table, columns, rowids, order_by)
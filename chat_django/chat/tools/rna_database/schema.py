@@ -0,0 +1,446 @@
+"""Offline schema upgrades for the GtRNAdb SQLite files.
+
+The tool opens its databases immutable and read-only, so derived columns and
+indexes are added by running this module against a database file once, after
+it has been built or downloaded:
+
+    python -m chat.tools.rna_database.schema chat/tools/rna_database/data/human_db.db
+
+Every step is idempotent, and the search code falls back to the original
+TEXT columns when a file has not been upgraded yet.
+"""
+import re
+import json
+import argparse
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .aggregates import statistics_table, table_statistics
+from .blobs import blob_text, install
+
+logger = logging.getLogger(__name__)
+
+# Typed shadow columns for the TEXT score columns shipped by GtRNAdb
+SCORE_COLUMNS = {
+    "general_score": "General_tRNA_Model_Score",
+    "isotype_score": "Isotype_Model_Score",
+}
+
+
+# Full-text index over identifiers, isotype and flattened overview text.
+# Column weights feed bm25(): identifier hits outrank overview mentions.
+FTS_SUFFIX = "_fts"
+FTS_COLUMNS = ("gene_symbol", "hgnc_symbol", "rnacentral_id", "isotype", "overview_text")
+FTS_WEIGHTS = (10.0, 8.0, 8.0, 5.0, 1.0)
+# search_term keeps to identifiers and isotype, as its LIKE fallback does
+FTS_IDENTIFIER_COLUMNS = FTS_COLUMNS[:4]
+
+
+def fts_table(table: str) -> str:
+    """Name of the full-text index table for a species table"""
+    return f"{table}{FTS_SUFFIX}"
+
+
+def fts_match_expression(text: str, columns: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """Turn free text into a safe FTS5 MATCH expression
+
+    Each whitespace-separated term becomes a quoted phrase of its word tokens
+    with prefix matching on the last token, and terms are ANDed, so
+    "tRNA-Asn-GTT m1A" matches genes whose symbol starts with tRNA-Asn-GTT and
+    that mention m1A. FTS5 operators in user input are never interpreted.
+
+    Args:
+        text: Free-text query
+        columns: Restrict matching to these FTS_COLUMNS, or None for all
+
+    Returns:
+        MATCH expression, or None if the text has no searchable tokens
+    """
+    phrases = []
+    for term in text.split():
+        tokens = re.findall(r"\w+", term)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"*')
+    if not phrases:
+        return None
+    expression = " ".join(phrases)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+
+def _flatten_overview(raw: Optional[str]) -> str:
+    """Join the overview values worth searching, skipping links"""
+    try:
+        raw = blob_text(raw)
+        overview = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return ""
+    return " ".join(
+        str(value) for value in overview.values()
+        if value and not str(value).startswith("http")
+    )
+
+
+# Inverted index from Modomics modification to gene rows. "m1A58" is stored as
+# modification "m1A" at position "58"; variable-arm and inserted positions keep
+# their suffixes ("e12", "20a").
+MODOMICS_KEY = "Known Modifications (Modomics)"
+MODIFICATION_SUFFIX = "_modifications"
+_MODIFICATION_TOKEN = re.compile(r"^(?P<code>.+?)(?P<position>e?\d+[a-z]?)$")
+
+
+def modification_table(table: str) -> str:
+    """Name of the modification index table for a species table"""
+    return f"{table}{MODIFICATION_SUFFIX}"
+
+
+def parse_modification(token: str) -> Tuple[str, Optional[str]]:
+    """Split a Modomics token into modification code and tRNA position
+
+    Args:
+        token: e.g. "m1A58", "D20a", "Ψe12" or a bare code such as "m1A"
+
+    Returns:
+        (code, position), with position None for a bare code
+    """
+    match = _MODIFICATION_TOKEN.match(token)
+    if not match:
+        return token, None
+    return match.group("code"), match.group("position")
+
+
+# Genomic interval index over the Locus column. Loci such as
+# "chr10:22518438-22518511 (-)" are parsed into chrom/start/end/strand and
+# stored in an integer R*Tree with the chromosome as a degenerate dimension.
+LOCUS_SUFFIX = "_loci"
+CHROMOSOME_SUFFIX = "_chromosomes"
+_LOCUS = re.compile(r"^\s*(?P<chrom>[^:\s]+):(?P<start>\d+)-(?P<end>\d+)\s*(?:\((?P<strand>[+-])\))?")
+
+
+def locus_table(table: str) -> str:
+    """Name of the R*Tree locus index for a species table"""
+    return f"{table}{LOCUS_SUFFIX}"
+
+
+def chromosome_table(table: str) -> str:
+    """Name of the chromosome -> R*Tree dimension id table for a species table"""
+    return f"{table}{CHROMOSOME_SUFFIX}"
+
+
+def parse_locus(locus: Optional[str]) -> Optional[Tuple[str, int, int, str]]:
+    """Parse a GtRNAdb locus string
+
+    Args:
+        locus: e.g. "chr10:22518438-22518511 (-)"
+
+    Returns:
+        (chrom, start, end, strand), or None if the locus is malformed
+    """
+    match = _LOCUS.match(locus or "")
+    if not match:
+        return None
+    start, end = int(match.group("start")), int(match.group("end"))
+    return match.group("chrom"), min(start, end), max(start, end), match.group("strand") or "."
+
+
+# Normalized variant index over the variants JSON column: one row per dbSNP
+# entry, e.g. {"tRNA Position": "34 (Anticodon Loop)", "Genomic Position":
+# "chr6:28864000", "dbSNP ID": "rs560955489", "Ref/Alt Allele": "T / C", ...}
+VARIANT_SUFFIX = "_variants"
+_TRNA_POSITION = re.compile(r"^\s*(?P<position>[^\s(]*)\s*(?:\((?P<region>[^)]*)\))?\s*$")
+_GENOMIC_POSITION = re.compile(r"^\s*(?P<chrom>[^:\s]+):(?P<position>\d+)\s*$")
+_STANDARD_POSITION = re.compile(r"^(?P<number>\d+)[a-z]?$")
+VARIANT_COLUMNS = (
+    "rsid", "chrom", "position", "trna_position", "trna_number", "region",
+    "ref", "alt", "effect", "common", "thousand_genomes",
+)
+
+
+def variant_table(table: str) -> str:
+    """Name of the variant index table for a species table"""
+    return f"{table}{VARIANT_SUFFIX}"
+
+
+def normalize_region(region: Optional[str]) -> str:
+    """Canonical form of a tRNA structural region, e.g. "5′ Acceptor Stem" -> "5' acceptor stem" """
+    return " ".join((region or "").replace("\u2032", "'").lower().split())
+
+
+def parse_variant(entry: Any) -> Optional[Dict[str, Any]]:
+    """Normalize one entry of the variants JSON list
+
+    Args:
+        entry: Variant dict as scraped from GtRNAdb
+
+    Returns:
+        Dict keyed by VARIANT_COLUMNS, None if the entry is not a variant
+        dict. trna_number is the numeric part of a standard tRNA position
+        such as "20a", None for intron ("37:i7") or extension positions.
+    """
+    if not isinstance(entry, dict):
+        return None
+    trna = _TRNA_POSITION.match(entry.get("tRNA Position") or "")
+    trna_position = trna.group("position") if trna else ""
+    genomic = _GENOMIC_POSITION.match(entry.get("Genomic Position") or "")
+    ref, _, alt = (entry.get("Ref/Alt Allele") or "").partition("/")
+    standard = _STANDARD_POSITION.match(trna_position)
+    return {
+        "rsid": (entry.get("dbSNP ID") or "").strip().lower(),
+        "chrom": genomic.group("chrom") if genomic else None,
+        "position": int(genomic.group("position")) if genomic else None,
+        "trna_position": trna_position,
+        "trna_number": int(standard.group("number")) if standard else None,
+        "region": normalize_region(trna.group("region") if trna else ""),
+        "ref": ref.strip(),
+        "alt": alt.strip(),
+        "effect": (entry.get("Effect") or "").strip(),
+        # Scraped as "<common><in 1000 Genomes><effect>", e.g. "NoYesGU base pair"
+        "common": (entry.get("Common SNP") or "").startswith("Yes"),
+        "thousand_genomes": (entry.get("1K Genome") or "").startswith("Yes"),
+    }
+
+
+def species_tables(conn: sqlite3.Connection) -> List[str]:
+    """List the per-species gene tables in a database
+
+    Args:
+        conn: Open connection to the database
+
+    Returns:
+        Names of tables holding GtRNAdb gene rows
+    """
+    tables = []
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ):
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')}
+        if "GtRNAdb_Gene_Symbol" in columns:
+            tables.append(name)
+    return tables
+
+
+def add_score_columns(conn: sqlite3.Connection, table: str) -> None:
+    """Add REAL score columns and the indexes that serve score filters and sorts
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to upgrade
+    """
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    for typed, source in SCORE_COLUMNS.items():
+        if typed not in columns:
+            conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {typed} REAL')
+        conn.execute(f'UPDATE "{table}" SET {typed} = CAST("{source}" AS REAL)')
+
+    for typed in SCORE_COLUMNS:
+        # Isotype/anticodon equality filters followed by a score range or sort
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table}_iso_ac_{typed}" '
+            f'ON "{table}" (Isotype_from_Anticodon, Anticodon, {typed})'
+        )
+        # Score range or sort with no isotype filter
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table}_{typed}" ON "{table}" ({typed})'
+        )
+    logger.info(f"Added typed score columns and indexes to {table}")
+
+
+def build_fts_index(conn: sqlite3.Connection, table: str) -> None:
+    """(Re)build the FTS5 index for a species table, keyed by the table rowid
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to index
+    """
+    fts = fts_table(table)
+    conn.execute(f'DROP TABLE IF EXISTS "{fts}"')
+    conn.execute(
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5({", ".join(FTS_COLUMNS)}, tokenize = "unicode61")'
+    )
+    rows = []
+    for rowid, gene_symbol, isotype, overview in conn.execute(
+        f'SELECT rowid, GtRNAdb_Gene_Symbol, Isotype_from_Anticodon, overview FROM "{table}"'
+    ):
+        try:
+            parsed = json.loads(blob_text(overview) or "{}")
+        except json.JSONDecodeError:
+            parsed = {}
+        rows.append((
+            rowid,
+            gene_symbol,
+            parsed.get("HGNC Symbol", ""),
+            parsed.get("RNAcentral ID", ""),
+            isotype,
+            _flatten_overview(overview),
+        ))
+    conn.executemany(
+        f'INSERT INTO "{fts}" (rowid, {", ".join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    conn.execute(f"INSERT INTO \"{fts}\" (\"{fts}\") VALUES ('optimize')")
+    logger.info(f"Built full-text index {fts} over {len(rows)} rows")
+
+
+def build_modification_index(conn: sqlite3.Connection, table: str) -> None:
+    """(Re)build the modification -> gene row index for a species table
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to index
+    """
+    index = modification_table(table)
+    conn.execute(f'DROP TABLE IF EXISTS "{index}"')
+    conn.execute(
+        f'CREATE TABLE "{index}" ('
+        f'modification TEXT NOT NULL, position TEXT NOT NULL, gene_rowid INTEGER NOT NULL, '
+        f'PRIMARY KEY (modification, position, gene_rowid)) WITHOUT ROWID'
+    )
+    rows = set()
+    for rowid, overview in conn.execute(f'SELECT rowid, overview FROM "{table}"'):
+        try:
+            modifications = json.loads(blob_text(overview) or "{}").get(MODOMICS_KEY)
+        except (json.JSONDecodeError, AttributeError):
+            continue
+        for token in (modifications or "").split():
+            code, position = parse_modification(token)
+            rows.add((code, position or "", rowid))
+    conn.executemany(f'INSERT INTO "{index}" VALUES (?, ?, ?)', sorted(rows))
+    logger.info(f"Built modification index {index} with {len(rows)} entries")
+
+
+def build_locus_index(conn: sqlite3.Connection, table: str) -> None:
+    """(Re)build the R*Tree interval index over the Locus column of a species table
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to index
+    """
+    loci, chromosomes = locus_table(table), chromosome_table(table)
+    conn.execute(f'DROP TABLE IF EXISTS "{loci}"')
+    conn.execute(f'DROP TABLE IF EXISTS "{chromosomes}"')
+    conn.execute(
+        f'CREATE VIRTUAL TABLE "{loci}" USING rtree_i32('
+        f'id, chrom_min, chrom_max, gene_start, gene_end, +chrom TEXT, +strand TEXT)'
+    )
+    conn.execute(
+        f'CREATE TABLE "{chromosomes}" (name TEXT PRIMARY KEY, id INTEGER NOT NULL UNIQUE)'
+    )
+    parsed = []
+    for rowid, locus in conn.execute(f'SELECT rowid, Locus FROM "{table}"'):
+        interval = parse_locus(locus)
+        if interval is None:
+            logger.warning(f"Skipping unparseable locus {locus!r} in {table}")
+            continue
+        parsed.append((rowid, *interval))
+    chrom_ids = {name: i for i, name in enumerate(sorted({row[1] for row in parsed}))}
+    conn.executemany(f'INSERT INTO "{chromosomes}" VALUES (?, ?)', chrom_ids.items())
+    conn.executemany(
+        f'INSERT INTO "{loci}" VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [
+            (rowid, chrom_ids[chrom], chrom_ids[chrom], start, end, chrom, strand)
+            for rowid, chrom, start, end, strand in parsed
+        ]
+    )
+    logger.info(f"Built locus index {loci} over {len(parsed)} rows")
+
+
+def build_variant_index(conn: sqlite3.Connection, table: str) -> None:
+    """(Re)build the normalized variant table of a species table
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to index
+    """
+    index = variant_table(table)
+    conn.execute(f'DROP TABLE IF EXISTS "{index}"')
+    conn.execute(
+        f'CREATE TABLE "{index}" ('
+        f'gene_rowid INTEGER NOT NULL, rsid TEXT NOT NULL, chrom TEXT, position INTEGER, '
+        f'trna_position TEXT NOT NULL, trna_number INTEGER, region TEXT NOT NULL, '
+        f'ref TEXT NOT NULL, alt TEXT NOT NULL, effect TEXT NOT NULL COLLATE NOCASE, '
+        f'common INTEGER NOT NULL, thousand_genomes INTEGER NOT NULL)'
+    )
+    rows = []
+    for rowid, variants in conn.execute(f'SELECT rowid, variants FROM "{table}"'):
+        try:
+            entries = json.loads(blob_text(variants) or "[]")
+        except json.JSONDecodeError:
+            continue
+        for entry in entries if isinstance(entries, list) else []:
+            variant = parse_variant(entry)
+            if variant is not None:
+                rows.append((rowid, *(variant[column] for column in VARIANT_COLUMNS)))
+    conn.executemany(
+        f'INSERT INTO "{index}" (gene_rowid, {", ".join(VARIANT_COLUMNS)}) '
+        f'VALUES (?{", ?" * len(VARIANT_COLUMNS)})',
+        rows
+    )
+    # rsID lookups, genomic ranges, region/position and effect filters
+    conn.execute(f'CREATE INDEX "idx_{index}_rsid" ON "{index}" (rsid)')
+    conn.execute(f'CREATE INDEX "idx_{index}_position" ON "{index}" (chrom, position)')
+    conn.execute(f'CREATE INDEX "idx_{index}_region" ON "{index}" (region, trna_number)')
+    conn.execute(f'CREATE INDEX "idx_{index}_trna_number" ON "{index}" (trna_number)')
+    conn.execute(f'CREATE INDEX "idx_{index}_effect" ON "{index}" (effect)')
+    conn.execute(f'CREATE INDEX "idx_{index}_gene" ON "{index}" (gene_rowid)')
+    logger.info(f"Built variant index {index} with {len(rows)} variants")
+
+
+def build_statistics(conn: sqlite3.Connection, table: str) -> None:
+    """(Re)build the precomputed statistics of a species table, see aggregates.py
+
+    Args:
+        conn: Writable connection to the database
+        table: Species table to summarize
+    """
+    stats = statistics_table(table)
+    conn.execute(f'DROP TABLE IF EXISTS "{stats}"')
+    conn.execute(f'CREATE TABLE "{stats}" (section TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID')
+    document = table_statistics(conn, table)
+    conn.executemany(
+        f'INSERT INTO "{stats}" VALUES (?, ?)',
+        [(section, json.dumps(value, ensure_ascii=False)) for section, value in document.items()]
+    )
+    logger.info(f"Built statistics table {stats} over {document['total']} rows")
+
+
+def upgrade_database(db_path: str) -> None:
+    """Apply every schema upgrade step to a database file in place
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"Database not found at {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    install(conn)
+    try:
+        with conn:
+            for table in species_tables(conn):
+                add_score_columns(conn, table)
+                build_fts_index(conn, table)
+                build_modification_index(conn, table)
+                build_locus_index(conn, table)
+                build_variant_index(conn, table)
+                build_statistics(conn, table)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    logger.info(f"Upgraded {db_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade GtRNAdb SQLite files in place")
+    parser.add_argument("databases", nargs="+", help="Database files to upgrade")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for db_path in args.databases:
+        upgrade_database(db_path)
+
+
+if __name__ == "__main__":
+    main()
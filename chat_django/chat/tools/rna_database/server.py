@@ -1,17 +1,22 @@
 """RNA Database MCP Server Implementation"""
-from pathlib import Path
 import sqlite3
-import json
 import logging
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
 from mcp.server import Server
 from mcp.server.fastmcp import FastMCP
-from django.apps import apps
+
+from .blobs import install
+from .persistence import SequenceWriter
+from .records import MODEL_FIELDS, decode_row
+from .registry import get_registry
 
 logger = logging.getLogger(__name__)
 
+# Fields of each search_rna result; get_sequence returns the full record
+SEARCH_RESULT_FIELDS = ("gene_symbol", "anticodon", "isotype", "general_score", "sequences", "images")
+
 class ErrorCode(Enum):
     """Standard error codes for RNA Database MCP Server"""
     DATABASE_NOT_FOUND = "DATABASE_NOT_FOUND"
@@ -19,27 +24,20 @@ class ErrorCode(Enum):
     INVALID_QUERY = "INVALID_QUERY"
     SEQUENCE_NOT_FOUND = "SEQUENCE_NOT_FOUND"
 
-def get_sequence_model():
-    """Get the Sequence model, falling back to mock for standalone testing"""
-    try:
-        return apps.get_model('chat', 'Sequence')
-    except Exception:
-        from .test_standalone import MockModel
-        return MockModel
-
 class RNADatabaseServer:
     """MCP-compliant RNA database server"""
     
     def __init__(self):
         self.app = FastMCP("rna-database")
-        self.db_path = str(Path(__file__).parent / "data/human_yeast_mouse.db")
+        self.registry = get_registry()
+        self.writer = SequenceWriter()
         self._init_database()
         self._register_tools()
 
     def _init_database(self):
         """Initialize and verify database"""
-        if not Path(self.db_path).exists():
-            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        if not self.registry.species:
+            raise FileNotFoundError(f"No species databases found in {self.registry.data_dir}")
 
     def _register_tools(self):
         """Register available tools with the MCP server"""
@@ -111,7 +109,7 @@ class RNADatabaseServer:
             
             # JSON field search
             if json_field and json_value:
-                sql += " AND json_extract(overview, ?) LIKE ?"
+                sql += " AND json_extract(blob_text(overview), ?) LIKE ?"
                 params.append(f"$.{json_field}")
                 params.append(f"%{json_value}%")
             
@@ -133,47 +131,27 @@ class RNADatabaseServer:
                 params.append(int(limit))
 
             # Execute query
-            sequences = []
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with sqlite3.connect(self.registry.path(species)) as conn:
                     conn.row_factory = sqlite3.Row
+                    install(conn)
                     cursor = conn.cursor()
                     cursor.execute(sql, params)
                     rows = cursor.fetchall()
 
-                    # Process results
-                    for row in rows:
-                        row_dict = dict(row)
-                        
-                        # Store in database if context provided
-                        if context:
-                            Sequence = get_sequence_model()
-                            sequence = await Sequence.objects.acreate(
-                                user_id=context.get('user_id'),
-                                chat_id=context.get('chat_id'),
-                                message_id=context.get('message_id'),
-                                gene_symbol=row_dict['GtRNAdb_Gene_Symbol'],
-                                anticodon=row_dict['Anticodon'],
-                                isotype=row_dict['Isotype_from_Anticodon'],
-                                general_score=float(row_dict['General_tRNA_Model_Score']),
-                                isotype_score=float(row_dict['Isotype_Model_Score']),
-                                model_agreement=str(row_dict['Anticodon_and_Isotype_Model_Agreement']).lower() == 'true',
-                                features=row_dict.get('Features', ''),
-                                locus=row_dict.get('Locus', ''),
-                                sequences=json.loads(row_dict.get('sequences', '{}')),
-                                overview=json.loads(row_dict.get('overview', '{}')),
-                                images=json.loads(row_dict.get('images', '{}'))
-                            )
-                        
-                        # Format sequence data
-                        sequences.append({
-                            'gene_symbol': row_dict['GtRNAdb_Gene_Symbol'],
-                            'anticodon': row_dict['Anticodon'],
-                            'isotype': row_dict['Isotype_from_Anticodon'],
-                            'general_score': float(row_dict['General_tRNA_Model_Score']),
-                            'sequences': json.loads(row_dict.get('sequences', '{}')),
-                            'images': json.loads(row_dict.get('images', '{}'))
-                        })
+                    records = [decode_row(row, MODEL_FIELDS) for row in rows]
+
+                    # Store in database if context provided
+                    if context:
+                        await self.writer.write(
+                            records, context, species, self.registry.pool(species).version
+                        )
+
+                    # Format sequence data
+                    sequences = [
+                        {field: record[field] for field in SEARCH_RESULT_FIELDS}
+                        for record in records
+                    ]
 
                 return sequences
 
@@ -189,8 +167,9 @@ class RNADatabaseServer:
         ) -> Dict[str, Any]:
             """Get detailed information for a specific sequence."""
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with sqlite3.connect(self.registry.path(species)) as conn:
                     conn.row_factory = sqlite3.Row
+                    install(conn)
                     cursor = conn.cursor()
                     cursor.execute(
                         f"SELECT * FROM {species} WHERE GtRNAdb_Gene_Symbol = ?",
@@ -201,42 +180,16 @@ class RNADatabaseServer:
                     if not row:
                         raise ValueError(f"No sequence found with gene symbol: {gene_symbol}")
 
-                    row_dict = dict(row)
-                    
+                    record = decode_row(row, MODEL_FIELDS)
+
                     # Store in database if context provided
                     if context:
-                        Sequence = get_sequence_model()
-                        sequence = await Sequence.objects.acreate(
-                            user_id=context.get('user_id'),
-                            chat_id=context.get('chat_id'),
-                            message_id=context.get('message_id'),
-                            gene_symbol=row_dict['GtRNAdb_Gene_Symbol'],
-                            anticodon=row_dict['Anticodon'],
-                            isotype=row_dict['Isotype_from_Anticodon'],
-                            general_score=float(row_dict['General_tRNA_Model_Score']),
-                            isotype_score=float(row_dict['Isotype_Model_Score']),
-                            model_agreement=str(row_dict['Anticodon_and_Isotype_Model_Agreement']).lower() == 'true',
-                            features=row_dict.get('Features', ''),
-                            locus=row_dict.get('Locus', ''),
-                            sequences=json.loads(row_dict.get('sequences', '{}')),
-                            overview=json.loads(row_dict.get('overview', '{}')),
-                            images=json.loads(row_dict.get('images', '{}'))
+                        await self.writer.write(
+                            [record], context, species, self.registry.pool(species).version
                         )
 
-                    # Return formatted sequence data
-                    return {
-                        'gene_symbol': row_dict['GtRNAdb_Gene_Symbol'],
-                        'anticodon': row_dict['Anticodon'],
-                        'isotype': row_dict['Isotype_from_Anticodon'],
-                        'general_score': float(row_dict['General_tRNA_Model_Score']),
-                        'isotype_score': float(row_dict['Isotype_Model_Score']),
-                        'model_agreement': str(row_dict['Anticodon_and_Isotype_Model_Agreement']).lower() == 'true',
-                        'features': row_dict.get('Features', ''),
-                        'locus': row_dict.get('Locus', ''),
-                        'sequences': json.loads(row_dict.get('sequences', '{}')),
-                        'overview': json.loads(row_dict.get('overview', '{}')),
-                        'images': json.loads(row_dict.get('images', '{}'))
-                    }
+                    # Return the stored record, so both agree on every field
+                    return record
 
             except Exception as e:
                 logger.error(f"Database error in get_sequence: {e}")
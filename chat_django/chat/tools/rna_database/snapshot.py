@@ -0,0 +1,293 @@
+"""In-memory columnar snapshots of the GtRNAdb species tables.
+
+The species tables are small (hundreds to a few thousand rows) and immutable,
+so each one can be loaded once into memory: scores as NumPy float arrays,
+isotype and anticodon as interned categorical codes, every record
+pre-decoded from its JSON columns and its secondary structure parsed.
+Identity, modification and score filters, sorts, limits, seeded samples and
+facet counts are then evaluated as vectorized masks without touching SQLite
+or ``json.loads``.
+
+Snapshots are keyed by database file, content hash and species, so a rebuilt
+file gets a fresh snapshot. Requests the snapshot cannot answer (full-text
+search, arbitrary overview keys) keep using SQLite, as does everything when
+NumPy is not installed or ``RNA_DB_SNAPSHOT=0``.
+"""
+import os
+import sys
+import random
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .aggregates import FacetGroup
+from .pagination import Position
+from .records import ALL_FIELDS, SORT_FIELDS, decode_row, select_columns
+from .schema import MODOMICS_KEY, parse_modification
+from .structure import Structure, record_structure
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ENABLED = np is not None and os.getenv('RNA_DB_SNAPSHOT', '1') != '0'
+
+# Sortable source columns that are not part of the record payload
+_EXTRA_COLUMNS = ("tRNAscan_SE_ID", "Best_Isotype_Model")
+
+
+class _Categorical:
+    """Interned string column stored as integer codes"""
+
+    def __init__(self, values: Sequence[str]):
+        self.categories: Dict[str, int] = {}
+        codes = [self.categories.setdefault(sys.intern(value), len(self.categories)) for value in values]
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+    def equals(self, value: str) -> "np.ndarray":
+        code = self.categories.get(value)
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+
+class SpeciesSnapshot:
+    """Columnar, pre-decoded copy of one species table."""
+
+    def __init__(self, species: str, rows: List[sqlite3.Row]):
+        """Build the snapshot from rows selected by load_snapshot
+
+        Args:
+            species: Species table name
+            rows: Every row of the table in rowid order, with all record
+                fields, the extra sortable columns and the rowid
+        """
+        self.species = species
+        self.rowids = np.asarray([row["snapshot_rowid"] for row in rows], dtype=np.int64)
+        self.position = {rowid: i for i, rowid in enumerate(self.rowids.tolist())}
+        self.records = [decode_row(row, ALL_FIELDS) for row in rows]
+        for record in self.records:
+            record["isotype"] = sys.intern(record["isotype"])
+            record["anticodon"] = sys.intern(record["anticodon"])
+        self.by_symbol = {record["gene_symbol"]: i for i, record in enumerate(self.records)}
+        # Parsed secondary structure of each gene, None when missing or malformed
+        self.structures: List[Optional[Structure]] = [record_structure(record) for record in self.records]
+
+        self.isotype = _Categorical([record["isotype"] for record in self.records])
+        self.anticodon = _Categorical([record["anticodon"] for record in self.records])
+        self.scores = {
+            field: np.asarray([record[field] for record in self.records], dtype=np.float64)
+            for field in ("general_score", "isotype_score")
+        }
+        self.sort_keys: Dict[str, "np.ndarray"] = {
+            column: np.asarray([record[field] for record in self.records], dtype=object)
+            for column, field in SORT_FIELDS.items()
+            if field not in self.scores
+        }
+        self.sort_keys.update(self.scores)
+        for column in _EXTRA_COLUMNS:
+            self.sort_keys[column] = np.asarray([row[column] or "" for row in rows], dtype=object)
+
+        # Modification code, and (code, position), -> row indices
+        postings: Dict[Any, List[int]] = {}
+        for i, record in enumerate(self.records):
+            overview = record.get("overview")
+            tokens = (overview.get(MODOMICS_KEY) if isinstance(overview, dict) else None) or ""
+            for token in set(tokens.split()):
+                code, position = parse_modification(token)
+                postings.setdefault(code, []).append(i)
+                postings.setdefault((code, position), []).append(i)
+        self.modifications = {key: np.unique(indices) for key, indices in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _modification_mask(self, modification: str) -> "np.ndarray":
+        code, position = parse_modification(modification)
+        mask = np.zeros(len(self), dtype=bool)
+        indices = self.modifications.get(code if position is None else (code, position))
+        if indices is not None:
+            mask[indices] = True
+        return mask
+
+    def _order(self, indices: "np.ndarray", sort_column: str, descending: bool) -> "np.ndarray":
+        order = np.argsort(self.sort_keys[sort_column][indices], kind="stable")
+        return indices[order[::-1] if descending else order]
+
+    def can_sort(self, sort_column: Optional[str]) -> bool:
+        return sort_column is None or sort_column in self.sort_keys
+
+    def match(
+        self,
+        *,
+        isotype: Optional[str] = None,
+        anticodon: Optional[str] = None,
+        modifications: Sequence[str] = (),
+        modification_mode: str = "any",
+        filter_logic: str = "and",
+        score_bounds: Sequence[Tuple[str, str, float]] = ()
+    ) -> "np.ndarray":
+        """Boolean mask of the rows matching the filters of a search
+
+        Mirrors the WHERE clause built by RNADatabaseMCP._search_species.
+
+        Args:
+            isotype: Isotype_from_Anticodon to match
+            anticodon: Anticodon to match
+            modifications: Modomics codes or tokens to match
+            modification_mode: "any" or "all" of the modifications
+            filter_logic: "and" or "or" across isotype, anticodon and modifications
+            score_bounds: (field, ">=" or "<=", value) triples
+        """
+        identity = []
+        if isotype is not None:
+            identity.append(self.isotype.equals(isotype))
+        if anticodon is not None:
+            identity.append(self.anticodon.equals(anticodon))
+        if modifications:
+            masks = [self._modification_mask(m) for m in modifications]
+            identity.append(np.logical_and.reduce(masks) if modification_mode == "all" else np.logical_or.reduce(masks))
+
+        mask = np.ones(len(self), dtype=bool)
+        if identity:
+            mask &= np.logical_or.reduce(identity) if filter_logic == "or" else np.logical_and.reduce(identity)
+        for field, op, value in score_bounds:
+            mask &= self.scores[field] >= value if op == ">=" else self.scores[field] <= value
+        return mask
+
+    def _after(self, mask: "np.ndarray", sort_column: Optional[str], descending: bool,
+               position: Position) -> "np.ndarray":
+        """Restrict a mask to the rows following position, see pagination.keyset_clause"""
+        if sort_column is None:
+            return mask & (self.rowids > position.rowid)
+        keys = self.sort_keys[sort_column]
+        if descending:
+            later = (keys < position.key) | ((keys == position.key) & (self.rowids < position.rowid))
+        else:
+            later = (keys > position.key) | ((keys == position.key) & (self.rowids > position.rowid))
+        return mask & later.astype(bool)
+
+    def select_indices(
+        self,
+        mask: "np.ndarray",
+        *,
+        sort_column: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 10,
+        sample: bool = False,
+        seed: Optional[int] = None,
+        after: Optional[Position] = None
+    ) -> "np.ndarray":
+        """Sort, limit or sample the rows of a match mask
+
+        Uses the rowid sampling of sampling.py, so a seed picks the same genes
+        here as in SQLite. Ties in the sort column are ordered by rowid, in
+        the sort direction, as in the SQL of a paginated search.
+
+        Args:
+            mask: Rows to choose from, see match
+            sort_column: Resolved sort column, see can_sort
+            descending: Sort descending
+            limit: Maximum number of records
+            sample: Sample randomly among the matches instead of taking the first
+            seed: Seed for a reproducible sample
+            after: Start after this position of a previous page; not with sample
+
+        Returns:
+            Row indices into records
+        """
+        if after is not None:
+            mask = self._after(mask, sort_column, descending, after)
+        indices = np.flatnonzero(mask)
+        if sample:
+            rowids = self.rowids[indices].tolist()
+            chosen = random.Random(seed).sample(rowids, min(max(limit, 0), len(rowids)))
+            indices = np.asarray([self.position[rowid] for rowid in chosen], dtype=np.int64)
+            if sort_column:
+                indices = self._order(indices, sort_column, descending)
+        else:
+            if sort_column:
+                indices = self._order(indices, sort_column, descending)
+            indices = indices[:max(limit, 0)]
+        return indices
+
+    def select(self, mask: "np.ndarray", **options: Any) -> List[Dict[str, Any]]:
+        """Full decoded records chosen by select_indices; callers project them to the requested fields"""
+        return [self.records[i] for i in self.select_indices(mask, **options).tolist()]
+
+    def page_position(self, index: int, sort_column: Optional[str]) -> Position:
+        """Pagination position of a row, see pagination.Position"""
+        key = self.sort_keys[sort_column][index] if sort_column else None
+        return Position(key.item() if hasattr(key, "item") else key, int(self.rowids[index]))
+
+    def search(self, *, sort_column: Optional[str] = None, descending: bool = False, limit: int = 10,
+               sample: bool = False, seed: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """Evaluate a search against the snapshot: match, then select"""
+        return self.select(
+            self.match(**filters),
+            sort_column=sort_column, descending=descending, limit=limit, sample=sample, seed=seed
+        )
+
+    def facet_groups(self, mask: "np.ndarray") -> List[FacetGroup]:
+        """FacetGroup tuples of the rows of a match mask, see aggregates.summarize_facets"""
+        indices = np.flatnonzero(mask)
+        if not len(indices):
+            return []
+        width = len(self.anticodon.categories)
+        keys = self.isotype.codes[indices].astype(np.int64) * width + self.anticodon.codes[indices]
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        ranges = []
+        for field in ("general_score", "isotype_score"):
+            values = self.scores[field][indices]
+            lows = np.full(len(unique), np.inf)
+            highs = np.full(len(unique), -np.inf)
+            np.minimum.at(lows, inverse, values)
+            np.maximum.at(highs, inverse, values)
+            ranges.append((lows.tolist(), highs.tolist(), np.bincount(inverse, weights=values).tolist()))
+        # Category codes are assigned in insertion order
+        isotypes, anticodons = list(self.isotype.categories), list(self.anticodon.categories)
+        (general_low, general_high, general_sum), (isotype_low, isotype_high, isotype_sum) = ranges
+        return [
+            (isotypes[key // width], anticodons[key % width], count,
+             general_low[j], general_high[j], general_sum[j], isotype_low[j], isotype_high[j], isotype_sum[j])
+            for j, (key, count) in enumerate(zip(unique.tolist(), counts.tolist()))
+        ]
+
+    def lookup(self, gene_symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        """Full records for the given gene symbols, skipping unknown ones"""
+        return [self.records[self.by_symbol[s]] for s in gene_symbols if s in self.by_symbol]
+
+
+def load_snapshot(conn: sqlite3.Connection, species: str) -> SpeciesSnapshot:
+    """Read a whole species table into a snapshot
+
+    Runs on a pooled connection through QueryExecutor.run.
+    """
+    rows = conn.execute(
+        f"SELECT rowid AS snapshot_rowid, {select_columns(ALL_FIELDS)}, "
+        f"{', '.join(_EXTRA_COLUMNS)} FROM {species} ORDER BY rowid"
+    ).fetchall()
+    snapshot = SpeciesSnapshot(species, rows)
+    logger.info(f"Loaded {len(snapshot)} {species} records into an in-memory snapshot")
+    return snapshot
+
+
+_snapshots: Dict[Tuple[str, str, str], SpeciesSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def cached_snapshot(db_path: str, version: str, species: str) -> Optional[SpeciesSnapshot]:
+    """The loaded snapshot for a database version and species, if any"""
+    return _snapshots.get((db_path, version, species))
+
+
+def store_snapshot(db_path: str, version: str, snapshot: SpeciesSnapshot) -> None:
+    """Keep a snapshot, dropping snapshots of older versions of the same file"""
+    with _snapshots_lock:
+        for key in [key for key in _snapshots if key[0] == db_path and key[1] != version]:
+            del _snapshots[key]
+        _snapshots[(db_path, version, snapshot.species)] = snapshot
@@ -0,0 +1,341 @@
+"""Parsed secondary structures.
+
+The ``Secondary Structure (nested bp)`` entry of each record's sequences is a
+dot-bracket string aligned with its ``Genomic Sequence``, in tRNAscan-SE
+notation: ``>`` opens a base pair and ``<`` closes it. ``(``/``)``, ``[``/``]``
+and ``{``/``}`` are accepted too.
+
+parse_structure turns a string into a Structure holding a pair table: an
+``array('h')`` with the partner index of every position, or -1 when it is
+unpaired. Stems, loops, non-canonical pairs and base-pair distances are
+computed from that table. Parsed structures are cached by string, so genes
+with the same fold share one object, and the in-memory snapshots keep each
+gene's structure (SpeciesSnapshot.structures).
+
+StructureIndex holds the base-pair sets of a whole species as bit-packed
+NumPy rows over the pairs occurring in that species. The base-pair distance
+of a query to every gene is then one XOR and popcount pass.
+"""
+import sqlite3
+import logging
+from array import array
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .records import decode_row, select_columns
+
+logger = logging.getLogger(__name__)
+
+STRUCTURE_INDEX_ENABLED = np is not None
+
+STRUCTURE_KEY = "Secondary Structure (nested bp)"
+
+_OPENERS = {">": 0, "(": 1, "[": 2, "{": 3}
+_CLOSERS = {"<": 0, ")": 1, "]": 2, "}": 3}
+_UNPAIRED = frozenset(".-:,_~")
+
+# Watson-Crick pairs; G-U wobbles are reported separately
+_CANONICAL = frozenset({"AU", "UA", "GC", "CG"})
+_WOBBLE = frozenset({"GU", "UG"})
+
+LOOP_KINDS = ("hairpin", "bulge", "interior", "multi", "external")
+
+
+@dataclass(frozen=True)
+class Stem:
+    """Run of stacked base pairs (start + k, end - k) for k < length; 0-based."""
+    start: int
+    end: int
+    length: int
+
+    @property
+    def pairs(self) -> List[Tuple[int, int]]:
+        return [(self.start + k, self.end - k) for k in range(self.length)]
+
+
+@dataclass(frozen=True)
+class Loop:
+    """Unpaired positions closed by the same pair, or outside every pair.
+
+    Segments are [start, end) runs of unpaired positions. Multi-branch and
+    external loops list every run, and closing is None for the external loop.
+    """
+    kind: str
+    closing: Optional[Tuple[int, int]]
+    segments: Tuple[Tuple[int, int], ...]
+
+    @property
+    def size(self) -> int:
+        return sum(end - start for start, end in self.segments)
+
+
+# Longest symmetric interior loop read as mismatched bases inside a stem
+MAX_MISMATCH_RUN = 2
+
+
+@dataclass(frozen=True)
+class PairMismatch:
+    """Opposed bases of a stem that are not Watson-Crick partners.
+
+    kind is "unpaired" for bases facing each other across a small symmetric
+    interior loop, which is how tRNAscan-SE marks a stem mismatch;
+    "noncanonical" or "wobble" for bases the structure pairs anyway.
+    """
+    five_prime: int
+    three_prime: int
+    bases: str
+    kind: str
+
+
+def pair_type(first: str, second: str) -> str:
+    """"canonical", "wobble" or "mismatch" for two bases; T reads as U"""
+    bases = (first + second).upper().replace("T", "U")
+    if bases in _CANONICAL:
+        return "canonical"
+    return "wobble" if bases in _WOBBLE else "mismatch"
+
+
+class Structure:
+    """Pair table of one dot-bracket structure, with derived stems and loops."""
+
+    def __init__(self, dot_bracket: str):
+        """Parse a dot-bracket string
+
+        Raises:
+            ValueError: If brackets are unbalanced or a character is unknown
+        """
+        self.dot_bracket = dot_bracket
+        self.pairs = array("h", [-1]) * len(dot_bracket)
+        stacks: List[List[int]] = [[] for _ in _OPENERS]
+        for i, char in enumerate(dot_bracket):
+            if char in _OPENERS:
+                stacks[_OPENERS[char]].append(i)
+            elif char in _CLOSERS:
+                stack = stacks[_CLOSERS[char]]
+                if not stack:
+                    raise ValueError(f"Unbalanced '{char}' at position {i + 1}")
+                j = stack.pop()
+                self.pairs[i], self.pairs[j] = j, i
+            elif char not in _UNPAIRED:
+                raise ValueError(f"Unknown structure character '{char}' at position {i + 1}")
+        if any(stacks):
+            raise ValueError("Unbalanced structure: unclosed base pairs")
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def base_pairs(self) -> Iterator[Tuple[int, int]]:
+        """(i, j) with i < j for every pair, in 5' order"""
+        return ((i, j) for i, j in enumerate(self.pairs) if j > i)
+
+    @cached_property
+    def stems(self) -> Tuple[Stem, ...]:
+        """Maximal runs of stacked pairs, in 5' order; a bulge ends a stem"""
+        stems = []
+        pairs = self.pairs
+        for i, j in self.base_pairs():
+            if i > 0 and pairs[i - 1] == j + 1:
+                continue
+            length = 1
+            while i + length < j - length and pairs[i + length] == j - length:
+                length += 1
+            stems.append(Stem(i, j, length))
+        return tuple(stems)
+
+    @cached_property
+    def loops(self) -> Tuple[Loop, ...]:
+        """Loop decomposition: the loop inside every pair, then the external loop
+
+        Stacked pairs enclose no loop and are skipped; a multi-branch loop is
+        kept even when all of its strands are empty.
+        """
+        loops = []
+        for i, j in self.base_pairs():
+            segments, branches = self._walk(i + 1, j)
+            if branches == 0:
+                loops.append(Loop("hairpin", (i, j), segments))
+            elif branches == 1 and segments:
+                loops.append(Loop("interior" if len(segments) == 2 else "bulge", (i, j), segments))
+            elif branches > 1:
+                loops.append(Loop("multi", (i, j), segments))
+        segments, _ = self._walk(0, len(self))
+        if segments:
+            loops.append(Loop("external", None, segments))
+        return tuple(loops)
+
+    def _walk(self, start: int, end: int) -> Tuple[Tuple[Tuple[int, int], ...], int]:
+        """Unpaired runs and enclosed branches between start and end, jumping over each branch"""
+        segments, branches = [], 0
+        k, run = start, start
+        while k < end:
+            partner = self.pairs[k]
+            if partner > k:
+                if run < k:
+                    segments.append((run, k))
+                branches += 1
+                k = partner + 1
+                run = k
+            else:
+                k += 1
+        if run < end:
+            segments.append((run, end))
+        return tuple(segments), branches
+
+    def mismatches(self, sequence: str, include_wobble: bool = False) -> List[PairMismatch]:
+        """Opposed stem bases that are not Watson-Crick partners, in 5' order
+
+        Args:
+            sequence: Sequence the structure is aligned with (the genomic sequence)
+            include_wobble: Also report G-U pairs
+
+        Raises:
+            ValueError: If the sequence and the structure differ in length
+        """
+        if len(sequence) != len(self):
+            raise ValueError(f"Sequence of length {len(sequence)} does not match structure of length {len(self)}")
+        found = []
+        for i, j in self.base_pairs():
+            kind = pair_type(sequence[i], sequence[j])
+            if kind == "mismatch" or (include_wobble and kind == "wobble"):
+                kind = "noncanonical" if kind == "mismatch" else kind
+                found.append(PairMismatch(i, j, (sequence[i] + sequence[j]).upper(), kind))
+        for loop in self.loops:
+            if loop.kind != "interior":
+                continue
+            (start5, end5), (start3, end3) = loop.segments
+            if end5 - start5 == end3 - start3 <= MAX_MISMATCH_RUN:
+                for k in range(end5 - start5):
+                    i, j = start5 + k, end3 - 1 - k
+                    found.append(PairMismatch(i, j, (sequence[i] + sequence[j]).upper(), "unpaired"))
+        return sorted(found, key=lambda mismatch: mismatch.five_prime)
+
+    def distance(self, other: "Structure") -> int:
+        """Base-pair distance: pairs present in exactly one of the two structures
+
+        Positions beyond the shorter structure count as unpaired.
+        """
+        a, b = self.pairs, other.pairs
+        shared = sum(1 for i, (x, y) in enumerate(zip(a, b)) if x > i and x == y)
+        return self.pair_count + other.pair_count - 2 * shared
+
+    @cached_property
+    def pair_count(self) -> int:
+        return sum(1 for i, j in enumerate(self.pairs) if j > i)
+
+
+@lru_cache(maxsize=4096)
+def parse_structure(dot_bracket: str) -> Structure:
+    """Cached Structure of a dot-bracket string, shared by every gene with that fold"""
+    return Structure(dot_bracket)
+
+
+def record_structure(record: dict) -> Optional[Structure]:
+    """Structure of a decoded record, or None when it has none or it does not parse"""
+    dot_bracket = (record.get("sequences") or {}).get(STRUCTURE_KEY)
+    if not dot_bracket:
+        return None
+    try:
+        return parse_structure(dot_bracket)
+    except ValueError:
+        return None
+
+
+def _pair_codes(structure: Structure) -> "np.ndarray":
+    """Base pairs (i, j) as sorted integer codes"""
+    return np.asarray([(i << 16) | j for i, j in structure.base_pairs()], dtype=np.int64)
+
+
+class StructureIndex:
+    """Bit-packed base-pair sets of every gene of a species table.
+
+    Bit k of a gene's row is set when it contains the k-th base pair of the
+    species' pair universe, the sorted union of all its genes' pairs. Genes
+    without a parseable structure have empty rows and are never ranked.
+    """
+
+    def __init__(self, species: str, rows: List[sqlite3.Row]):
+        """Build the index from rows selected by load_structure_index"""
+        self.species = species
+        records = [decode_row(row, ("gene_symbol", "sequences")) for row in rows]
+        self.gene_symbols = [record["gene_symbol"] for record in records]
+        self.by_symbol = {symbol: i for i, symbol in enumerate(self.gene_symbols)}
+        # Alphabetical rank of each gene symbol, to break distance ties
+        self.symbol_rank = np.argsort(np.argsort(np.asarray(self.gene_symbols, dtype=object), kind="stable"))
+        self.structures = [record_structure(record) for record in records]
+        self.valid = np.asarray([structure is not None for structure in self.structures], dtype=bool)
+
+        codes = [_pair_codes(s) if s is not None else np.zeros(0, dtype=np.int64) for s in self.structures]
+        self.universe = np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+        bits = np.zeros((len(records), len(self.universe)), dtype=bool)
+        for row, gene_codes in enumerate(codes):
+            bits[row, np.searchsorted(self.universe, gene_codes)] = True
+        self.packed = np.packbits(bits, axis=1)
+        self.pair_counts = bits.sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.gene_symbols)
+
+    def distances(self, query: Structure) -> "np.ndarray":
+        """Base-pair distance from the query to every gene, in row order
+
+        Query pairs outside the universe are in no gene, so they add to every
+        distance.
+        """
+        codes = _pair_codes(query)
+        slots = np.searchsorted(self.universe, codes)
+        inside = (slots < len(self.universe)) & (self.universe[np.minimum(slots, len(self.universe) - 1)] == codes)
+        bits = np.zeros(len(self.universe), dtype=bool)
+        bits[slots[inside]] = True
+        differing = np.bitwise_xor(self.packed, np.packbits(bits))
+        return _POPCOUNT[differing].sum(axis=1, dtype=np.int64) + int((~inside).sum())
+
+    def rank(
+        self,
+        query: Structure,
+        limit: int,
+        max_distance: Optional[int] = None,
+        exclude: Optional[str] = None
+    ) -> List[Tuple[str, int, int]]:
+        """Genes closest to a query structure
+
+        Returns:
+            Up to limit (gene symbol, distance, shared pairs), nearest first,
+            ties by gene symbol
+        """
+        distances = self.distances(query)
+        candidates = self.valid.copy()
+        if max_distance is not None:
+            candidates &= distances <= max_distance
+        if exclude in self.by_symbol:
+            candidates[self.by_symbol[exclude]] = False
+        rows = np.flatnonzero(candidates)
+        order = rows[np.lexsort((self.symbol_rank[rows], distances[rows]))][:max(limit, 0)].tolist()
+        query_pairs = query.pair_count
+        return [
+            (self.gene_symbols[row], int(distances[row]),
+             (query_pairs + int(self.pair_counts[row]) - int(distances[row])) // 2)
+            for row in order
+        ]
+
+
+if np is not None:
+    _POPCOUNT = np.asarray([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def load_structure_index(conn: sqlite3.Connection, species: str) -> StructureIndex:
+    """Read and parse the structures of a species table into a StructureIndex
+
+    Runs on a pooled connection through QueryExecutor.run.
+    """
+    rows = conn.execute(
+        f"SELECT {select_columns(('gene_symbol', 'sequences'))} FROM {species} ORDER BY rowid"
+    ).fetchall()
+    index = StructureIndex(species, rows)
+    logger.info(f"Indexed {len(index.universe)} distinct base pairs of {len(index)} {species} structures")
+    return index
@@ -0,0 +1,70 @@
+"""Tests for the precomputed species statistics"""
+import sqlite3
+import pytest
+from chat.tools.rna_database.aggregates import (
+    FACETS, compute_statistics, parse_facets, parse_features, read_statistics, score_summary,
+    summarize_facets, table_statistics
+)
+from chat.tools.rna_database.schema import build_statistics
+
+def test_parse_features():
+    """The gene class is split from the annotations that follow it"""
+    assert parse_features("high-confidence") == ("high-confidence", {})
+    assert parse_features("pseudotrunc_start: 4mismatch: 2") == ("pseudo", {"trunc_start": 4, "mismatch": 2})
+    assert parse_features("isotype-mismatchmismatch: 1") == ("isotype-mismatch", {"mismatch": 1})
+    assert parse_features("") == ("other", {})
+
+def test_parse_facets():
+    """Facets are opt-in, always include the total and come back in document order"""
+    assert parse_facets(None) == parse_facets("false") == ()
+    assert parse_facets(True) == parse_facets("all") == FACETS
+    assert parse_facets("general_score,isotype") == ("total", "isotype", "general_score")
+    with pytest.raises(ValueError):
+        parse_facets("locus")
+
+def test_summarize_facets():
+    """Groups, including groups of several species, add up to one facet document"""
+    groups = [
+        ("Gly", "GCC", 3, 40.0, 60.0, 150.0, 70.0, 90.0, 240.0),
+        ("Gly", "TCC", 1, 80.0, 80.0, 80.0, 100.0, 100.0, 100.0),
+        ("Gly", "GCC", 2, 30.0, 50.0, 80.0, 60.0, 60.0, 120.0),
+    ]
+    facets = summarize_facets(groups)
+    assert facets["total"] == 6
+    assert facets["isotype"] == {"Gly": 6}
+    assert facets["anticodon"] == {"GCC": 5, "TCC": 1}
+    assert facets["general_score"] == {"count": 6, "min": 30.0, "max": 80.0, "mean": 51.667}
+    assert summarize_facets([], ("total", "isotype_score")) == {"total": 0, "isotype_score": {"count": 0}}
+
+def test_score_summary():
+    """Quantiles interpolate between ranks and the histogram has no gaps"""
+    summary = score_summary([5.0, 25.0, 15.0, 35.0])
+    assert summary["mean"] == 20.0
+    assert summary["quantiles"]["p50"] == 20.0
+    assert summary["quantiles"]["p25"] == 12.5
+    assert [b["count"] for b in summary["histogram"]] == [1, 1, 1, 1]
+    assert summary["histogram"][0] == {"start": 0, "end": 10, "count": 1}
+    assert score_summary([]) == {"count": 0}
+
+def test_build_statistics_matches_rows():
+    """The stored document equals the one computed from the rows"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, Anticodon TEXT, "
+        "Isotype_from_Anticodon TEXT, General_tRNA_Model_Score TEXT, Isotype_Model_Score TEXT, "
+        "Anticodon_and_Isotype_Model_Agreement TEXT, Features TEXT)"
+    )
+    conn.executemany("INSERT INTO human VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        ("tRNA-Ala-AGC-1-1", "AGC", "Ala", "84.9", "120.1", "consistent", "high-confidence"),
+        ("tRNA-Ala-TGC-1-1", "TGC", "Ala", "70.1", "101.0", "inconsistent", "high-confidenceintron: 1"),
+        ("tRNA-Gly-GCC-1-1", "GCC", "Gly", "30.5", "40.0", "consistent", "pseudomismatch: 2"),
+    ])
+    build_statistics(conn, "human")
+    stored = read_statistics(conn, "human")
+    assert stored == table_statistics(conn, "human")
+    assert stored["total"] == 3
+    assert stored["isotype"] == {"Ala": 2, "Gly": 1}
+    assert stored["features"] == {"high-confidence": 2, "pseudo": 1}
+    assert stored["model_agreement"] == {"consistent": 2, "inconsistent": 1, "rate": 0.667}
+    assert stored["by_isotype"]["Ala"]["anticodons"] == ["AGC", "TGC"]
+    assert compute_statistics([])["model_agreement"]["rate"] is None
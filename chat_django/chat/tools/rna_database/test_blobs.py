@@ -0,0 +1,77 @@
+"""Tests for dictionary-compressed JSON columns"""
+import json
+import sqlite3
+import importlib.util
+import pytest
+
+from chat.tools.rna_database.blobs import DICTIONARY_TABLE, blob_text, compress_columns, install
+from chat.tools.rna_database.build import build_database, read_build_info, read_records
+from chat.tools.rna_database.records import decode_row, select_columns
+from chat.tools.rna_database.test_build import RECORDS
+
+CODECS = ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(
+    importlib.util.find_spec("zstandard") is None, reason="zstandard not installed"
+))]
+
+def _table(conn):
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, overview TEXT, variants TEXT)")
+    for i in range(300):
+        conn.execute(
+            "INSERT INTO human VALUES (?, ?, ?)",
+            (f"tRNA-Gly-GCC-{i}", json.dumps({"Known Modifications (Modomics)": "m1A58 D16", "Rank": i}),
+             "[]" if i % 3 else None)
+        )
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compress_columns(codec):
+    """Compressed values decode to the original JSON, in Python and in SQL"""
+    conn = sqlite3.connect(":memory:")
+    install(conn)
+    _table(conn)
+    before = conn.execute("SELECT overview, variants FROM human ORDER BY rowid").fetchall()
+    sizes = compress_columns(conn, "human", codec, ("overview", "variants"))
+    assert sizes["overview"][1] < sizes["overview"][0]
+
+    stored = conn.execute("SELECT overview, variants FROM human ORDER BY rowid").fetchall()
+    assert all(isinstance(overview, bytes) for overview, _ in stored)
+    assert [(blob_text(o), blob_text(v)) for o, v in stored] == before
+    assert conn.execute(
+        "SELECT count(*) FROM human WHERE json_extract(blob_text(overview), '$.Rank') >= 200"
+    ).fetchone() == (100,)
+    assert conn.execute(f"SELECT count(*) FROM {DICTIONARY_TABLE}").fetchone() == (2,)
+
+def test_decode_row_is_transparent():
+    """decode_row parses compressed and plain columns alike"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    install(conn)
+    _table(conn)
+    plain = [decode_row(row, ["gene_symbol", "overview"]) for row in
+             conn.execute(f"SELECT {select_columns(['gene_symbol', 'overview'])} FROM human")]
+    compress_columns(conn, "human", "zlib")
+    assert [decode_row(row, ["gene_symbol", "overview"]) for row in
+            conn.execute(f"SELECT {select_columns(['gene_symbol', 'overview'])} FROM human")] == plain
+
+def test_unknown_dictionary():
+    """BLOBs from a file whose dictionaries were never registered are rejected"""
+    with pytest.raises(ValueError):
+        blob_text(b"\x01" + b"\xff" * 8 + b"data")
+
+def test_build_compressed(tmp_path):
+    """The builder compresses after indexing, records the codec and round-trips its own output"""
+    source = tmp_path / "records.json"
+    source.write_text(json.dumps(RECORDS))
+    plain = build_database("human", [str(source)], str(tmp_path / "plain.db"), workers=1)
+    packed = build_database("human", [str(source)], str(tmp_path / "packed.db"), workers=1, compress="zlib")
+    assert packed["content_hash"] == plain["content_hash"]
+
+    conn = sqlite3.connect(tmp_path / "packed.db")
+    assert read_build_info(conn)["compression"] == "zlib"
+    assert conn.execute("SELECT count(*) FROM human_modifications").fetchone() == (2,)
+    assert {typeof for (typeof,) in conn.execute("SELECT typeof(overview) FROM human")} == {"blob"}
+
+    rebuilt = build_database("human", [str(tmp_path / "packed.db")], str(tmp_path / "rebuilt.db"), workers=1)
+    assert rebuilt["content_hash"] == plain["content_hash"]
+    with pytest.raises(ValueError):
+        build_database("human", [str(source)], str(tmp_path / "bad.db"), workers=1, compress="lz4")
+    assert len(list(read_records(tmp_path / "packed.db", "human"))) == 2
@@ -0,0 +1,63 @@
+"""Tests for the offline species database builder"""
+import json
+import sqlite3
+import pytest
+from chat.tools.rna_database.build import build_database, normalize_record, read_build_info
+
+RECORDS = [
+    {
+        "GtRNAdb Gene Symbol": "tRNA-Gly-GCC-1-1",
+        "tRNAscan-SE ID": "chr1.trna1",
+        "Locus": "chr1:100-170 (+)",
+        "Anticodon": "GCC",
+        "Isotype from Anticodon": "Gly",
+        "General tRNA Model Score": "81.0",
+        "Isotype Model Score": "110.5",
+        "Anticodon and Isotype Model Agreement": "consistent",
+        "Features": "high-confidence",
+        "overview": {"Known Modifications (Modomics)": "m1A58"},
+        "variants": [],
+    },
+    {
+        "GtRNAdb_Gene_Symbol": "tRNA-Ala-AGC-1-1",
+        "Locus": "chr2:500-572 (-)",
+        "Anticodon": "AGC",
+        "Isotype_from_Anticodon": "Ala",
+        "General_tRNA_Model_Score": 84.9,
+        "overview": "{\"Known Modifications (Modomics)\": \"D16\"}",
+    },
+]
+
+def test_normalize_record():
+    """Labels map onto columns, scores become floats and JSON is re-serialized compactly"""
+    row = normalize_record(RECORDS[0])
+    assert row[0] == "tRNA-Gly-GCC-1-1"
+    assert row[5] == 81.0
+    assert row[10] == '{"Known Modifications (Modomics)":"m1A58"}'
+    with pytest.raises(ValueError):
+        normalize_record({"Locus": "chr1:1-2"})
+    with pytest.raises(ValueError):
+        normalize_record({"GtRNAdb_Gene_Symbol": "x", "overview": "{not json"})
+
+def test_build_database(tmp_path):
+    """Exports build a typed, indexed and stamped database whose hash ignores input order"""
+    forward, backward = tmp_path / "forward.jsonl", tmp_path / "backward.json"
+    forward.write_text("\n".join(json.dumps(r) for r in RECORDS + [{"Locus": "no symbol"}]))
+    backward.write_text(json.dumps(RECORDS[::-1]))
+
+    info = build_database("human", [str(forward)], str(tmp_path / "human_db.db"), workers=2)
+    other = build_database("human", [str(backward)], str(tmp_path / "other_db.db"), workers=1)
+    assert info["content_hash"] == other["content_hash"]
+    assert (info["row_count"], info["skipped_records"]) == (2, 1)
+
+    conn = sqlite3.connect(tmp_path / "human_db.db")
+    assert conn.execute("SELECT GtRNAdb_Gene_Symbol FROM human").fetchall() == [
+        ("tRNA-Ala-AGC-1-1",), ("tRNA-Gly-GCC-1-1",)
+    ]
+    assert conn.execute("SELECT typeof(General_tRNA_Model_Score), general_score FROM human").fetchall() == [
+        ("real", 84.9), ("real", 81.0)
+    ]
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"human_fts", "human_modifications", "human_loci", "human_variants", "human_statistics"} <= tables
+    assert read_build_info(conn)["content_hash"] == info["content_hash"]
+    assert not (tmp_path / "human_db.db.tmp").exists()
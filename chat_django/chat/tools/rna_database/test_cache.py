@@ -0,0 +1,39 @@
+"""Tests for the query-result cache"""
+from chat.tools.rna_database.cache import ResultCache, canonical_params
+
+def test_canonical_params_normalizes_equivalent_requests():
+    """Key order, value types, case and chat context do not split entries"""
+    a = canonical_params("search_rna", {"species": "human", "isotype": "SeC", "limit": 5})
+    b = canonical_params("search_rna", {
+        "limit": "5", "isotype": "SeC", "species": "Human",
+        "context": {"user_id": "u"}, "persist": "deferred"
+    })
+    assert a == b
+    assert a != canonical_params("search_rna", {"species": "human", "isotype": "Sec", "limit": 5})
+    assert canonical_params("search_rna", {"fields": "locus,features"}) == \
+        canonical_params("search_rna", {"fields": ["features", "locus"]})
+
+def test_unseeded_random_samples_are_not_cached():
+    """Random samples only get a key when they are reproducible"""
+    assert canonical_params("search_rna", {"sample": "random"}) is None
+    assert canonical_params("search_rna", {"sample": "random", "seed": 3}) is not None
+
+def test_new_version_drops_stale_entries():
+    """A changed content hash invalidates the file's entries, not other files'"""
+    cache = ResultCache(max_entries=2)
+    cache.put("a.db", "v1", "k", [1])
+    cache.put("b.db", "v1", "k", [2])
+    assert cache.get("a.db", "v1", "k") == [1]
+    assert cache.get("a.db", "v2", "k") is None
+    assert cache.get("a.db", "v1", "k") is None
+    assert cache.get("b.db", "v1", "k") == [2]
+
+def test_lru_eviction():
+    """The least recently used entry is evicted beyond capacity"""
+    cache = ResultCache(max_entries=2)
+    cache.put("a.db", "v1", "x", [1])
+    cache.put("a.db", "v1", "y", [2])
+    cache.get("a.db", "v1", "x")
+    cache.put("a.db", "v1", "z", [3])
+    assert cache.get("a.db", "v1", "y") is None
+    assert cache.get("a.db", "v1", "x") == [1]
@@ -0,0 +1,67 @@
+"""Tests for the executor-backed query layer"""
+import asyncio
+import sqlite3
+import threading
+import pytest
+from chat.tools.rna_database.executor import QueryExecutor, QueryTimeoutError, _ActiveQuery
+from chat.tools.rna_database.pool import ConnectionPool
+
+# Counts far enough to run for minutes unless interrupted
+SLOW_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT max(i) FROM n"
+
+@pytest.fixture
+def pool(tmp_path):
+    conn = sqlite3.connect(tmp_path / "a.db")
+    conn.execute("CREATE TABLE t (v)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    return ConnectionPool(tmp_path / "a.db")
+
+def test_timeout_interrupts_and_closes_the_connection(pool):
+    """An overrunning query is interrupted, and its connection is not pooled again"""
+    executor = QueryExecutor(max_workers=1)
+    used = []
+
+    def slow(conn):
+        used.append(conn)
+        return conn.execute(SLOW_QUERY).fetchall()
+
+    async def scenario():
+        with pytest.raises(QueryTimeoutError):
+            await executor.run(pool, slow, timeout=0.2)
+        # Queued behind the interrupted query on the single worker
+        return await executor.run(pool, lambda conn: (conn, conn.execute("SELECT v FROM t").fetchone()[0]))
+
+    conn, value = asyncio.run(scenario())
+    assert value == 1 and conn is not used[0]
+    with pytest.raises(sqlite3.ProgrammingError):
+        used[0].execute("SELECT 1")
+    executor.shutdown()
+
+def test_query_cancelled_before_it_starts_never_runs(pool):
+    """A query still queued when it times out is dropped, its connection untouched"""
+    executor = QueryExecutor(max_workers=1)
+    release, ran = threading.Event(), []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(executor.run(pool, lambda conn: release.wait(5), timeout=5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueryTimeoutError):
+            await executor.run(pool, lambda conn: ran.append(conn), timeout=0.1)
+        release.set()
+        await blocker
+        return await executor.fetchone(pool, "SELECT v FROM t")
+
+    assert asyncio.run(scenario())[0] == 1
+    assert ran == []
+    executor.shutdown()
+
+def test_cancel_before_start_refuses_the_connection(pool):
+    """A cancelled query raises on start instead of running on the connection"""
+    active = _ActiveQuery()
+    active.cancel()
+    with pool.connection() as conn:
+        with pytest.raises(QueryTimeoutError):
+            active.start(conn)
+    assert pool.acquire() is conn
@@ -0,0 +1,230 @@
+"""Handler-level tests for RNADatabaseMCP against the bundled human database
+
+Every test runs on a copy of data/human_db.db as shipped (stock) and after
+schema.upgrade_database (upgraded). A second species, yeast, is the same file
+with its table renamed and two thirds of the genes dropped. Each test also
+runs with the in-memory snapshot enabled and disabled, so searches go through
+both the snapshot and SQLite. Results are not persisted: RecordingWriter
+stands in for SequenceWriter.
+"""
+import shutil
+import sqlite3
+import asyncio
+from pathlib import Path
+import pytest
+
+from chat.tools.rna_database import mcp, registry
+from chat.tools.rna_database.executor import QueryExecutor
+from chat.tools.rna_database.mcp import MCPRequest, RNADatabaseMCP
+from chat.tools.rna_database.registry import SpeciesRegistry
+from chat.tools.rna_database.schema import upgrade_database
+
+DATA = Path(__file__).parent / "data" / "human_db.db"
+
+CONTEXT = {"user_id": "user", "chat_id": "chat", "message_id": "message"}
+
+
+class RecordingWriter:
+    """Returns the payloads SequenceWriter would, and records what it was asked to store"""
+
+    def __init__(self):
+        self.writes = []
+
+    async def write(self, records, context, species, source_version, deferred=False):
+        self.writes.append((species, [record["gene_symbol"] for record in records]))
+        return [{"id": f"{species}:{record['gene_symbol']}", **record} for record in records]
+
+    async def flush(self):
+        pass
+
+
+@pytest.fixture(scope="module", params=["stock", "upgraded"])
+def data_dir(request, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(request.param)
+    shutil.copy(DATA, directory / "human_db.db")
+    shutil.copy(DATA, directory / "yeast_db.db")
+    conn = sqlite3.connect(directory / "yeast_db.db")
+    conn.execute("ALTER TABLE human RENAME TO yeast")
+    conn.execute("DELETE FROM yeast WHERE rowid % 3 != 0")
+    conn.commit()
+    conn.close()
+    if request.param == "upgraded":
+        upgrade_database(str(directory / "human_db.db"))
+        upgrade_database(str(directory / "yeast_db.db"))
+    return directory
+
+
+@pytest.fixture(params=["snapshot", "sqlite"])
+def tool(request, data_dir, monkeypatch):
+    monkeypatch.setattr(registry, "_registry", SpeciesRegistry(data_dir))
+    monkeypatch.setattr(mcp, "SNAPSHOT_ENABLED", mcp.SNAPSHOT_ENABLED and request.param == "snapshot")
+    tool = RNADatabaseMCP(**CONTEXT)
+    tool.writer = RecordingWriter()
+    return tool
+
+
+def call(tool, method, **params):
+    response = asyncio.run(tool.process_request(MCPRequest(method, {**params, "context": CONTEXT})))
+    assert response.status == "success", response.error
+    return response.data
+
+
+def test_merge_projects_the_sort_key(tool):
+    """Merging species by a field left out of the projection sorts on it, then drops it"""
+    data = call(tool, "search_rna", species="all", fields="gene_symbol", sort_by="Locus", limit=20)
+    sequences = data["sequences"]
+    assert len(sequences) == 20 and {s["species"] for s in sequences} == {"human", "yeast"}
+    assert all("locus" not in s for s in sequences)
+
+    with_locus = call(tool, "search_rna", species="all", fields="gene_symbol,locus", sort_by="Locus", limit=20)
+    loci = [s["locus"] for s in with_locus["sequences"]]
+    assert loci == sorted(loci)
+    assert [s["gene_symbol"] for s in sequences] == [s["gene_symbol"] for s in with_locus["sequences"]]
+
+    # The cached, widened records are not stripped in place
+    again = call(tool, "search_rna", species="all", fields="gene_symbol", sort_by="Locus", limit=20)
+    assert again["sequences"] == sequences and again["metadata"]["cached"]
+
+
+def test_text_search(tool, data_dir):
+    """Identifiers inside the overview match with and without the full-text index"""
+    data = call(tool, "text_search", query="TRU-TCA1-1", fields="overview")
+    assert data["sequences"] and data["sequences"][0]["overview"]["HGNC Symbol"] == "TRU-TCA1-1"
+    assert data["metadata"]["ranked"] == (data_dir.name.startswith("upgraded"))
+
+    symbol = call(tool, "text_search", query="tRNA-SeC-TCA-1-1", limit=1)["sequences"][0]["gene_symbol"]
+    assert symbol == "tRNA-SeC-TCA-1-1"
+    assert call(tool, "text_search", query="SeC", limit=-1)["sequences"] == []
+    assert tool.writer.writes[-1] == ("human", [])
+
+
+def test_search_region(tool):
+    """Genes near a region come nearest first, and a negative limit returns none"""
+    data = call(tool, "search_region", chrom="chr10", start=22518438, end=22518511, flank=1_000_000, limit=5)
+    sequences = data["sequences"]
+    assert sequences[0]["distance"] == 0 and sequences[0]["region"]["start"] == 22518438
+    assert [s["distance"] for s in sequences] == sorted(s["distance"] for s in sequences)
+    assert all(s["region"]["chrom"] == "chr10" for s in sequences)
+
+    assert call(tool, "search_region", chrom="chr10", start=0, end=10**9, limit=-1)["sequences"] == []
+
+
+def test_search_variants(tool):
+    """Genes list their matching variants, and a negative limit returns none"""
+    data = call(tool, "search_variants", rsid="rs560955489")
+    assert [s["gene_symbol"] for s in data["sequences"]] == ["tRNA-Asn-GTT-2-3"]
+    assert [v["rsid"] for v in data["sequences"][0]["matched_variants"]] == ["rs560955489"]
+
+    stem = call(tool, "search_variants", region="acceptor stem", limit=3)
+    assert len(stem["sequences"]) == 3 and stem["metadata"]["variant_count"] >= 3
+    assert call(tool, "search_variants", region="acceptor stem", limit=-1)["sequences"] == []
+
+
+def test_get_sequences(tool):
+    """Batches keep request order across species, and reject non-string symbols"""
+    data = call(
+        tool, "get_sequences", species="all", fields="gene_symbol",
+        gene_symbols=["tRNA-SeC-TCA-1-1", "tRNA-Nope-1-1", "tRNA-Asn-GTT-2-3", "tRNA-SeC-TCA-1-1"]
+    )
+    assert [s["gene_symbol"] for s in data["sequences"]][0] == "tRNA-SeC-TCA-1-1"
+    assert [s["gene_symbol"] for s in data["sequences"]][-1] == "tRNA-Asn-GTT-2-3"
+    assert data["metadata"]["missing"] == ["tRNA-Nope-1-1"]
+
+    for gene_symbols in ([1, 2], {"gene": "tRNA-SeC-TCA-1-1"}, 7):
+        response = asyncio.run(tool.process_request(
+            MCPRequest("get_sequences", {"gene_symbols": gene_symbols, "context": CONTEXT})
+        ))
+        assert response.status == "error" and response.error["code"] == "INVALID_PARAM"
+
+
+def test_search_cursor_pages_match_facets(tool):
+    """Following the cursors walks the filtered set once, in order, as counted by the facets"""
+    params = {"isotype": "Ala", "sort_by": "general_score", "order": "desc", "fields": "gene_symbol", "limit": 7}
+    first = call(tool, "search_rna", facets=True, **params)
+    total = first["facets"]["total"]
+    assert first["facets"]["isotype"] == {"Ala": total}
+
+    sequences, cursor = first["sequences"], first["metadata"]["next_cursor"]
+    while cursor:
+        page = call(tool, "search_rna", cursor=cursor, **params)
+        sequences += page["sequences"]
+        cursor = page["metadata"]["next_cursor"]
+    assert len(sequences) == total == len({s["gene_symbol"] for s in sequences})
+    scores = [s["general_score"] for s in sequences]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_facets_across_species(tool):
+    """Facets of several species add up, with the per-species totals alongside"""
+    data = call(tool, "search_rna", species="all", isotype="Leu", facets="total,isotype", limit=100)
+    facets = data["facets"]
+    assert facets["species"]["human"] > facets["species"]["yeast"] > 0
+    assert facets["total"] == sum(facets["species"].values()) == facets["isotype"]["Leu"]
+    assert len(data["sequences"]) == facets["total"]
+    assert [s["general_score"] for s in data["sequences"]] == \
+        sorted((s["general_score"] for s in data["sequences"]), reverse=True)
+
+
+def test_get_statistics(tool, data_dir):
+    """Statistics are exact per species, precomputed only on upgraded files"""
+    data = call(tool, "get_statistics", species="all", statistics="total,isotype,general_score")
+    human, yeast = data["statistics"]["human"], data["statistics"]["yeast"]
+    assert human["total"] == 596 and 0 < yeast["total"] < human["total"]
+    assert sum(human["isotype"].values()) == human["total"]
+    assert human["general_score"]["count"] == human["total"]
+    assert "anticodon" not in human
+    source = "precomputed" if data_dir.name.startswith("upgraded") else "computed"
+    assert data["metadata"]["source"] == {"human": source, "yeast": source}
+
+
+def test_search_by_sequence(tool):
+    """A gene's own mature sequence finds it with full identity, across species by score"""
+    mature = call(tool, "get_sequence", gene_symbol="tRNA-SeC-TCA-1-1")["sequence"]["sequences"]["Predicted Mature tRNA"]
+    data = call(tool, "search_by_sequence", sequence=mature, fields="gene_symbol", limit=3)
+    best = data["sequences"][0]
+    assert best["gene_symbol"] == "tRNA-SeC-TCA-1-1" and best["similarity"]["identity"] == 1.0
+
+    merged = call(tool, "search_by_sequence", sequence=mature, species="all", fields="gene_symbol", limit=5)
+    scores = [s["similarity"]["score"] for s in merged["sequences"]]
+    assert len(scores) == 5 and scores == sorted(scores, reverse=True)
+
+
+def test_search_by_structure(tool):
+    """Genes are ranked by base-pair distance, the query gene left out"""
+    data = call(tool, "search_by_structure", gene_symbol="tRNA-SeC-TCA-1-1", species="all", limit=5)
+    distances = [s["structure_similarity"]["distance"] for s in data["sequences"]]
+    assert len(distances) == 5 and distances == sorted(distances)
+    assert "tRNA-SeC-TCA-1-1" not in {s["gene_symbol"] for s in data["sequences"] if s["species"] == "human"}
+
+
+def test_search_motif(tool):
+    """With motif_logic "and", every returned gene carries every motif"""
+    data = call(tool, "search_motif", motifs="GGUUCGA,^GCC", motif_logic="and", fields="gene_symbol", limit=5)
+    assert len(data["sequences"]) == 5
+    for sequence in data["sequences"]:
+        assert {hit["motif"] for hit in sequence["motif_hits"]} == {"GGUUCGA", "^GCC"}
+    assert call(tool, "search_motif", motifs="GGUUCGA", limit=0)["sequences"] == []
+
+
+def test_stream_search(tool):
+    """Streaming yields every match of every species once, up to the limit"""
+    async def collect(params):
+        return [payload async for payload in tool.stream_search({**params, "fields": "gene_symbol"}, CONTEXT)]
+
+    everything = asyncio.run(collect({"species": "all", "isotype": "Leu"}))
+    counts = call(tool, "search_rna", species="all", isotype="Leu", facets="total", limit=0)["facets"]["species"]
+    assert len(everything) == len({(s["species"], s["gene_symbol"]) for s in everything})
+    assert {species: sum(s["species"] == species for s in everything) for species in counts} == counts
+
+    capped = asyncio.run(collect({"species": "human", "sort_by": "Locus", "limit": 45}))
+    assert [s["gene_symbol"] for s in capped] == \
+        [s["gene_symbol"] for s in call(tool, "search_rna", sort_by="Locus", fields="gene_symbol", limit=45)["sequences"]]
+
+
+def test_query_timeout_error_code(tool):
+    """Queries overrunning the executor timeout surface as QUERY_TIMEOUT"""
+    tool.executor = QueryExecutor(default_timeout=0)
+    response = asyncio.run(tool.process_request(
+        MCPRequest("text_search", {"query": "timeout", "context": CONTEXT})
+    ))
+    assert response.status == "error" and response.error["code"] == "QUERY_TIMEOUT"
@@ -0,0 +1,59 @@
+"""Tests for the k-mer sequence index"""
+import json
+import random
+import sqlite3
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chat.tools.rna_database.kmers import SequenceIndex, kmer_codes, load_sequence_index, normalize_sequence
+
+def random_sequence(rng, length):
+    return "".join(rng.choice("ACGU") for _ in range(length))
+
+@pytest.fixture
+def index():
+    rng = random.Random(3)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT, sequences TEXT)")
+    for k in range(200):
+        mature = random_sequence(rng, 72)
+        genomic = (mature[:37] + "aacgu" + mature[37:]).replace("U", "T")
+        sequences = {"Predicted Mature tRNA": mature, "Genomic Sequence": genomic}
+        conn.execute("INSERT INTO human VALUES (?, ?)", (f"tRNA-{k}", json.dumps(sequences)))
+    conn.execute("INSERT INTO human VALUES ('tRNA-empty', '{}')")
+    return load_sequence_index(conn, "human")
+
+def test_kmer_codes():
+    """Distinct k-mers, T reads as U, windows with an N are skipped"""
+    assert len(kmer_codes("ACGUACGUACGU", 4)) == 4
+    assert (kmer_codes("ACGTACGT", 4) == kmer_codes("ACGUACGU", 4)).all()
+    assert len(kmer_codes("ACGUNGGCC", 4)) == 2
+    assert len(kmer_codes("ACG", 4)) == 0
+
+def test_normalize_sequence():
+    assert normalize_sequence(" acgt\nacgtAC ") == "ACGUACGUAC"
+    with pytest.raises(ValueError, match="nucleotides"):
+        normalize_sequence("ACGUXACGUA")
+    with pytest.raises(ValueError, match="at least"):
+        normalize_sequence("ACGU")
+
+def test_fragments_rank_their_gene_first(index: SequenceIndex):
+    """A mutated fragment shortlists and aligns best to the gene it came from"""
+    rng = random.Random(5)
+    for row in rng.sample(range(200), 20):
+        fragment = list(index.sequences["mature"][row][15:55])
+        fragment[20] = "A" if fragment[20] != "A" else "C"
+        ranked = index.rank("".join(fragment), "mature", shortlist=10, limit=3)
+        symbol, shared, alignment = ranked[0]
+        assert symbol == f"tRNA-{row}"
+        assert alignment.score == 39 * 2 - 3
+        assert (alignment.target_start, alignment.target_end) == (15, 55)
+        assert shared == index.candidates("".join(fragment), "mature", 10)[0][1]
+
+def test_genomic_sequences_keep_introns(index: SequenceIndex):
+    genomic = index.sequences["genomic"][7]
+    symbol, _, alignment = index.rank(genomic, "genomic", shortlist=5, limit=1, method="global")[0]
+    assert symbol == "tRNA-7" and alignment.identity == 1.0
+    assert index.candidates("A" * 12, "mature", 5) == []
@@ -0,0 +1,66 @@
+"""Tests for the motif scanner"""
+import json
+import sqlite3
+import pytest
+
+from chat.tools.rna_database.motifs import MotifIndex, load_motif_index, normalize_motif, parse_motifs
+
+GENES = {
+    "tRNA-A": ("GCGGAUUUAGCUCAGUUGGGAGAGCGCCAGACUGAAGAUCUGGAGGUCCUGUGUUCGAUCCACAGAAUUCGCACCA",
+               "GCGGATTTAGCTCAGTTGGGAGAGCGCCAGACTGAAacgtGATCTGGAGGTCCTGTGTTCGATCCACAGAATTCGCACCA"),
+    "tRNA-B": ("GUUCAAGUUCGAAAAAAAAA", "GTTCAAGTTCGAAAAAAAAA"),
+    "tRNA-C": ("AAAAUUUUAAAAUUUU", ""),
+}
+
+@pytest.fixture
+def index() -> MotifIndex:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT, sequences TEXT)")
+    for symbol, (mature, genomic) in GENES.items():
+        sequences = {"Predicted Mature tRNA": mature, "Genomic Sequence": genomic}
+        conn.execute("INSERT INTO human VALUES (?, ?)", (symbol, json.dumps(sequences)))
+    return load_motif_index(conn, "human")
+
+def hits_of(found, index, motif=None):
+    return {
+        (index.gene_symbols[row], hit.sequence_type, hit.start, hit.match)
+        for row, hits in found.items() for hit in hits if motif in (None, hit.motif)
+    }
+
+def test_parse_motifs():
+    assert normalize_motif(" gtt cra ") == "GUUCRA"
+    assert parse_motifs("GUUCRA,gttcra, ^CCA") == ["GUUCRA", "^CCA"]
+    with pytest.raises(ValueError, match="IUPAC"):
+        parse_motifs(["GUX"])
+    with pytest.raises(ValueError, match="IUPAC"):
+        parse_motifs(["GU$C"])
+    with pytest.raises(ValueError, match="long"):
+        parse_motifs("^GU")
+    with pytest.raises(ValueError, match="required"):
+        parse_motifs(" , ")
+
+def test_scan_positions_and_iupac(index: MotifIndex):
+    """Hits map back to gene offsets, in both sequence types, introns included"""
+    found = index.scan(["GUUCRA"], ["mature", "genomic"])
+    assert hits_of(found, index) == {
+        ("tRNA-A", "mature", 52, "GUUCGA"), ("tRNA-A", "genomic", 56, "GUUCGA"),
+        ("tRNA-B", "mature", 0, "GUUCAA"), ("tRNA-B", "mature", 6, "GUUCGA"),
+        ("tRNA-B", "genomic", 0, "GUUCAA"), ("tRNA-B", "genomic", 6, "GUUCGA"),
+    }
+    (hit,) = [hit for hit in found[0] if hit.sequence_type == "genomic"]
+    assert (hit.start, hit.end) == (56, 62)
+    assert GENES["tRNA-A"][1].upper()[hit.start:hit.end] == "GTTCGA"
+    assert hits_of(index.scan(["GAAACGUGA"], ["genomic"]), index) == {("tRNA-A", "genomic", 33, "GAAACGUGA")}
+
+def test_overlaps_anchors_and_boundaries(index: MotifIndex):
+    """Overlapping hits are all found; anchors match at gene ends; hits never span genes"""
+    assert len(index.scan(["AAAA"], ["mature"])[1]) == 6
+    found = index.scan(["CCA$", "^GCGG", "^AAAA", "UUUU$"], ["mature"])
+    assert hits_of(found, index) == {
+        ("tRNA-A", "mature", 73, "CCA"), ("tRNA-A", "mature", 0, "GCGG"),
+        ("tRNA-C", "mature", 0, "AAAA"), ("tRNA-C", "mature", 12, "UUUU"),
+    }
+    # tRNA-B ends in A and tRNA-C starts with A, but not across the separator
+    assert hits_of(index.scan(["AAAAAAAAAAAAA"], ["mature"]), index) == set()
+    assert index.scan(["GUUCRA"], ["genomic"]).keys() == {0, 1}
@@ -0,0 +1,65 @@
+"""Tests for the read-only connection pool"""
+import os
+import sqlite3
+import pytest
+from chat.tools.rna_database.pool import ConnectionPool
+
+def make_db(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS t (v)")
+    conn.execute("DELETE FROM t")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+def test_connection_is_reused_after_any_error_but_sqlite_ones(tmp_path):
+    """Python errors return the connection, SQLite errors close it"""
+    make_db(tmp_path / "a.db", 1)
+    pool = ConnectionPool(tmp_path / "a.db", max_size=2)
+    with pytest.raises(KeyError):
+        with pool.connection() as conn:
+            raise KeyError("decode")
+    assert pool.acquire() is conn
+    pool.release(conn)
+
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute("SELECT * FROM missing")
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.acquire() is not conn
+
+def test_connections_from_before_a_change_are_not_reused(tmp_path):
+    """A connection borrowed across a file change is closed when it comes back"""
+    path = tmp_path / "a.db"
+    make_db(path, 1)
+    pool = ConnectionPool(path)
+    old_version = pool.version
+    borrowed = pool.acquire()
+
+    make_db(tmp_path / "b.db", 2)
+    os.replace(tmp_path / "b.db", path)
+    assert pool.version != old_version
+    pool.release(borrowed)
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed.execute("SELECT 1")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT v FROM t").fetchone()[0] == 2
+
+def test_new_connections_see_the_new_file_while_an_old_one_is_borrowed(tmp_path):
+    """Connections opened after a swap read the new content, not an old cache"""
+    path = tmp_path / "a.db"
+    make_db(path, 1)
+    pool = ConnectionPool(path)
+    pool.version
+    borrowed = pool.acquire()
+    assert borrowed.execute("SELECT v FROM t").fetchone()[0] == 1
+
+    make_db(tmp_path / "b.db", 2)
+    os.replace(tmp_path / "b.db", path)
+    pool.version
+    with pool.connection() as conn:
+        assert conn.execute("SELECT v FROM t").fetchone()[0] == 2
+    assert borrowed.execute("SELECT v FROM t").fetchone()[0] == 1
+    pool.release(borrowed)
+    assert pool.acquire() is conn
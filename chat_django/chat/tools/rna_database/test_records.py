@@ -0,0 +1,43 @@
+"""Tests for field projection and row decoding"""
+import json
+import pytest
+from chat.tools.rna_database.records import (
+    ALL_FIELDS, CORE_FIELDS, SEARCH_FIELDS, decode_row, parse_fields, select_columns
+)
+
+ROW = {
+    "GtRNAdb_Gene_Symbol": "tRNA-Asn-GTT-2-3",
+    "Anticodon": "GTT",
+    "Isotype_from_Anticodon": "Asn",
+    "General_tRNA_Model_Score": "80.9",
+    "Isotype_Model_Score": "120.1",
+    "Anticodon_and_Isotype_Model_Agreement": "consistent",
+    "Locus": "chr10:22518438-22518511 (-)",
+    "sequences": json.dumps({"Predicted Mature tRNA": "GUCUCUGUGG"}),
+    "overview": "not json",
+}
+
+def test_parse_fields_defaults_and_core():
+    """Default projection is used when nothing is requested, core fields always included"""
+    assert parse_fields(None) == SEARCH_FIELDS
+    fields = parse_fields("locus")
+    assert set(fields) == set(CORE_FIELDS) | {"locus"}
+    assert parse_fields(["all"]) == ALL_FIELDS
+
+def test_parse_fields_rejects_unknown():
+    """Unknown fields are rejected rather than silently dropped"""
+    with pytest.raises(ValueError):
+        parse_fields("locus,bogus")
+
+def test_select_columns_maps_to_source_columns():
+    """Payload names map onto the quoted table columns"""
+    assert select_columns(("gene_symbol", "locus")) == '"GtRNAdb_Gene_Symbol", "Locus"'
+
+def test_decode_row():
+    """Scores become floats, agreement a bool, and bad JSON an empty dict"""
+    record = decode_row(ROW, CORE_FIELDS + ("locus", "sequences", "overview"))
+    assert record["general_score"] == 80.9
+    assert record["model_agreement"] is True
+    assert record["sequences"]["Predicted Mature tRNA"] == "GUCUCUGUGG"
+    assert record["overview"] == {}
+    assert "variants" not in record
@@ -0,0 +1,21 @@
+"""Tests for the per-species database registry"""
+import json
+import pytest
+from chat.tools.rna_database.registry import SpeciesRegistry
+
+def test_registry_discovers_files_and_manifest(tmp_path):
+    """Species come from <species>_db.db files and the manifest, missing files are skipped"""
+    (tmp_path / "human_db.db").touch()
+    (tmp_path / "mm39.db").touch()
+    (tmp_path / "species.json").write_text(json.dumps({
+        "Mouse": {"file": "mm39.db", "display_name": "Mouse (GRCm39)"},
+        "yeast": {"file": "missing.db"},
+    }))
+    registry = SpeciesRegistry(tmp_path)
+    assert registry.species == ["human", "mouse"]
+    assert registry.path("mouse") == str(tmp_path / "mm39.db")
+    assert registry.display_name("human") == "Human (Homo sapiens)"
+    assert registry.display_name("mouse") == "Mouse (GRCm39)"
+    assert "yeast" not in registry
+    with pytest.raises(ValueError):
+        registry.path("yeast")
@@ -0,0 +1,37 @@
+"""Tests for rowid-based random sampling"""
+import sqlite3
+import pytest
+from chat.tools.rna_database.sampling import sample_rows, sample_rowids
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, Isotype_from_Anticodon TEXT)")
+    conn.executemany("INSERT INTO human VALUES (?, ?)", [
+        (f"tRNA-{i}", "Ala" if i % 2 else "Gly") for i in range(100)
+    ])
+    return conn
+
+def test_seeded_sample_is_reproducible(conn):
+    """The same seed gives the same distinct rows, different seeds usually differ"""
+    first = sample_rowids(conn, "human", "1=1", [], 10, seed=7)
+    assert first == sample_rowids(conn, "human", "1=1", [], 10, seed=7)
+    assert len(set(first)) == 10
+    assert first != sample_rowids(conn, "human", "1=1", [], 10, seed=8)
+
+def test_sample_respects_filters_and_order(conn):
+    """Filtered samples only contain matches; order_by sorts the sample"""
+    rows = sample_rows(
+        conn, "human", '"GtRNAdb_Gene_Symbol", "Isotype_from_Anticodon"',
+        "Isotype_from_Anticodon = ?", ["Gly"], 5, seed=1, order_by="GtRNAdb_Gene_Symbol"
+    )
+    symbols = [row["GtRNAdb_Gene_Symbol"] for row in rows]
+    assert len(symbols) == 5
+    assert symbols == sorted(symbols)
+    assert all(row["Isotype_from_Anticodon"] == "Gly" for row in rows)
+
+def test_sample_larger_than_matches(conn):
+    """Asking for more rows than match returns every match once"""
+    conn.execute("DELETE FROM human WHERE rowid = 50")
+    assert len(sample_rowids(conn, "human", "1=1", [], 500)) == 99
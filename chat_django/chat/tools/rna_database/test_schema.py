@@ -0,0 +1,61 @@
+"""Tests for the offline schema upgrade helpers"""
+import json
+import sqlite3
+from chat.tools.rna_database.schema import (
+    build_locus_index, build_modification_index, fts_match_expression, parse_locus,
+    parse_modification
+)
+
+def test_fts_match_expression_quotes_user_input():
+    """Terms become quoted prefix phrases, so FTS5 syntax is never interpreted"""
+    assert fts_match_expression('tRNA-Asn-GTT m1A') == '"tRNA Asn GTT"* "m1A"*'
+    assert fts_match_expression('NEAR( OR "') == '"NEAR"* "OR"*'
+    assert fts_match_expression('( "') is None
+    assert fts_match_expression('Asn', ("gene_symbol", "isotype")) == '{gene_symbol isotype} : ("Asn"*)'
+
+def test_parse_modification():
+    """Tokens split into code and position, bare codes have no position"""
+    assert parse_modification("m1A58") == ("m1A", "58")
+    assert parse_modification("m2,2G26") == ("m2,2G", "26")
+    assert parse_modification("D20a") == ("D", "20a")
+    assert parse_modification("Ψe12") == ("Ψ", "e12")
+    assert parse_modification("Cm32") == ("Cm", "32")
+    assert parse_modification("m1A") == ("m1A", None)
+
+def test_build_modification_index():
+    """Every Modomics token of every row lands in the inverted index"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, overview TEXT)")
+    conn.executemany("INSERT INTO human VALUES (?, ?)", [
+        ("tRNA-A", json.dumps({"Known Modifications (Modomics)": "m1A58 D16"})),
+        ("tRNA-B", json.dumps({"Known Modifications (Modomics)": None})),
+        ("tRNA-C", "not json"),
+    ])
+    build_modification_index(conn, "human")
+    assert conn.execute(
+        "SELECT modification, position FROM human_modifications ORDER BY modification"
+    ).fetchall() == [("D", "16"), ("m1A", "58")]
+
+def test_parse_locus():
+    """Loci parse into ordered coordinates, malformed ones are rejected"""
+    assert parse_locus("chr10:22518438-22518511 (-)") == ("chr10", 22518438, 22518511, "-")
+    assert parse_locus("chrM:200-100") == ("chrM", 100, 200, ".")
+    assert parse_locus("unplaced") is None
+
+def test_build_locus_index():
+    """The R*Tree finds genes overlapping a window on the right chromosome"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, Locus TEXT)")
+    conn.executemany("INSERT INTO human VALUES (?, ?)", [
+        ("tRNA-A", "chr1:100-170 (+)"),
+        ("tRNA-B", "chr2:100-170 (-)"),
+        ("tRNA-C", "chr1:5000-5070 (+)"),
+    ])
+    build_locus_index(conn, "human")
+    hits = conn.execute(
+        "SELECT t.GtRNAdb_Gene_Symbol FROM human_chromosomes c "
+        "JOIN human_loci r ON r.chrom_min <= c.id AND r.chrom_max >= c.id "
+        "AND r.gene_start <= 200 AND r.gene_end >= 150 "
+        "JOIN human t ON t.rowid = r.id WHERE c.name = 'chr1'"
+    ).fetchall()
+    assert hits == [("tRNA-A",)]
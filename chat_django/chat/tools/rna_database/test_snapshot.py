@@ -0,0 +1,78 @@
+"""Tests for the in-memory columnar snapshot engine"""
+import json
+import sqlite3
+import pytest
+
+pytest.importorskip("numpy")
+
+from chat.tools.rna_database.aggregates import facet_groups
+from chat.tools.rna_database.sampling import sample_rowids
+from chat.tools.rna_database.snapshot import load_snapshot
+
+@pytest.fixture
+def snapshot_conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, tRNAscan_SE_ID TEXT, Locus TEXT, "
+        "Anticodon TEXT, Isotype_from_Anticodon TEXT, General_tRNA_Model_Score TEXT, "
+        "Best_Isotype_Model TEXT, Isotype_Model_Score TEXT, Anticodon_and_Isotype_Model_Agreement TEXT, "
+        "Features TEXT, sequences TEXT, overview TEXT, images TEXT, variants TEXT, expression_profiles TEXT)"
+    )
+    for i in range(40):
+        isotype, anticodon = ("Leu", "CAG") if i % 2 else ("Gly", "GCC")
+        modifications = "m1A58 D16" if i % 4 == 0 else None
+        conn.execute(
+            "INSERT INTO human VALUES (?, '', '', ?, ?, ?, '', ?, 'consistent', '', '{}', ?, '{}', '[]', '{}')",
+            (f"tRNA-{isotype}-{i}", anticodon, isotype, str(40 + i), str(80 - i),
+             json.dumps({"Known Modifications (Modomics)": modifications}))
+        )
+    return conn
+
+def test_filters_and_sort(snapshot_conn):
+    """Identity, modification and score filters combine as in the SQL path"""
+    snapshot = load_snapshot(snapshot_conn, "human")
+    records = snapshot.search(
+        isotype="Gly", modifications=["m1A58"], score_bounds=[("general_score", ">=", 50)],
+        sort_column="general_score", descending=True, limit=3
+    )
+    assert [r["gene_symbol"] for r in records] == ["tRNA-Gly-36", "tRNA-Gly-32", "tRNA-Gly-28"]
+    either = snapshot.search(isotype="Leu", modifications=["m1A"], filter_logic="or", limit=100)
+    assert len(either) == 30
+
+def test_seeded_sample_matches_sqlite(snapshot_conn):
+    """A seed picks the same genes as rowid sampling in SQLite"""
+    snapshot = load_snapshot(snapshot_conn, "human")
+    records = snapshot.search(isotype="Leu", sample=True, seed=11, limit=5)
+    rowids = sample_rowids(snapshot_conn, "human", "Isotype_from_Anticodon = ?", ["Leu"], 5, seed=11)
+    expected = [snapshot_conn.execute("SELECT GtRNAdb_Gene_Symbol FROM human WHERE rowid = ?", [r]).fetchone()[0]
+                for r in rowids]
+    assert [r["gene_symbol"] for r in records] == expected
+
+def test_facet_groups_match_sqlite(snapshot_conn):
+    """Facet groups of a match mask equal the grouped SQL scan over the same filter"""
+    snapshot = load_snapshot(snapshot_conn, "human")
+    mask = snapshot.match(modifications=["m1A"], score_bounds=[("isotype_score", "<=", 70)])
+    scores = {"general_score": "CAST(General_tRNA_Model_Score AS REAL)",
+              "isotype_score": "CAST(Isotype_Model_Score AS REAL)"}
+    expected = facet_groups(
+        snapshot_conn, "human",
+        "(' ' || COALESCE(json_extract(overview, '$.\"Known Modifications (Modomics)\"'), '') || ' ') "
+        "GLOB '* m1A[0-9e]*' AND CAST(Isotype_Model_Score AS REAL) <= 70", [], scores
+    )
+    assert sorted(snapshot.facet_groups(mask)) == sorted(expected)
+    assert sum(group[2] for group in expected) == int(mask.sum()) == 7
+
+def test_select_after_position(snapshot_conn):
+    """Pages resumed after the last position concatenate to the unpaged order"""
+    snapshot = load_snapshot(snapshot_conn, "human")
+    mask = snapshot.match(isotype="Leu")
+    everything = snapshot.select_indices(mask, sort_column="Anticodon", descending=True, limit=100).tolist()
+    paged, after = [], None
+    while True:
+        page = snapshot.select_indices(mask, sort_column="Anticodon", descending=True, limit=6, after=after).tolist()
+        if not page:
+            break
+        paged += page
+        after = snapshot.page_position(page[-1], "Anticodon")
+    assert paged == everything and len(paged) == 20
@@ -1,5 +1,6 @@
 """Standalone tests for RNA Database MCP server"""
 import asyncio
+import uuid
 import pytest
 from pathlib import Path
 from server import RNADatabaseServer
@@ -7,9 +8,34 @@ from server import RNADatabaseServer
 class MockModel:
     """Mock Django model for standalone testing"""
     objects = type('MockManager', (), {
-        'acreate': staticmethod(lambda **kwargs: type('MockInstance', (), kwargs)())
+        'acreate': staticmethod(lambda **kwargs: type('MockInstance', (), kwargs)()),
+        'abulk_create': staticmethod(lambda objs: asyncio.sleep(0, result=objs))
     })()
 
+    def __init__(self, **kwargs):
+        self.id = uuid.uuid4()
+        self.__dict__.update(kwargs)
+
+class MockQuerySet(list):
+    """Mock queryset that iterates asynchronously"""
+    def values_list(self, *args, **kwargs):
+        return self
+
+    async def __aiter__(self):
+        for item in self:
+            yield item
+
+class MockRecordModel(MockModel):
+    """Mock shared tRNA record model for standalone testing"""
+    objects = type('MockRecordManager', (), {
+        'filter': staticmethod(lambda **kwargs: MockQuerySet()),
+        'abulk_create': staticmethod(lambda objs, **kwargs: asyncio.sleep(0, result=objs))
+    })()
+
+    @staticmethod
+    def make_key(species, gene_symbol, source_version):
+        return f"{species}:{gene_symbol}:{source_version}"
+
 @pytest.fixture
 def server():
     """Create server instance for testing"""
@@ -0,0 +1,110 @@
+"""Tests for parsed secondary structures"""
+import json
+import random
+import sqlite3
+import pytest
+
+from chat.tools.rna_database.structure import (
+    STRUCTURE_INDEX_ENABLED, Structure, load_structure_index, pair_type, parse_structure, record_structure
+)
+
+# tRNA-Asn-GTT-2-3: cloverleaf with a G-T wobble in the acceptor stem
+ASN = (
+    ">>>>>>>..>>>>.........<<<<.>>>>>.......<<<<<.....>>>>>.......<<<<<<<<<<<<.",
+    "GTCTCTGTGGCGCAATCGGTtAGCGCGTTCGGCTGTTAACCGAAAGGtTGGTGGTTCGAGCCCACCCAGGGACG",
+)
+# tRNA-Asp-GTC-8-1: T-stem mismatch marked as a 1x1 interior loop
+ASP = (
+    ">>>>>>>..>>>>........<<<<.>>>>>.......<<<<<...>>>.>.......<.<<<<<<<<<<.",
+    "TCCTTGTTAGTATAGTGGTgAGTGTTTCTGCCTGTCATGTGGAGACTGGAGTTTGAGTCCCCAACAGGGAG",
+)
+
+def test_pair_table():
+    structure = Structure("((..))>><<.")
+    assert list(structure.pairs) == [5, 4, -1, -1, 1, 0, 9, 8, 7, 6, -1]
+    assert list(structure.base_pairs()) == [(0, 5), (1, 4), (6, 9), (7, 8)]
+    with pytest.raises(ValueError, match="Unbalanced"):
+        Structure(">>.<")
+    with pytest.raises(ValueError, match="Unbalanced"):
+        Structure(">.<<")
+    with pytest.raises(ValueError, match="Unknown"):
+        Structure(">.x<")
+
+def test_cloverleaf_stems_and_loops():
+    """Acceptor, D, anticodon and T stems around a four-way junction"""
+    structure = parse_structure(ASN[0])
+    assert [(s.start, s.end, s.length) for s in structure.stems] == [(0, 72, 7), (9, 25, 4), (27, 43, 5), (49, 65, 5)]
+    assert [loop.kind for loop in structure.loops] == ["multi", "hairpin", "hairpin", "hairpin", "external"]
+    junction, d_loop, anticodon_loop = structure.loops[:3]
+    assert junction.segments == ((7, 9), (26, 27), (44, 49))
+    assert d_loop.size == 9 and anticodon_loop.segments == ((32, 39),)
+    assert structure.loops[-1].segments == ((73, 74),)
+
+def test_mismatches():
+    """Non-Watson-Crick pairs and bases facing each other across a 1x1 loop"""
+    structure = parse_structure(ASN[0])
+    assert structure.mismatches(ASN[1]) == []
+    (wobble,) = structure.mismatches(ASN[1], include_wobble=True)
+    assert (wobble.five_prime, wobble.three_prime, wobble.bases, wobble.kind) == (3, 69, "TG", "wobble")
+
+    structure = parse_structure(ASP[0])
+    assert [loop.kind for loop in structure.loops].count("interior") == 1
+    (mismatch,) = structure.mismatches(ASP[1])
+    assert (mismatch.five_prime, mismatch.three_prime, mismatch.kind) == (49, 59, "unpaired")
+
+    assert Structure("(..)").mismatches("GAAG")[0].kind == "noncanonical"
+    with pytest.raises(ValueError, match="length"):
+        structure.mismatches("ACGU")
+    assert pair_type("g", "t") == "wobble" and pair_type("A", "U") == "canonical"
+
+def test_distance_and_cache():
+    """Base-pair distance counts pairs in exactly one structure"""
+    asn, asp = parse_structure(ASN[0]), parse_structure(ASP[0])
+    pairs_asn, pairs_asp = set(asn.base_pairs()), set(asp.base_pairs())
+    assert asn.distance(asp) == asp.distance(asn) == len(pairs_asn ^ pairs_asp)
+    assert asn.distance(asn) == 0
+    assert Structure("((.))").distance(Structure(".(.).")) == 1
+    assert parse_structure(ASN[0]) is asn
+    assert record_structure({"sequences": {"Secondary Structure (nested bp)": ASN[0]}}) is asn
+    assert record_structure({"sequences": {}}) is None
+    assert record_structure({"sequences": {"Secondary Structure (nested bp)": ">>"}}) is None
+
+def random_structure(rng, length):
+    """Random nested structure: pair a random unpaired position with a later one, never crossing"""
+    chars = ["."] * length
+    for _ in range(length // 4):
+        i, j = sorted(rng.sample(range(length), 2))
+        if j - i > 3 and all(c == "." for c in chars[i:j + 1]):
+            chars[i], chars[j] = ">", "<"
+    return "".join(chars)
+
+@pytest.mark.skipif(not STRUCTURE_INDEX_ENABLED, reason="requires numpy")
+def test_structure_index_matches_distance():
+    """Bit-packed distances equal Structure.distance, including pairs outside the universe"""
+    rng = random.Random(11)
+    folds = [ASN[0], ASP[0]] + [random_structure(rng, 76) for _ in range(60)]
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT, sequences TEXT)")
+    for k, fold in enumerate(folds):
+        sequences = {"Secondary Structure (nested bp)": fold}
+        conn.execute("INSERT INTO human VALUES (?, ?)", (f"tRNA-{k:02d}", json.dumps(sequences)))
+    conn.execute("""INSERT INTO human VALUES ('tRNA-broken', '{"Secondary Structure (nested bp)": ">>"}')""")
+    index = load_structure_index(conn, "human")
+
+    assert len(index) == len(folds) + 1
+    for query in [parse_structure(ASN[0]), Structure(random_structure(rng, 90))]:
+        expected = [query.distance(parse_structure(fold)) for fold in folds]
+        assert index.distances(query)[:len(folds)].tolist() == expected
+
+        ranked = index.rank(query, limit=5)
+        assert [distance for _, distance, _ in ranked] == sorted(expected)[:5]
+        assert "tRNA-broken" not in [symbol for symbol, _, _ in index.rank(query, limit=100)]
+        for symbol, distance, shared in ranked:
+            pairs = set(index.structures[index.by_symbol[symbol]].base_pairs())
+            assert shared == len(pairs & set(query.base_pairs()))
+
+    asn = parse_structure(ASN[0])
+    assert index.rank(asn, limit=1)[0] == ("tRNA-00", 0, asn.pair_count)
+    assert index.rank(asn, limit=1, exclude="tRNA-00")[0][0] != "tRNA-00"
+    assert all(distance <= 10 for _, distance, _ in index.rank(asn, limit=100, max_distance=10))
@@ -0,0 +1,63 @@
+"""Tests for the variant index and search filters"""
+import json
+import sqlite3
+import pytest
+from chat.tools.rna_database.schema import build_variant_index, parse_variant
+from chat.tools.rna_database.variants import VariantFilter, find_variants
+
+VARIANTS = {
+    "tRNA-A": [
+        {"tRNA Position": "2 (5′ Acceptor Stem)", "Genomic Position": "chr1:110", "dbSNP ID": "rs1",
+         "Ref/Alt Allele": "T / C", "Common SNP": "NoYesbase pair mismatch", "1K Genome": "Yesbase pair mismatch",
+         "Effect": "base pair mismatch"},
+        {"tRNA Position": "35 (Anticodon Loop)", "Genomic Position": "chr1:140", "dbSNP ID": "rs2",
+         "Ref/Alt Allele": "G / A", "Common SNP": "YesYesnon synonymous anticodon change",
+         "1K Genome": "Yesnon synonymous anticodon change", "Effect": "non synonymous anticodon change"},
+    ],
+    "tRNA-B": [
+        {"tRNA Position": "29 (5′ Anticodon Stem)", "Genomic Position": "chr2:529", "dbSNP ID": "rs3",
+         "Ref/Alt Allele": "G / A", "Common SNP": "NoNoGU base pair", "1K Genome": "NoGU base pair",
+         "Effect": "GU base pair"},
+        {"tRNA Position": "37:i7 ()", "Genomic Position": "chr2:545", "dbSNP ID": "rs4",
+         "Ref/Alt Allele": "- / T", "Common SNP": "NoNointron", "1K Genome": "Nointron", "Effect": "intron"},
+    ],
+}
+
+def test_parse_variant():
+    """Positions, regions, alleles and the scraped Yes/No flags are split out"""
+    variant = parse_variant(VARIANTS["tRNA-A"][1])
+    assert variant["rsid"] == "rs2"
+    assert (variant["chrom"], variant["position"]) == ("chr1", 140)
+    assert (variant["trna_position"], variant["trna_number"], variant["region"]) == ("35", 35, "anticodon loop")
+    assert (variant["ref"], variant["alt"], variant["common"], variant["thousand_genomes"]) == ("G", "A", True, True)
+    intron = parse_variant(VARIANTS["tRNA-B"][1])
+    assert (intron["trna_position"], intron["trna_number"], intron["region"]) == ("37:i7", None, "")
+    assert parse_variant("rs1") is None
+
+def test_filter_requires_a_condition():
+    with pytest.raises(ValueError):
+        VariantFilter.from_params({"limit": 5})
+    with pytest.raises(ValueError):
+        VariantFilter.from_params({"start": 100, "end": 200})
+
+@pytest.mark.parametrize("params, expected", [
+    ({"rsid": "RS3"}, ["rs3"]),
+    ({"region": "anticodon"}, ["rs2", "rs3"]),
+    ({"region": "5' acceptor stem"}, ["rs1"]),
+    ({"trna_position": "30-36"}, ["rs2"]),
+    ({"trna_position": "37:i7"}, ["rs4"]),
+    ({"effect": "gu base pair,intron"}, ["rs3", "rs4"]),
+    ({"chrom": "chr1", "start": 100, "end": 120}, ["rs1"]),
+    ({"common": "true"}, ["rs2"]),
+])
+def test_index_and_scan_agree(params, expected):
+    """The variant index and the JSON scan return the same variants"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE human (GtRNAdb_Gene_Symbol TEXT PRIMARY KEY, variants TEXT)")
+    conn.executemany("INSERT INTO human VALUES (?, ?)", [(s, json.dumps(v)) for s, v in VARIANTS.items()])
+    build_variant_index(conn, "human")
+    variant_filter = VariantFilter.from_params(params)
+    indexed = find_variants(conn, "human", variant_filter, 10, indexed=True)
+    scanned = find_variants(conn, "human", variant_filter, 10, indexed=False)
+    assert indexed == scanned
+    assert [variant["rsid"] for _, variant in indexed] == expected
@@ -0,0 +1,201 @@
+"""Variant (dbSNP) search over the GtRNAdb species tables.
+
+Upgraded databases hold one normalized row per variant in
+``<species>_variants`` (see schema.build_variant_index), indexed by rsID,
+genomic position, tRNA region/position and effect. The same filters are
+applied in Python to the parsed ``variants`` JSON of older files, so both
+paths return the same matches.
+"""
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .blobs import blob_text
+from .schema import VARIANT_COLUMNS, normalize_region, parse_variant, variant_table
+
+
+def _split(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+@dataclass(frozen=True)
+class VariantFilter:
+    """Conjunction of variant filters; unset filters match everything."""
+    rsids: Tuple[str, ...] = ()
+    chrom: Optional[str] = None
+    start: Optional[int] = None
+    end: Optional[int] = None
+    trna_positions: Tuple[str, ...] = ()
+    trna_range: Optional[Tuple[int, int]] = None
+    region: Optional[str] = None
+    effects: Tuple[str, ...] = ()
+    common: Optional[bool] = None
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "VariantFilter":
+        """Build a filter from search_variants parameters
+
+        Args:
+            params: rsid, chrom/start/end, trna_position ("34", "34,35" or a
+                range "34-36"), region (substring, e.g. "anticodon stem"),
+                effect and common
+
+        Raises:
+            ValueError: If no filter is given or a value is malformed
+        """
+        start = end = None
+        if params.get('start') is not None or params.get('end') is not None:
+            if not params.get('chrom'):
+                raise ValueError("start and end require chrom")
+            start, end = int(params.get('start', 0)), int(params.get('end', params.get('start', 0)))
+            start, end = min(start, end), max(start, end)
+
+        trna_positions, trna_range = (), None
+        positions = _split(params.get('trna_position'))
+        if len(positions) == 1 and '-' in positions[0]:
+            low, _, high = positions[0].partition('-')
+            if not (low.strip().isdigit() and high.strip().isdigit()):
+                raise ValueError(f"trna_position range must be numeric, got '{positions[0]}'")
+            trna_range = tuple(sorted((int(low), int(high))))
+        else:
+            trna_positions = tuple(positions)
+
+        common = params.get('common')
+        if isinstance(common, str):
+            common = common.strip().lower() in ('true', 'yes', '1')
+
+        variant_filter = cls(
+            rsids=tuple(rsid.lower() for rsid in _split(params.get('rsid'))),
+            chrom=params.get('chrom') or None,
+            start=start,
+            end=end,
+            trna_positions=trna_positions,
+            trna_range=trna_range,
+            region=normalize_region(params.get('region')) or None,
+            effects=tuple(effect.lower() for effect in _split(params.get('effect'))),
+            common=None if common is None else bool(common),
+        )
+        if variant_filter == cls():
+            raise ValueError("At least one of rsid, chrom, trna_position, region, effect or common is required")
+        return variant_filter
+
+    def where(self) -> Tuple[str, List[Any]]:
+        """SQL filter over the variant index table"""
+        clauses, params = [], []
+        if self.rsids:
+            clauses.append("rsid IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(self.rsids))
+        if self.chrom:
+            clauses.append("chrom = ?")
+            params.append(self.chrom)
+        if self.start is not None:
+            clauses.append("position BETWEEN ? AND ?")
+            params.extend([self.start, self.end])
+        if self.trna_positions:
+            clauses.append("trna_position IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(self.trna_positions))
+        if self.trna_range:
+            clauses.append("trna_number BETWEEN ? AND ?")
+            params.extend(self.trna_range)
+        if self.region:
+            clauses.append("region LIKE ? ESCAPE '\\'")
+            escaped = self.region.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if self.effects:
+            clauses.append("effect IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(self.effects))
+        if self.common is not None:
+            clauses.append("common = ?")
+            params.append(int(self.common))
+        return " AND ".join(clauses) or "1=1", params
+
+    def matches(self, variant: Dict[str, Any]) -> bool:
+        """Python equivalent of where() for a parse_variant dict"""
+        return (
+            (not self.rsids or variant["rsid"] in self.rsids)
+            and (not self.chrom or variant["chrom"] == self.chrom)
+            and (self.start is None or (variant["position"] is not None and self.start <= variant["position"] <= self.end))
+            and (not self.trna_positions or variant["trna_position"] in self.trna_positions)
+            and (not self.trna_range or (
+                variant["trna_number"] is not None
+                and self.trna_range[0] <= variant["trna_number"] <= self.trna_range[1]
+            ))
+            and (not self.region or self.region in variant["region"])
+            and (not self.effects or variant["effect"].lower() in self.effects)
+            and (self.common is None or variant["common"] == self.common)
+        )
+
+
+def _sort_key(hit: Tuple[int, Dict[str, Any]]) -> Tuple[Any, ...]:
+    gene_rowid, variant = hit
+    return (variant["chrom"] or "", variant["position"] or 0, variant["rsid"], gene_rowid)
+
+
+def find_variants(
+    conn: sqlite3.Connection,
+    table: str,
+    variant_filter: VariantFilter,
+    gene_limit: int,
+    indexed: bool
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """Find the variants matching a filter, for at most gene_limit genes
+
+    Runs on a pooled connection through QueryExecutor.run.
+
+    Args:
+        conn: Open connection to the database
+        table: Species table
+        variant_filter: Filters to apply
+        gene_limit: Maximum number of genes; all their matching variants are returned
+        indexed: Whether the variant index table exists
+
+    Returns:
+        (gene rowid, variant) pairs in genomic order, genes ordered by their
+        first matching variant
+    """
+    if indexed:
+        where, params = variant_filter.where()
+        index = variant_table(table)
+        rows = conn.execute(
+            f"SELECT gene_rowid, {', '.join(VARIANT_COLUMNS)} FROM {index} WHERE {where} "
+            f"AND gene_rowid IN ("
+            f"SELECT gene_rowid FROM {index} WHERE {where} GROUP BY gene_rowid "
+            f"ORDER BY MIN(COALESCE(chrom, '')), MIN(COALESCE(position, 0)), gene_rowid LIMIT ?)",
+            params + params + [gene_limit]
+        ).fetchall()
+        hits = []
+        for row in rows:
+            variant = dict(zip(VARIANT_COLUMNS, tuple(row)[1:]))
+            variant["common"] = bool(variant["common"])
+            variant["thousand_genomes"] = bool(variant["thousand_genomes"])
+            hits.append((row[0], variant))
+    else:
+        hits = []
+        for rowid, raw in conn.execute(f"SELECT rowid, variants FROM {table}"):
+            try:
+                entries = json.loads(blob_text(raw) or "[]")
+            except json.JSONDecodeError:
+                continue
+            for entry in entries if isinstance(entries, list) else []:
+                variant = parse_variant(entry)
+                if variant is not None and variant_filter.matches(variant):
+                    hits.append((rowid, variant))
+        first = {}
+        for hit in sorted(hits, key=_sort_key):
+            first.setdefault(hit[0], _sort_key(hit))
+        keep = set(sorted(first, key=first.get)[:max(gene_limit, 0)])
+        hits = [hit for hit in hits if hit[0] in keep]
+    return sorted(hits, key=_sort_key)
+
+
+def group_by_gene(hits: Sequence[Tuple[int, Dict[str, Any]]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Variants per gene rowid, genes in order of their first variant"""
+    grouped: Dict[int, List[Dict[str, Any]]] = {}
+    for gene_rowid, variant in hits:
+        grouped.setdefault(gene_rowid, []).append(variant)
+    return grouped
@@ -12,7 +12,7 @@ from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime
 from django.conf import settings
 
-from .models import Chat, Message
+from .models import Chat, Message, Sequence
 from authentication.models import User
 from .chatbot import ChatManager
 
@@ -205,13 +205,14 @@ class ChatHistoryView(View):
                 [start_idx:end_idx]
             ))()
             
-            # Get sequences for messages if they exist
+            # Get sequences for every message on the page in one query, joined to their records
             sequences = {}
-            for msg in messages:
-                get_sequences = lambda m=msg: list(m.sequences.all())
-                msg_sequences = await sync_to_async(get_sequences)()
-                if msg_sequences:
-                    sequences[str(msg.id)] = [seq.to_dict() for seq in msg_sequences]
+            page_sequences = await sync_to_async(lambda: list(
+                Sequence.objects.filter(message__in=messages)
+                .select_related('record')
+            ))()
+            for seq in page_sequences:
+                sequences.setdefault(str(seq.message_id), []).append(seq.to_dict())
             
             return JsonResponse({
                 'chat': {